@@ -32,6 +32,8 @@ following functions are available:
     'merge'
     'add_lines'
     'remove_lines'
+    'undo'
+    'redo'
     'finish'
 """
 
@@ -63,7 +63,7 @@ setup(
     python_requires=">=3.6",
     extras_require=optional_requirements,
     entry_points={
-        "console_scripts": [],
+        "console_scripts": ["compas_skeleton=compas_skeleton.__main__:main"],
     },
     ext_modules=[],
 )
@@ -9,7 +9,9 @@ compas_skeleton
 .. toctree::
     :maxdepth: 1
 
+    compas_skeleton.build
     compas_skeleton.datastructure
+    compas_skeleton.files
     compas_skeleton.rhino
 
 
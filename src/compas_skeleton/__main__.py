@@ -0,0 +1,148 @@
+"""Command line interface of compas_skeleton.
+
+Usage::
+
+    python -m compas_skeleton build manifest.jsonl --workers 8 --report report.jsonl
+    python -m compas_skeleton watch manifest.jsonl --interval 0.5
+    python -m compas_skeleton serve --port 8765 --workers 4
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+
+
+def _print_result(result, out):
+    line = '{:<6} {:>8.3f}s {:>10} faces  {}  {}'.format(
+        result['status'], result['timings'].get('total', 0.0), result['faces'], result['id'], result['output'])
+    print(line, file=out)
+    if result['status'] != 'ok':
+        print('       ' + result['error'], file=out)
+
+
+def _print_summary(summary, elapsed, out):
+    print('', file=out)
+    print('{} jobs, {} succeeded, {} failed, {} faces'.format(
+        summary['jobs'], summary['succeeded'], summary['failed'], summary['faces']), file=out)
+    print('{:.3f}s elapsed, {:.3f}s in jobs'.format(elapsed, summary['time']), file=out)
+    if summary['slowest']:
+        print('slowest: ' + ', '.join('{} ({:.3f}s)'.format(name, seconds) for name, seconds in summary['slowest']), file=out)
+    if summary['failures']:
+        print('failed: ' + ', '.join(summary['failures']), file=out)
+
+
+def build(args, out=sys.stdout):
+    import time
+    from compas_skeleton.build import read_manifest
+    from compas_skeleton.build import run_jobs
+    from compas_skeleton.build import summarize
+
+    jobs = read_manifest(args.manifest, args.output_dir)
+    start = time.time()
+    results = []
+    report = open(args.report, 'w') if args.report else None
+    try:
+        for result in run_jobs(jobs, args.workers, args.cache):
+            results.append(result)
+            if not args.quiet:
+                _print_result(result, out)
+            if report:
+                report.write(json.dumps(result) + '\n')
+                report.flush()
+    finally:
+        if report:
+            report.close()
+
+    summary = summarize(results)
+    _print_summary(summary, time.time() - start, out)
+    return 1 if summary['failed'] else 0
+
+
+def watch(args, out=sys.stdout):
+    from compas_skeleton.build import Watcher
+
+    def report(results):
+        for result in results:
+            if not args.quiet or result['status'] != 'ok':
+                _print_result(result, out)
+        out.flush()
+
+    watcher = Watcher(args.manifest, args.output_dir, args.cache)
+    print('watching {}, press Ctrl+C to stop'.format(args.manifest), file=out)
+    try:
+        watcher.run(args.interval, report)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def serve(args, out=sys.stdout):
+    from compas_skeleton.build import BuildService
+
+    service = BuildService(args.host, args.port, args.workers, args.max_pending, args.timeout, verbose=not args.quiet)
+    print('serving on {}, press Ctrl+C to stop'.format(service.url), file=out)
+    out.flush()
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+MANIFEST_KEYS = (
+    'Every job has a "lines" file and optionally an "output", a "format" (stl, ply, obj, json or npz), '
+    'a "type" (skeleton or skeleton3d) and an "id". A skeleton takes "node_width", "leaf_width", "leaf_extend" and "sub_level", '
+    'a 3D skeleton takes "branch_radius", "section_seg", "node_radius_fac" and "merge", '
+    'false to keep the triangles instead of merging them into quads.'
+)
+
+
+def parser():
+    parser = argparse.ArgumentParser(prog='python -m compas_skeleton', description='Build skeleton meshes without Rhino.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    command = commands.add_parser('build', help='build the jobs of a JSON lines manifest', epilog=MANIFEST_KEYS)
+    command.add_argument('manifest', help='JSON lines file with one job per line')
+    command.add_argument('-w', '--workers', type=int, default=None, help='number of processes, the number of CPUs by default')
+    command.add_argument('-o', '--output-dir', default=None, help='directory of relative output paths, the directory of the manifest by default')
+    command.add_argument('--cache', default=None, help='directory of a subdivision cache shared by the workers')
+    command.add_argument('--report', default=None, help='JSON lines file of the results of the jobs')
+    command.add_argument('-q', '--quiet', action='store_true', help='only print the summary')
+    command.set_defaults(run=build)
+
+    command = commands.add_parser('watch', help='rebuild the outputs of a manifest when their inputs change', epilog=MANIFEST_KEYS)
+    command.add_argument('manifest', help='JSON lines file with one job per line')
+    command.add_argument('-i', '--interval', type=float, default=0.5, help='time between two checks of the inputs in seconds')
+    command.add_argument('-o', '--output-dir', default=None, help='directory of relative output paths, the directory of the manifest by default')
+    command.add_argument('--cache', default=None, help='directory of a subdivision cache')
+    command.add_argument('-q', '--quiet', action='store_true', help='only print failures')
+    command.set_defaults(run=watch)
+
+    command = commands.add_parser('serve', help='serve builds over HTTP on the local host')
+    command.add_argument('--host', default='127.0.0.1', help='host name')
+    command.add_argument('-p', '--port', type=int, default=8765, help='port')
+    command.add_argument('-w', '--workers', type=int, default=None, help='number of worker processes, the number of CPUs by default')
+    command.add_argument('--max-pending', type=int, default=64, help='number of requests waiting for a worker before further requests are rejected')
+    command.add_argument('--timeout', type=float, default=None, help='time a request may take in seconds')
+    command.add_argument('-q', '--quiet', action='store_true', help='do not log the requests')
+    command.set_defaults(run=serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except (IOError, ValueError) as e:
+        print('error: {}'.format(e), file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+********************************************************************************
+compas_skeleton.build
+********************************************************************************
+
+.. currentmodule:: compas_skeleton.build
+
+Headless building of skeleton meshes, as used by ``python -m compas_skeleton``.
+
+Jobs
+====
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    read_lines
+    read_manifest
+    build_job
+    run_jobs
+    summarize
+
+Watching
+========
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    Watcher
+
+Service
+=======
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    BuildService
+    request_build
+
+"""
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import division
+
+from .jobs import read_lines
+from .jobs import read_manifest
+from .jobs import build_job
+from .jobs import run_jobs
+from .jobs import summarize
+from .watch import Watcher
+from .service import BuildService
+from .service import request_build
+
+
+__all__ = [
+    'read_lines',
+    'read_manifest',
+    'build_job',
+    'run_jobs',
+    'summarize',
+    'Watcher',
+    'BuildService',
+    'request_build'
+]
@@ -0,0 +1,403 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+
+__all__ = [
+    'read_lines',
+    'read_manifest',
+    'build_job',
+    'run_jobs',
+    'summarize',
+]
+
+
+TYPES = ('skeleton', 'skeleton3d')
+
+FORMATS = {
+    'skeleton': ('stl', 'ply', 'obj', 'json', 'npz'),
+    'skeleton3d': ('stl', 'ply', 'obj', 'json', 'npz'),
+}
+
+SKELETON_PARAMETERS = ('node_width', 'leaf_width', 'leaf_extend', 'sub_level')
+SKELETON3D_PARAMETERS = ('branch_radius', 'section_seg', 'node_radius_fac')
+
+DEFAULT_FORMAT = 'ply'
+
+# jobs interrupted this often by a crashing worker are run in a process of their own
+SHARED_ATTEMPTS = 2
+
+
+# ==============================================================================
+# input
+# ==============================================================================
+
+
+def read_lines(path):
+    """Read a set of lines from a file.
+
+    Parameters
+    ----------
+    path : str
+        A JSON file with a list of lines, or an object with the list as ``lines``,
+        every line given by the XYZ coordinates of its start and end point.
+        Or an OBJ file of which the polylines are split into lines.
+
+    Returns
+    -------
+    list
+        The lines as pairs of points.
+
+    """
+    if os.path.splitext(path)[1].lower() == '.obj':
+        return _read_obj_lines(path)
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data['lines']
+    return [(list(map(float, start)), list(map(float, end))) for start, end in data]
+
+
+def _read_obj_lines(path):
+    points = []
+    lines = []
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == 'v':
+                points.append([float(value) for value in parts[1:4]])
+            elif parts[0] == 'l':
+                indices = [int(part.split('/')[0]) for part in parts[1:]]
+                indices = [index - 1 if index > 0 else len(points) + index for index in indices]
+                lines.extend((points[i], points[j]) for i, j in zip(indices[:-1], indices[1:]))
+    return lines
+
+
+def _job(data, number, base, output_dir):
+    """Validate a job of a manifest and make its paths absolute."""
+    if 'lines' not in data:
+        raise ValueError('Job {} has no lines file.'.format(number))
+
+    job = dict(data)
+    # the id names the job in the reports, numbers as well
+    job['id'] = str(job.get('id', number))
+    job.setdefault('type', 'skeleton')
+    if job['type'] not in TYPES:
+        raise ValueError('Job {} has an unknown type: {}'.format(number, job['type']))
+
+    job['lines'] = os.path.abspath(os.path.join(base, job['lines']))
+    output = job.get('output')
+    if output:
+        format = job.get('format') or os.path.splitext(output)[1][1:] or DEFAULT_FORMAT
+    else:
+        format = job.get('format') or DEFAULT_FORMAT
+        output = os.path.splitext(os.path.basename(job['lines']))[0] + '.' + format
+    job['format'] = format.lower()
+    job['output'] = os.path.abspath(os.path.join(output_dir or base, output))
+    if job['format'] not in FORMATS[job['type']]:
+        raise ValueError('Job {} has an unsupported format for a {}: {}'.format(number, job['type'], job['format']))
+    return job
+
+
+def read_manifest(path, output_dir=None):
+    """Read the build jobs of a manifest.
+
+    Parameters
+    ----------
+    path : str
+        A JSON lines file, with one job per line.
+        Empty lines and lines starting with ``#`` are ignored.
+    output_dir : str, optional
+        The directory of relative output paths, the directory of the manifest by default.
+
+    Returns
+    -------
+    list
+        The jobs as dicts, with absolute paths.
+
+    Notes
+    -----
+    Every job has the following keys, of which only ``lines`` is required:
+
+    * ``lines``: the lines file, see :func:`read_lines`, relative to the manifest.
+    * ``output``: the output file, by default named after the lines file.
+    * ``format``: ``stl``, ``ply``, ``obj``, ``json`` or ``npz``, by default the extension of the output or ``ply``.
+      The mesh formats are the subdivided mesh, ``json`` and ``npz`` are the coarse skeleton.
+      For a 3D skeleton, ``json`` is its mesh, ``npz`` its nodes, branches, parameters and mesh.
+    * ``type``: ``skeleton`` or ``skeleton3d``.
+    * ``id``: the name of the job in the report, the line number by default.
+    * ``node_width``, ``leaf_width``, ``leaf_extend`` and ``sub_level`` of a skeleton.
+    * ``branch_radius``, ``section_seg`` and ``node_radius_fac`` of a 3D skeleton.
+    * ``merge``: whether the triangles of a 3D skeleton are merged into quads, true by default.
+
+    Examples
+    --------
+    .. code-block:: none
+
+        {"lines": "tree.json", "node_width": 1.5, "leaf_width": 0.5, "sub_level": 3, "format": "stl"}
+        {"lines": "frame.obj", "type": "skeleton3d", "branch_radius": 0.2, "output": "frame.obj"}
+        {"lines": "frame.obj", "type": "skeleton3d", "merge": false, "output": "frame-triangles.stl"}
+
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                raise ValueError('Line {} of the manifest is not valid JSON: {}'.format(number, e))
+            jobs.append(_job(data, number, base, output_dir))
+    return jobs
+
+
+# ==============================================================================
+# building
+# ==============================================================================
+
+
+def build_skeleton(job, lines):
+    """Construct the skeleton of a job from its lines."""
+    if job['type'] == 'skeleton3d':
+        from compas_skeleton.datastructure import Skeleton3D
+
+        skeleton = Skeleton3D.from_skeleton_lines(lines)
+        for name in SKELETON3D_PARAMETERS:
+            if name in job:
+                setattr(skeleton, name, job[name])
+        skeleton.generate_mesh()
+        if job.get('merge', True):
+            skeleton.merge_triangles()
+        return skeleton
+
+    from compas_skeleton.datastructure import Skeleton
+
+    skeleton = Skeleton.from_skeleton_lines(lines)
+    for name in SKELETON_PARAMETERS:
+        if name in job:
+            skeleton.attributes[name] = job[name]
+    skeleton.update_mesh_vertices_pos()
+    return skeleton
+
+
+def update_skeleton(skeleton, job, lines):
+    """Update the skeleton of a job to new lines, see ``update_skeleton_lines``.
+
+    A :class:`compas_skeleton.datastructure.Skeleton3D` generates again
+    the meshes of the nodes and branches which changed only.
+    """
+    skeleton.update_skeleton_lines(lines)
+    if job['type'] == 'skeleton3d':
+        skeleton.generate_mesh()
+        if job.get('merge', True):
+            skeleton.merge_triangles()
+    return skeleton
+
+
+def write_skeleton(skeleton, job, cache=None, chunked=True):
+    """Write the output of a job.
+    The output is written to a temporary file which replaces the output once it is complete.
+
+    Parameters
+    ----------
+    skeleton : :class:`compas_skeleton.datastructure.Skeleton` or :class:`compas_skeleton.datastructure.Skeleton3D`
+        The skeleton of the job.
+    job : dict
+        The job.
+    cache : str, optional
+        The directory of a subdivision cache.
+    chunked : bool, optional
+        Subdivide and write the mesh of a skeleton patch by patch.
+        Otherwise, it is subdivided as a whole, reusing the subdivision operators of the skeleton.
+
+    Returns
+    -------
+    int
+        The number of faces written.
+
+    """
+    from compas_skeleton.datastructure import Skeleton3D
+    from compas_skeleton.files import array_chunks
+    from compas_skeleton.files import write_chunks
+
+    path, format = job['output'], job['format']
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    # the temporary file is created like the output would be, with the permissions of the umask
+    temp = os.path.join(directory, '.{}.{}.{}'.format(os.path.basename(path), uuid.uuid4().hex[:12], format))
+    with open(temp, 'xb'):
+        pass
+    try:
+        if format == 'json':
+            skeleton.to_json(temp)
+            count = skeleton.number_of_faces()
+        elif format == 'npz':
+            skeleton.to_npz(temp)
+            count = skeleton.number_of_faces()
+        elif isinstance(skeleton, Skeleton3D):
+            count = write_chunks(temp, array_chunks(*skeleton.to_arrays()), format)
+        elif chunked or cache is not None:
+            count = skeleton.write(temp, format, cache=cache)
+        else:
+            count = write_chunks(temp, array_chunks(*skeleton.to_arrays()), format)
+        os.replace(temp, path)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+    return count
+
+
+def build_job(job, cache=None):
+    """Run a build job, catching its errors.
+
+    Parameters
+    ----------
+    job : dict
+        A job, as read by :func:`read_manifest`.
+    cache : str, optional
+        The directory of a :class:`compas_skeleton.files.SubdivisionCache`.
+
+    Returns
+    -------
+    dict
+        The result, with the ``id`` and ``output`` of the job, the ``status`` ``ok`` or ``failed``,
+        the ``error`` and ``traceback`` of a failed job, the number of ``faces`` written,
+        and the ``timings`` of the stages ``read``, ``build`` and ``write`` and the ``total`` in seconds.
+
+    """
+    result = {'id': job['id'], 'output': job['output'], 'status': 'ok', 'faces': 0, 'timings': {}}
+    timings = result['timings']
+    start = stage = time.time()
+    try:
+        lines = read_lines(job['lines'])
+        timings['read'] = time.time() - stage
+        stage = time.time()
+        skeleton = build_skeleton(job, lines)
+        timings['build'] = time.time() - stage
+        stage = time.time()
+        result['faces'] = write_skeleton(skeleton, job, cache)
+        timings['write'] = time.time() - stage
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+        result['traceback'] = traceback.format_exc()
+    timings['total'] = time.time() - start
+    return result
+
+
+def _terminated(job):
+    return {
+        'id': job['id'],
+        'output': job['output'],
+        'status': 'failed',
+        'faces': 0,
+        'timings': {},
+        'error': 'The worker process running the job terminated abruptly.',
+    }
+
+
+def run_jobs(jobs, workers=None, cache=None):
+    """Run build jobs in a pool of processes.
+
+    Parameters
+    ----------
+    jobs : list
+        The jobs, as read by :func:`read_manifest`.
+    workers : int, optional
+        The number of processes, the number of CPUs by default.
+        With one worker, the jobs are run in the current process.
+    cache : str, optional
+        The directory of a :class:`compas_skeleton.files.SubdivisionCache` shared by the workers.
+
+    Yields
+    ------
+    dict
+        The results of the jobs, see :func:`build_job`, in the order in which they finish.
+
+    Notes
+    -----
+    An error of a job is part of its result and does not affect the other jobs.
+    If a worker process crashes, the jobs it interrupted are run again,
+    and in a process of their own when they were interrupted repeatedly,
+    so that only the job which crashed the process fails.
+
+    """
+    if workers is not None and workers <= 1:
+        for job in jobs:
+            yield build_job(job, cache)
+        return
+
+    attempts = [0] * len(jobs)
+    pending = list(range(len(jobs)))
+    while pending:
+        isolated = [i for i in pending if attempts[i] >= SHARED_ATTEMPTS]
+        shared = [i for i in pending if attempts[i] < SHARED_ATTEMPTS]
+        pending = []
+
+        for i in isolated:
+            with ProcessPoolExecutor(1) as executor:
+                try:
+                    result = executor.submit(build_job, jobs[i], cache).result()
+                except BrokenProcessPool:
+                    result = _terminated(jobs[i])
+            yield result
+
+        if not shared:
+            continue
+        with ProcessPoolExecutor(workers) as executor:
+            futures = {executor.submit(build_job, jobs[i], cache): i for i in shared}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    attempts[i] += 1
+                    pending.append(i)
+                    continue
+                yield result
+
+
+def summarize(results):
+    """Summarize the results of build jobs.
+
+    Parameters
+    ----------
+    results : list
+        The results, see :func:`build_job`.
+
+    Returns
+    -------
+    dict
+        The number of ``jobs``, ``succeeded`` and ``failed`` jobs, the ``faces`` written,
+        the sum of the ``time`` of the jobs in seconds, the ids of the ``failures``,
+        and the ids and times of the ``slowest`` five jobs.
+
+    """
+    failures = [result['id'] for result in results if result['status'] != 'ok']
+    times = sorted(((result['timings'].get('total', 0.0), result['id']) for result in results), reverse=True)
+    return {
+        'jobs': len(results),
+        'succeeded': len(results) - len(failures),
+        'failed': len(failures),
+        'faces': sum(result['faces'] for result in results),
+        'time': sum(seconds for seconds, _ in times),
+        'failures': failures,
+        'slowest': [(name, seconds) for seconds, name in times[:5]],
+    }
@@ -0,0 +1,542 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.request import Request
+from urllib.request import urlopen
+
+import numpy as np
+
+from .jobs import SKELETON3D_PARAMETERS
+from .jobs import SKELETON_PARAMETERS
+from .jobs import TYPES
+from .jobs import build_skeleton
+
+
+__all__ = [
+    'BuildService',
+    'request_build',
+]
+
+
+FORMATS = ('arrays', 'json', 'stl', 'ply', 'obj')
+
+CONTENT_TYPES = {
+    'arrays': 'application/octet-stream',
+    'json': 'application/json',
+    'stl': 'model/stl',
+    'ply': 'application/octet-stream',
+    'obj': 'text/plain',
+}
+
+MAX_BODY_SIZE = 2 ** 28
+
+# the subdivision operators of a worker process, shared by the skeletons it builds,
+# and the topology versions of these skeletons, by their vertices and faces
+_OPERATORS = OrderedDict()
+_TOPOLOGIES = OrderedDict()
+
+
+# ==============================================================================
+# worker
+# ==============================================================================
+
+
+def _warm():
+    """Import the modules of the workers before the first request.
+    Interrupts are left to the service, which shuts the workers down."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from compas_skeleton.datastructure import Skeleton  # noqa: F401
+    from compas_skeleton.datastructure import Skeleton3D  # noqa: F401
+    from compas_skeleton.datastructure import SubdivisionOperator  # noqa: F401
+    from compas_skeleton.files import write_chunks  # noqa: F401
+
+
+def _share_operators(skeleton):
+    """Let the skeleton use the subdivision operators of the skeletons with the same topology built before."""
+    from compas_skeleton.datastructure.skeleton import OPERATOR_CACHE_SIZE
+
+    key = (tuple(skeleton.vertex), tuple(tuple(vertices) for vertices in skeleton.face.values()))
+    skeleton._topology = _TOPOLOGIES.setdefault(key, skeleton._topology)
+    _TOPOLOGIES.move_to_end(key)
+    while len(_TOPOLOGIES) > OPERATOR_CACHE_SIZE:
+        _TOPOLOGIES.popitem(last=False)
+    skeleton._operators = _OPERATORS
+
+
+def _build(request):
+    """Build the mesh of a request in a worker process."""
+    from compas_skeleton.datastructure import Skeleton3D
+    from compas_skeleton.files import array_chunks
+    from compas_skeleton.files import write_chunks
+
+    timings = {}
+    start = time.time()
+    skeleton = build_skeleton(request, request['lines'])
+    if not isinstance(skeleton, Skeleton3D):
+        _share_operators(skeleton)
+    timings['build'] = time.time() - start
+
+    stage = time.time()
+    vertices, faces = skeleton.to_arrays(dtype=request.get('dtype', 'float64'))
+    timings['subdivide'] = time.time() - stage
+
+    format = request['format']
+    if format in ('arrays', 'json'):
+        return {'vertices': vertices, 'faces': faces, 'timings': timings}
+
+    stage = time.time()
+    handle, path = tempfile.mkstemp(suffix='.' + format)
+    os.close(handle)
+    try:
+        write_chunks(path, array_chunks(vertices, faces), format)
+        with open(path, 'rb') as f:
+            data = f.read()
+    finally:
+        os.remove(path)
+    timings['write'] = time.time() - stage
+    return {'data': data, 'timings': timings}
+
+
+# ==============================================================================
+# requests
+# ==============================================================================
+
+
+class _RequestError(Exception):
+
+    def __init__(self, status, message, headers=None):
+        super(_RequestError, self).__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _parse_request(content_type, body, query):
+    """Read the lines and parameters of a request from a JSON body, or from a binary body and the query."""
+    params = {key: _value(value) for key, value in query.items()}
+    if content_type == 'application/octet-stream':
+        if len(body) % 48:
+            raise _RequestError(400, 'A binary body has to be lines of two float64 points, 48 bytes per line.')
+        lines = np.frombuffer(body, dtype='<f8').reshape(-1, 2, 3).tolist()
+    else:
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except ValueError as e:
+            raise _RequestError(400, 'The body is not valid JSON: {}'.format(e))
+        if not isinstance(data, dict) or 'lines' not in data:
+            raise _RequestError(400, 'The body has to be an object with the lines.')
+        lines = data.pop('lines')
+        params.update(data)
+
+    request = {'type': params.get('type', 'skeleton'), 'format': params.get('format', 'arrays'), 'lines': lines}
+    if request['type'] not in TYPES:
+        raise _RequestError(400, 'Unknown type: {}'.format(request['type']))
+    if request['format'] not in FORMATS:
+        raise _RequestError(400, 'Unsupported format: {}'.format(request['format']))
+    for name in SKELETON_PARAMETERS + SKELETON3D_PARAMETERS + ('merge', 'dtype'):
+        if name in params:
+            request[name] = params[name]
+    if request.get('dtype', 'float64') not in ('float32', 'float64'):
+        raise _RequestError(400, 'Unsupported dtype: {}'.format(request['dtype']))
+    return request
+
+
+def _arrays_response(vertices, faces):
+    headers = {
+        'X-Vertex-Count': str(len(vertices)),
+        'X-Vertex-Dtype': vertices.dtype.str,
+        'X-Face-Count': str(len(faces)),
+        'X-Face-Size': str(faces.shape[1] if faces.ndim == 2 else 0),
+    }
+    vertices = np.ascontiguousarray(vertices, dtype=vertices.dtype.newbyteorder('<'))
+    faces = np.ascontiguousarray(faces, dtype='<i4')
+    return vertices.tobytes() + faces.tobytes(), headers
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode('utf-8'), headers=headers)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != '/status':
+            self._send_json(404, {'error': 'Not found.'})
+            return
+        self._send_json(200, self.server.service.status())
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            if url.path != '/build':
+                raise _RequestError(404, 'Not found.')
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > self.server.service.max_body_size:
+                self.close_connection = True
+                raise _RequestError(413, 'The body is larger than {} bytes.'.format(self.server.service.max_body_size))
+            body = self.rfile.read(length)
+            content_type = (self.headers.get('Content-Type') or 'application/json').split(';')[0].strip()
+            request = _parse_request(content_type, body, dict(parse_qsl(url.query)))
+            result = self.server.service.submit(request)
+        except _RequestError as e:
+            self._send_json(e.status, {'error': str(e)}, e.headers)
+            return
+        except Exception as e:
+            # the traceback is logged by the service, also if it is not verbose, and not sent to the client
+            sys.stderr.write('{} - - [{}] {}'.format(self.address_string(), self.log_date_time_string(), traceback.format_exc()))
+            self._send_json(500, {'error': '{}: {}'.format(type(e).__name__, e)})
+            return
+
+        headers = {'X-Timings': json.dumps(result['timings'])}
+        format = request['format']
+        if format == 'arrays':
+            body, array_headers = _arrays_response(result['vertices'], result['faces'])
+            headers.update(array_headers)
+            self._send(200, body, CONTENT_TYPES[format], headers)
+        elif format == 'json':
+            data = {'vertices': result['vertices'].tolist(), 'faces': [[key for key in face if key >= 0] for face in result['faces'].tolist()]}
+            self._send_json(200, data, headers)
+        else:
+            self._send(200, result['data'], CONTENT_TYPES[format], headers)
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+# ==============================================================================
+# service
+# ==============================================================================
+
+
+class BuildService(object):
+    """A local HTTP service building skeleton meshes with a pool of warm worker processes.
+
+    The workers import the package when the service starts
+    and keep the subdivision operators of the skeletons they built,
+    so that building a skeleton with a known topology only smooths its vertices.
+
+    Parameters
+    ----------
+    host : str, optional
+        The host name, the local host by default.
+    port : int, optional
+        The port, zero for any free port.
+    workers : int, optional
+        The number of worker processes, which is the number of builds running at the same time.
+        The number of CPUs by default.
+    max_pending : int, optional
+        The number of requests waiting for a worker.
+        Further requests are rejected with the status 503 until a worker is available.
+    timeout : float, optional
+        The time a request may take in seconds, including the time it waits for a worker.
+        Slower requests are answered with the status 504. No limit by default.
+    max_body_size : int, optional
+        The size of a request in bytes.
+    verbose : bool, optional
+        Log the requests to the standard error.
+
+    Notes
+    -----
+    The service has two endpoints:
+
+    * ``GET /status`` returns the number of workers and of running, pending, completed, failed and rejected builds.
+    * ``POST /build`` builds a skeleton. The body is a JSON object with the ``lines``,
+      as pairs of points, and the parameters of a job of a manifest, see :func:`compas_skeleton.build.read_manifest`,
+      or the lines as little endian float64 with the content type ``application/octet-stream``
+      and the parameters in the query string.
+      The ``format`` of the response is one of
+
+      * ``arrays``: the vertices, followed by the faces as int32 padded with -1.
+        The headers ``X-Vertex-Count``, ``X-Vertex-Dtype``, ``X-Face-Count`` and ``X-Face-Size`` describe the arrays.
+        The vertex ``dtype`` is ``float64`` or ``float32``.
+      * ``json``: an object with the ``vertices`` and the ``faces``.
+      * ``stl``, ``ply`` or ``obj``: the mesh file.
+
+      The header ``X-Timings`` has the times of the stages of the build.
+
+    Examples
+    --------
+    >>> with BuildService(port=8765, workers=4) as service:
+    >>>     vertices, faces = request_build(service.url, lines, sub_level=2)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, workers=None, max_pending=64, timeout=None, max_body_size=MAX_BODY_SIZE, verbose=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_body_size = max_body_size
+        self.verbose = verbose
+        self.counts = {'completed': 0, 'failed': 0, 'rejected': 0, 'timeout': 0}
+        self._active = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._restart = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._executor = None
+        self._thread = None
+        self.server = _Server((host, port), _Handler)
+        self.server.service = self
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _start_workers(self):
+        try:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_warm)
+        except TypeError:
+            self._executor = ProcessPoolExecutor(self.workers)
+        for future in [self._executor.submit(_warm) for _ in range(self.workers)]:
+            future.result()
+
+    def start(self):
+        """Start the workers and serve requests in a background thread."""
+        self._start_workers()
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def serve_forever(self):
+        """Start the workers and serve requests until interrupted."""
+        self._start_workers()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop serving requests and shut the workers down."""
+        if self._thread:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        with self._restart:
+            if self._executor:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def status(self):
+        """The state of the service.
+
+        Returns
+        -------
+        dict
+            The number of ``workers``, the numbers of ``running`` and ``pending`` builds, the limit ``max_pending``,
+            and the numbers of ``completed``, ``failed``, ``rejected`` and ``timeout`` requests.
+
+        """
+        with self._lock:
+            status = {
+                'workers': self.workers,
+                'running': self._running,
+                'pending': self._active - self._running,
+                'max_pending': self.max_pending,
+            }
+            status.update(self.counts)
+        return status
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _release(self, future):
+        with self._lock:
+            self._running -= 1
+        self._slots.release()
+
+    def _restart_workers(self, executor):
+        """Replace a pool of which a worker crashed, unless another request replaced it already.
+        Requests submitted in the meantime wait for the new pool."""
+        with self._restart:
+            if self._executor is not executor:
+                return
+            executor.shutdown(wait=False)
+            self._start_workers()
+
+    def _submit(self, request):
+        """Submit a build to the pool, or to a new pool if a worker of the pool crashed."""
+        with self._restart:
+            executor = self._executor
+        try:
+            return executor, executor.submit(_build, request)
+        except BrokenProcessPool:
+            self._restart_workers(executor)
+        with self._restart:
+            executor = self._executor
+        return executor, executor.submit(_build, request)
+
+    def submit(self, request):
+        """Build a request in a worker, waiting for a free worker first.
+
+        Parameters
+        ----------
+        request : dict
+            The lines, the type, the format and the parameters.
+
+        Returns
+        -------
+        dict
+            The ``vertices`` and ``faces``, or the file ``data``, and the ``timings``.
+
+        """
+        with self._lock:
+            if self._active >= self.workers + self.max_pending:
+                self.counts['rejected'] += 1
+                raise _RequestError(503, 'The service is busy, {} builds are pending.'.format(self.max_pending), {'Retry-After': '1'})
+            self._active += 1
+
+        start = time.time()
+        try:
+            if not self._slots.acquire(timeout=self.timeout):
+                self._count('timeout')
+                raise _RequestError(504, 'No worker was available within {} seconds.'.format(self.timeout))
+
+            # the slot is released when the build finishes, also if the request timed out before
+            with self._lock:
+                self._running += 1
+            try:
+                executor, future = self._submit(request)
+            except Exception:
+                self._release(None)
+                raise
+            future.add_done_callback(self._release)
+
+            remaining = None if self.timeout is None else max(0.0, self.timeout - (time.time() - start))
+            try:
+                result = future.result(remaining)
+            except TimeoutError:
+                self._count('timeout')
+                raise _RequestError(504, 'The build took longer than {} seconds.'.format(self.timeout))
+            except BrokenProcessPool:
+                self._count('failed')
+                self._restart_workers(executor)
+                raise _RequestError(500, 'The worker process terminated abruptly.')
+            except Exception as e:
+                self._count('failed')
+                raise _RequestError(422, '{}: {}'.format(type(e).__name__, e))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+        self._count('completed')
+        result['timings']['total'] = time.time() - start
+        return result
+
+
+# ==============================================================================
+# client
+# ==============================================================================
+
+
+def request_build(url, lines, format='arrays', binary=True, timeout=None, **params):
+    """Request a build from a :class:`BuildService`.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the service.
+    lines : list
+        The lines as pairs of points.
+    format : {'arrays', 'json', 'stl', 'ply', 'obj'}, optional
+        The format of the response.
+    binary : bool, optional
+        Send the lines as binary data instead of JSON.
+    timeout : float, optional
+        The time to wait for the response in seconds.
+    params : dict
+        The type and the parameters of the skeleton, see :func:`compas_skeleton.build.read_manifest`.
+
+    Returns
+    -------
+    tuple or bytes
+        The vertices and the faces as arrays for the format ``arrays``, the vertices and faces as lists for ``json``,
+        and the content of the file otherwise.
+
+    Raises
+    ------
+    RuntimeError
+        If the service responds with an error.
+
+    """
+    params['format'] = format
+    if binary:
+        body = np.asarray(lines, dtype='<f8').reshape(-1, 2, 3).tobytes()
+        request = Request(url.rstrip('/') + '/build?' + urlencode({key: json.dumps(value) for key, value in params.items()}),
+                          data=body, headers={'Content-Type': 'application/octet-stream'})
+    else:
+        params['lines'] = [[list(start), list(end)] for start, end in lines]
+        request = Request(url.rstrip('/') + '/build', data=json.dumps(params).encode('utf-8'), headers={'Content-Type': 'application/json'})
+
+    try:
+        response = urlopen(request, timeout=timeout)
+    except HTTPError as e:
+        try:
+            message = json.loads(e.read().decode('utf-8'))['error']
+        except Exception:
+            message = e.reason
+        raise RuntimeError('The build failed with the status {}: {}'.format(e.code, message))
+
+    with response:
+        body = response.read()
+        if format == 'json':
+            data = json.loads(body.decode('utf-8'))
+            return data['vertices'], data['faces']
+        if format != 'arrays':
+            return body
+        headers = response.headers
+        nv, nf, size = int(headers['X-Vertex-Count']), int(headers['X-Face-Count']), int(headers['X-Face-Size'])
+        dtype = np.dtype(headers['X-Vertex-Dtype'])
+        vertices = np.frombuffer(body, dtype=dtype, count=nv * 3).reshape(nv, 3)
+        faces = np.frombuffer(body, dtype='<i4', offset=nv * 3 * dtype.itemsize, count=nf * size).reshape(nf, size)
+        return vertices, faces
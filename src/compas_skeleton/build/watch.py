@@ -0,0 +1,199 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import time
+import traceback
+
+from .jobs import build_skeleton
+from .jobs import read_lines
+from .jobs import read_manifest
+from .jobs import update_skeleton
+from .jobs import write_skeleton
+
+
+__all__ = [
+    'Watcher',
+]
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _failed(job, error):
+    return {
+        'id': job['id'],
+        'output': job['output'],
+        'status': 'failed',
+        'faces': 0,
+        'timings': {},
+        'error': '{}: {}'.format(type(error).__name__, error),
+    }
+
+
+class Watcher(object):
+    """Rebuild the outputs of the jobs of a manifest when their inputs change.
+
+    The skeletons of the jobs are kept in memory. When a lines file changes,
+    the new lines are compared to the previous ones, and the skeletons of the jobs using the file are updated.
+    If the lines only moved, the skeletons keep their topology and subdivision operators,
+    see :meth:`compas_skeleton.datastructure.Skeleton.update_skeleton_lines`,
+    otherwise they are rebuilt from the lines.
+    The meshes of the skeletons 3D are generated again around the nodes and branches which changed only,
+    see :meth:`compas_skeleton.datastructure.Skeleton3D.update_skeleton_lines`.
+    When the manifest changes, only the jobs which were added or changed are rebuilt.
+
+    Parameters
+    ----------
+    manifest : str
+        The path of the manifest, see :func:`compas_skeleton.build.read_manifest`.
+    output_dir : str, optional
+        The directory of relative output paths, the directory of the manifest by default.
+    cache : str, optional
+        The directory of a :class:`compas_skeleton.files.SubdivisionCache`.
+
+    Examples
+    --------
+    >>> watcher = Watcher('manifest.jsonl')
+    >>> for result in watcher.poll():
+    >>>     print(result['id'], result['status'])
+    >>> watcher.run(interval=0.5)
+    """
+
+    def __init__(self, manifest, output_dir=None, cache=None):
+        self.manifest = manifest
+        self.output_dir = output_dir
+        self.cache = cache
+        self.jobs = {}
+        self.skeletons = {}
+        self.lines = {}
+        self._stamps = {}
+        self._started = False
+
+    def _read_manifest(self):
+        """Read the manifest if it changed, return the ids of the added and changed jobs.
+        If the manifest is invalid, the previous jobs are kept until it changes again."""
+        stamp = _stamp(self.manifest)
+        if stamp == self._stamps.get(self.manifest):
+            return set()
+        self._stamps[self.manifest] = stamp
+        jobs = read_manifest(self.manifest, self.output_dir)
+
+        jobs = {job['id']: job for job in jobs}
+        changed = set(key for key, job in jobs.items() if self.jobs.get(key) != job)
+        for key in set(self.skeletons) - set(jobs):
+            del self.skeletons[key]
+        self.jobs = jobs
+        return changed
+
+    def _read_lines(self):
+        """Read the lines files which changed, return their paths if the lines differ, and the read errors."""
+        changed = set()
+        errors = {}
+        for path in set(job['lines'] for job in self.jobs.values()):
+            stamp = _stamp(path)
+            if path in self._stamps and stamp == self._stamps[path]:
+                continue
+            # a file which cannot be read is read again once it changes
+            self._stamps[path] = stamp
+            try:
+                lines = read_lines(path)
+            except Exception as e:
+                errors[path] = e
+                continue
+            if lines != self.lines.get(path):
+                self.lines[path] = lines
+                changed.add(path)
+        return changed, errors
+
+    def _is_current(self, job):
+        """Whether the output of a job is newer than its inputs."""
+        output = _stamp(job['output'])
+        inputs = [self._stamps.get(self.manifest), self._stamps.get(job['lines'])]
+        return output is not None and all(stamp and output[0] >= stamp[0] for stamp in inputs)
+
+    def _update(self, key, rebuild, write=True):
+        job = self.jobs[key]
+        result = {'id': key, 'output': job['output'], 'status': 'ok', 'faces': 0, 'timings': {}}
+        timings = result['timings']
+        start = time.time()
+        try:
+            lines = self.lines[job['lines']]
+            skeleton = self.skeletons.get(key)
+            if rebuild or skeleton is None:
+                skeleton = build_skeleton(job, lines)
+            else:
+                skeleton = update_skeleton(skeleton, job, lines)
+            self.skeletons[key] = skeleton
+            timings['build'] = time.time() - start
+            if write:
+                stage = time.time()
+                result['faces'] = write_skeleton(skeleton, job, self.cache, chunked=False)
+                timings['write'] = time.time() - stage
+        except Exception as e:
+            # the job is built again once its inputs change
+            self.skeletons[key] = None
+            result['status'] = 'failed'
+            result['error'] = '{}: {}'.format(type(e).__name__, e)
+            result['traceback'] = traceback.format_exc()
+        timings['total'] = time.time() - start
+        return result
+
+    def poll(self):
+        """Check the inputs once, and update and write the outputs of the jobs of which the inputs changed.
+
+        At the first poll, all skeletons are built,
+        but only the outputs which are older than their inputs are written.
+
+        Returns
+        -------
+        list
+            The results of the updated jobs, see :func:`compas_skeleton.build.build_job`.
+
+        """
+        results = []
+        try:
+            changed_jobs = self._read_manifest()
+        except (IOError, ValueError) as e:
+            changed_jobs = set()
+            results.append(_failed({'id': 'manifest', 'output': self.manifest}, e))
+        changed_lines, errors = self._read_lines()
+
+        for key, job in self.jobs.items():
+            if job['lines'] in errors:
+                results.append(_failed(job, errors[job['lines']]))
+                continue
+            if job['lines'] not in self.lines:
+                continue
+            if key not in changed_jobs and job['lines'] not in changed_lines and key in self.skeletons:
+                continue
+            write = self._started or not self._is_current(job)
+            result = self._update(key, key in changed_jobs, write)
+            if write or result['status'] != 'ok':
+                results.append(result)
+        self._started = True
+        return results
+
+    def run(self, interval=0.5, callback=None):
+        """Poll the inputs until interrupted.
+
+        Parameters
+        ----------
+        interval : float, optional
+            The time between two polls in seconds.
+        callback : callable, optional
+            A function called with the results of every poll which updated jobs.
+
+        """
+        while True:
+            start = time.time()
+            results = self.poll()
+            if results and callback:
+                callback(results)
+            time.sleep(max(0.0, interval - (time.time() - start)))
@@ -13,20 +13,63 @@ Skeleton
     :nosignatures:
 
     Skeleton
+    SkeletonHistory
+
+Functions
+=========
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    SubdivisionOperator
+    SubdivisionSweep
+    mesh_subdivide_catmullclark_numpy
+    mesh_subdivide_catmullclark_chunks_numpy
+    mesh_subdivide_catmullclark_adaptive_numpy
+    mesh_normals_numpy
+    skeleton3d_nodes_radius_numpy
+    skeleton3d_sections_numpy
 
 """
 from __future__ import print_function
 from __future__ import absolute_import
 from __future__ import division
 
+import compas
+
 from .skeleton import Skeleton
+from .history import SkeletonHistory
 from .skeleton3d import Skeleton3D
 from .skeleton3d_quad import Skeleton3D_Node
 # from .skeleton3d_quad import Skeleton3D_Branch
 
+if not compas.IPY:
+    from .subdivision_numpy import SubdivisionOperator
+    from .sweep_numpy import SubdivisionSweep
+    from .subdivision_numpy import mesh_subdivide_catmullclark_numpy
+    from .subdivision_numpy import mesh_subdivide_catmullclark_chunks_numpy
+    from .subdivision_numpy import mesh_subdivide_catmullclark_adaptive_numpy
+    from .normals_numpy import mesh_normals_numpy
+    from .skeleton3d_numpy import skeleton3d_nodes_radius_numpy
+    from .skeleton3d_numpy import skeleton3d_sections_numpy
+
 
 __all__ = [
     'Skeleton',
+    'SkeletonHistory',
     'Skeleton3D',
     'Skeleton3D_Node'
 ]
+
+if not compas.IPY:
+    __all__ += [
+        'SubdivisionOperator',
+        'SubdivisionSweep',
+        'mesh_subdivide_catmullclark_numpy',
+        'mesh_subdivide_catmullclark_chunks_numpy',
+        'mesh_subdivide_catmullclark_adaptive_numpy',
+        'mesh_normals_numpy',
+        'skeleton3d_nodes_radius_numpy',
+        'skeleton3d_sections_numpy'
+    ]
@@ -0,0 +1,88 @@
+"""Coroutines running the stages of skeletons in executors.
+
+This module uses the syntax of Python 3.
+The skeleton methods returning these coroutines are defined in the skeleton classes,
+which only import this module when they are called.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+__all__ = []
+
+
+_DONE = object()
+
+
+def _run(executor, function, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+
+def _build(cls, lines, attributes):
+    skeleton = cls.from_skeleton_lines(lines)
+    if attributes:
+        skeleton.attributes.update(attributes)
+        skeleton.update_mesh_vertices_pos()
+    return skeleton
+
+
+def _generate_mesh(skeleton, merge):
+    skeleton.generate_mesh()
+    if merge:
+        skeleton.merge_triangles()
+    return skeleton
+
+
+def _call(skeleton, name, args, kwargs):
+    return getattr(skeleton, name)(*args, **kwargs)
+
+
+async def build(cls, lines, executor=None, attributes=None):
+    return await _run(executor, _build, cls, lines, attributes)
+
+
+async def call(skeleton, name, executor=None, kwargs=None):
+    return await _run(executor, _call, skeleton, name, (), kwargs or {})
+
+
+async def generate_mesh(skeleton, executor=None, merge=False):
+    result = await _run(executor, _generate_mesh, skeleton, merge)
+    if result is not skeleton:
+        # generated in another process
+        skeleton.__dict__.update(result.__dict__)
+    return skeleton
+
+
+async def stream(chunks, executor=None):
+    """Iterate over the chunks of a generator, computing every chunk in a thread of the executor.
+    When the iteration stops early, the generator is closed once the chunk being computed is complete."""
+    if isinstance(executor, ProcessPoolExecutor):
+        raise ValueError('Chunks are streamed with threads, not with processes.')
+
+    iterator = iter(chunks)
+    lock = threading.Lock()
+
+    def step():
+        with lock:
+            return next(iterator, _DONE)
+
+    def close():
+        with lock:
+            getattr(iterator, 'close', lambda: None)()
+
+    try:
+        while True:
+            chunk = await _run(executor, step)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        # the generator is closed also if the iteration is cancelled
+        await asyncio.shield(_run(executor, close))
@@ -0,0 +1,321 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from collections import deque
+
+
+__all__ = ['SkeletonHistory']
+
+
+class _Missing(object):
+    pass
+
+
+_MISSING = _Missing()
+
+
+def _copy(attr):
+    """Copy an attribute dict, and the lists in it, which are changed in place by some edits."""
+    return {name: list(value) if isinstance(value, list) else value for name, value in attr.items()}
+
+
+def _delete_face(mesh, fkey):
+    """Delete a face like :meth:`compas.datastructures.Mesh.delete_face`, but keep the edge attributes."""
+    vertices = mesh.face[fkey]
+    for u, v in zip(vertices, vertices[1:] + vertices[:1]):
+        mesh.halfedge[u][v] = None
+        if mesh.halfedge[v][u] is None:
+            del mesh.halfedge[u][v]
+            del mesh.halfedge[v][u]
+    del mesh.face[fkey]
+    mesh.facedata.pop(fkey, None)
+
+
+def _vertex(mesh, key):
+    attr = mesh.vertex.get(key)
+    return _MISSING if attr is None else _copy(attr)
+
+
+def _face(mesh, fkey):
+    vertices = mesh.face.get(fkey)
+    return _MISSING if vertices is None else (list(vertices), _copy(mesh.facedata.get(fkey, {})))
+
+
+def _edge(mesh, edge):
+    attr = mesh.edgedata.get(edge)
+    return _MISSING if attr is None else _copy(attr)
+
+
+_STATE = {'vertex': _vertex, 'face': _face, 'edgedata': _edge}
+
+
+class _Snapshot(object):
+    """The state of a skeleton before an edit, of the vertices, faces and edges changed by the edit only.
+    The state of a vertex, face or edge is stored the first time the edit changes it."""
+
+    def __init__(self, mesh):
+        self.attributes = dict(mesh.attributes)
+        self.vertex = {}
+        self.face = {}
+        self.edgedata = {}
+        self.vertex_order = None
+        self.face_order = None
+        self.max_vertex = mesh._max_vertex
+        self.max_face = mesh._max_face
+        self.topology = mesh._topology
+
+    def record(self, mesh, name, keys=None, order=False):
+        saved = getattr(self, name)
+        state = _STATE[name]
+        for key in getattr(mesh, name) if keys is None else keys:
+            if key not in saved:
+                saved[key] = state(mesh, key)
+        if order and name != 'edgedata' and getattr(self, name + '_order') is None:
+            setattr(self, name + '_order', list(getattr(mesh, name)))
+
+
+def _diff(mesh, name, saved):
+    """The changes of the recorded vertices, faces or edges, as old and new state, with ``_MISSING`` for added and removed items."""
+    state = _STATE[name]
+    changes = {}
+    for key, before in saved.items():
+        after = state(mesh, key)
+        if before is not after and before != after:
+            changes[key] = (before, after)
+    return changes
+
+
+class _Delta(object):
+    """The changes of an edit of a skeleton."""
+
+    def __init__(self, name, snapshot, mesh):
+        self.name = name
+        self.attributes = {}
+        for key in set(snapshot.attributes) | set(mesh.attributes):
+            before = snapshot.attributes.get(key, _MISSING)
+            after = mesh.attributes.get(key, _MISSING)
+            if before is not after and before != after:
+                self.attributes[key] = (before, after)
+        self.vertex = _diff(mesh, 'vertex', snapshot.vertex)
+        self.face = _diff(mesh, 'face', snapshot.face)
+        self.edgedata = _diff(mesh, 'edgedata', snapshot.edgedata)
+        self.max_vertex = (snapshot.max_vertex, mesh._max_vertex)
+        self.max_face = (snapshot.max_face, mesh._max_face)
+        self.topology = (snapshot.topology, mesh._topology)
+
+        # adding and removing vertices or faces changes the order of the keys
+        self.vertex_order = None
+        self.face_order = None
+        if any(_MISSING in change for change in self.vertex.values()):
+            self.vertex_order = (snapshot.vertex_order, list(mesh.vertex))
+        if any(_MISSING in change for change in self.face.values()):
+            self.face_order = (snapshot.face_order, list(mesh.face))
+
+    def __len__(self):
+        return len(self.attributes) + len(self.vertex) + len(self.face) + len(self.edgedata)
+
+    @property
+    def size(self):
+        """The number of stored attribute values and keys, as a measure of the memory of the delta."""
+        size = len(self.attributes)
+        for changes in (self.vertex, self.face, self.edgedata):
+            for old, new in changes.values():
+                size += 1 + (len(old) if old is not _MISSING else 0) + (len(new) if new is not _MISSING else 0)
+        for order in (self.vertex_order, self.face_order):
+            if order:
+                size += len(order[0]) + len(order[1])
+        return size
+
+    def apply(self, mesh, forward=True):
+        i = 1 if forward else 0
+
+        for name, values in self.attributes.items():
+            if values[i] is _MISSING:
+                del mesh.attributes[name]
+            else:
+                mesh.attributes[name] = values[i]
+
+        # remove the faces before the vertices, the edge attributes are part of the delta
+        faces = {}
+        for fkey, values in self.face.items():
+            old, new = values if forward else values[::-1]
+            if old is not _MISSING and new is not _MISSING and old[0] == new[0]:
+                mesh.facedata[fkey] = _copy(new[1])
+                continue
+            if fkey in mesh.face:
+                _delete_face(mesh, fkey)
+            if new is not _MISSING:
+                faces[fkey] = new
+
+        for key, values in self.vertex.items():
+            if values[i] is _MISSING:
+                del mesh.vertex[key]
+                for nbr in mesh.halfedge.pop(key, {}):
+                    mesh.halfedge.get(nbr, {}).pop(key, None)
+            else:
+                mesh.vertex[key] = _copy(values[i])
+                mesh.halfedge.setdefault(key, {})
+
+        for fkey, (vertices, attr) in faces.items():
+            mesh.add_face(vertices, fkey=fkey, attr_dict=_copy(attr))
+
+        for edge, values in self.edgedata.items():
+            if values[i] is _MISSING:
+                mesh.edgedata.pop(edge, None)
+            else:
+                mesh.edgedata[edge] = _copy(values[i])
+
+        if self.vertex_order:
+            order = self.vertex_order[i]
+            mesh.vertex = {key: mesh.vertex[key] for key in order}
+            mesh.halfedge = {key: mesh.halfedge[key] for key in order}
+        if self.face_order:
+            order = self.face_order[i]
+            mesh.face = {fkey: mesh.face[fkey] for fkey in order}
+            mesh.facedata = {fkey: mesh.facedata[fkey] for fkey in order}
+
+        mesh._max_vertex = self.max_vertex[i]
+        mesh._max_face = self.max_face[i]
+        # the topology is the one it had, with the same subdivision operators
+        mesh._topology = self.topology[i]
+
+
+class SkeletonHistory(object):
+    """Undo and redo history of the edits of a skeleton.
+
+    Every edit is stored as the changes it made: the changed attributes,
+    the vertices with changed coordinates, transforms or other attributes,
+    and the added and removed faces and edges.
+    While an edit is recorded, the skeleton stores the state of every vertex, face and edge
+    the first time it changes it, see :meth:`record`, and the edit compares only these to the skeleton after it.
+    Undoing or redoing an edit only touches the changes.
+
+    Parameters
+    ----------
+    skeleton : :class:`compas_skeleton.datastructure.Skeleton`
+        The skeleton.
+    max_size : int, optional
+        The maximum number of attribute values and keys stored in the history, by the edits to undo and to redo.
+        When it is exceeded, the oldest edits are dropped, and then the edits to redo furthest from the current state.
+
+    Examples
+    --------
+    >>> skeleton.enable_history()
+    >>> with skeleton.edit('node width'):
+    >>>     skeleton.node_width = 5
+    >>>     skeleton.update_mesh_vertices_pos()
+    >>> skeleton.undo()
+    """
+
+    def __init__(self, skeleton, max_size=1000000):
+        self.skeleton = skeleton
+        self.max_size = max_size
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.size = 0
+        self._snapshot = None
+        self._name = None
+        self._depth = 0
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    @property
+    def names(self):
+        """The names of the edits which can be undone, from the oldest to the latest."""
+        return [delta.name for delta in self.undo_stack]
+
+    def begin(self, name=None):
+        """Start recording an edit. Nested edits are recorded as part of the outermost one."""
+        if not self._depth:
+            self._snapshot = _Snapshot(self.skeleton)
+            self._name = name
+        self._depth += 1
+
+    def record(self, name, keys=None, order=False):
+        """Store the state of vertices, faces or edges before the edit being recorded changes them.
+
+        Parameters
+        ----------
+        name : {'vertex', 'face', 'edgedata'}
+            The kind of items.
+        keys : list, optional
+            The keys of the items, existing or about to be added, all items by default.
+        order : bool, optional
+            Whether items are added or removed, which changes the order of the vertices or faces.
+
+        """
+        if self._snapshot is not None:
+            self._snapshot.record(self.skeleton, name, keys, order)
+
+    def end(self):
+        """Finish recording an edit."""
+        self._depth -= 1
+        if self._depth:
+            return
+        delta = _Delta(self._name, self._snapshot, self.skeleton)
+        self._snapshot = None
+        if not len(delta):
+            return
+        self.size -= sum(redo.size for redo in self.redo_stack)
+        self.redo_stack = []
+        self.undo_stack.append(delta)
+        self.size += delta.size
+        self._trim()
+
+    def _trim(self):
+        """Drop the oldest edits, and then the edits to redo furthest from the current state, until the history fits."""
+        while self.size > self.max_size and self.undo_stack:
+            self.size -= self.undo_stack.popleft().size
+        while self.size > self.max_size and self.redo_stack:
+            self.size -= self.redo_stack.pop(0).size
+
+    def undo(self):
+        """Undo the latest edit.
+
+        Returns
+        -------
+        str or None
+            The name of the edit, None if there is nothing to undo.
+
+        """
+        if self._depth:
+            raise RuntimeError('An edit is being recorded.')
+        if not self.undo_stack:
+            return None
+        delta = self.undo_stack.pop()
+        self.skeleton._unshare()
+        delta.apply(self.skeleton, forward=False)
+        self.redo_stack.append(delta)
+        return delta.name
+
+    def redo(self):
+        """Redo the latest undone edit.
+
+        Returns
+        -------
+        str or None
+            The name of the edit, None if there is nothing to redo.
+
+        """
+        if self._depth:
+            raise RuntimeError('An edit is being recorded.')
+        if not self.redo_stack:
+            return None
+        delta = self.redo_stack.pop()
+        self.skeleton._unshare()
+        delta.apply(self.skeleton, forward=True)
+        self.undo_stack.append(delta)
+        return delta.name
+
+    def clear(self):
+        """Remove all edits."""
+        self.undo_stack.clear()
+        self.redo_stack = []
+        self.size = 0
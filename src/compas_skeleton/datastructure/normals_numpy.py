@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+__all__ = [
+    'mesh_normals_numpy',
+]
+
+
+def _faces_padded(faces):
+    if isinstance(faces, np.ndarray):
+        return faces
+    width = max(len(face) for face in faces) if len(faces) else 3
+    padded = np.full((len(faces), width), -1, dtype=np.int64)
+    for i, face in enumerate(faces):
+        padded[i, :len(face)] = face
+    return padded
+
+
+def _unitized(vectors):
+    lengths = np.linalg.norm(vectors, axis=1)
+    return vectors / np.where(lengths > 0, lengths, 1.0)[:, None]
+
+
+def mesh_normals_numpy(vertices, faces):
+    """Compute the vertex and face normals of a mesh given as vertices and faces.
+
+    Parameters
+    ----------
+    vertices : array-like
+        XYZ coordinates of the vertices.
+    faces : array-like
+        Faces as a (F, N) array of vertex indices padded with ``-1``, or as lists of vertex indices.
+
+    Returns
+    -------
+    tuple
+        The unit vertex normals as a (V, 3) array and the unit face normals as a (F, 3) array.
+
+    Notes
+    -----
+    The face normals are the directions of the vector areas of the faces,
+    computed from the diagonals of quads and from a fan of triangles for other faces.
+    The vertex normals are the directions of the sums of the vector areas of their faces,
+    i.e. weighted by area. Vertices without faces have a zero normal.
+
+    Examples
+    --------
+    >>> vertices = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 1]]
+    >>> vertex_normals, face_normals = mesh_normals_numpy(vertices, [[0, 1, 2, 3], [1, 4, 2, -1]])
+    >>> face_normals[0].tolist()
+    [0.0, 0.0, 1.0]
+
+    """
+    xyz = np.asarray(vertices, dtype=float).reshape(-1, 3)
+    faces = _faces_padded(faces)
+
+    if faces.shape[1] == 4 and np.all(faces[:, 3] >= 0):
+        areas = 0.5 * np.cross(xyz[faces[:, 2]] - xyz[faces[:, 0]], xyz[faces[:, 3]] - xyz[faces[:, 1]])
+    else:
+        areas = np.zeros((len(faces), 3))
+        origin = xyz[faces[:, 0]]
+        for j in range(2, faces.shape[1]):
+            valid = faces[:, j] >= 0
+            a = xyz[faces[valid, j - 1]] - origin[valid]
+            b = xyz[faces[valid, j]] - origin[valid]
+            areas[valid] += 0.5 * np.cross(a, b)
+
+    width = faces.shape[1]
+    corners = faces.reshape(-1)
+    valid = corners >= 0
+    owner = np.repeat(np.arange(len(faces)), width)[valid]
+    vertex_areas = np.empty((len(xyz), 3))
+    for i in range(3):
+        vertex_areas[:, i] = np.bincount(corners[valid], weights=areas[owner, i], minlength=len(xyz))
+
+    return _unitized(vertex_areas), _unitized(areas)
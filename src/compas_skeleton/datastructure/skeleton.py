@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import compas
 from compas.datastructures import Mesh
 from compas.datastructures import mesh_subdivide_catmullclark
 from compas.datastructures import Network
@@ -13,10 +14,44 @@ from compas.geometry import add_vectors
 from compas.geometry import Frame
 
 import copy
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import count
 
 __all__ = ['Skeleton']
 
 
+OPERATOR_CACHE_SIZE = 4
+
+# the topology versions, unique across skeletons so that they can share their subdivision operators
+_VERSIONS = count()
+
+SKELETON_TYPES = ('skeleton_node', 'skeleton_leaf')
+
+SHARED_COPY = {
+    'vertex': lambda vertex: {key: dict(attr) for key, attr in vertex.items()},
+    'face': lambda face: {fkey: list(vertices) for fkey, vertices in face.items()},
+    'facedata': lambda facedata: {fkey: dict(attr) for fkey, attr in facedata.items()},
+    'halfedge': lambda halfedge: {key: dict(nbrs) for key, nbrs in halfedge.items()},
+    'edgedata': lambda edgedata: {edge: dict(attr) for edge, attr in edgedata.items()},
+}
+
+
+def _edge_key(u, v):
+    """The key of an edge in the edge attributes of a mesh."""
+    return '-'.join(map(str, sorted([u, v])))
+
+
+def _same_cycle(a, b):
+    """Whether two lists are the same cyclic sequence."""
+    if len(a) != len(b) or set(a) != set(b):
+        return False
+    if not a:
+        return True
+    i = a.index(b[0])
+    return a[i:] + a[:i] == b
+
+
 class Skeleton(Mesh):
     """Skeleton is a mesh topologically generated from a set of lines with special attributes.
 
@@ -54,6 +89,10 @@ class Skeleton(Mesh):
         self.update_default_vertex_attributes({'type': None})
         self.update_default_vertex_attributes({'transform': [0, 0, 0]})
         self.update_default_edge_attributes({'type': None})
+        self.history = None
+        self._shared = set()
+        self._operators = OrderedDict()
+        self._topology = next(_VERSIONS)
 
     # --------------------------------------------------------------------------
     # special attributes
@@ -116,7 +155,12 @@ class Skeleton(Mesh):
         print(skeleton.skeleton_branches)
 
         """
-        return list(self.edges_where({'type': 'skeleton_branch'}))
+        branches = []
+        for u, v in self.edges():
+            attr = self.edgedata.get('{}-{}'.format(*sorted((u, v))))
+            if attr and attr.get('type') == 'skeleton_branch':
+                branches.append((u, v))
+        return branches
 
     # --------------------------------------------------------------------------
     # constructors
@@ -178,6 +222,55 @@ class Skeleton(Mesh):
 
         return skeleton
 
+    @classmethod
+    def from_json(cls, filepath):
+        """ Instantiate a skeleton from a JSON file, reading the vertices, faces and edges one at a time.
+
+        Parameters
+        ----------
+        filepath: str or file-like object
+            path or URL of the file, or a readable file-like object.
+
+        Return
+        ------
+        skeleton: :class:`compas_skeleton.datastructure.Skeleton`
+            a skeleton object
+
+        Examples
+        --------
+        >>> skeleton = Skeleton.from_json('skeleton.json')
+        """
+        from compas_skeleton.files import json_load_mesh
+
+        if isinstance(filepath, str) and filepath.startswith(('http://', 'https://')):
+            return super(Skeleton, cls).from_json(filepath)
+        return json_load_mesh(filepath, cls)
+
+    @classmethod
+    def from_npz(cls, path, mmap=True):
+        """ Instantiate a skeleton from a binary archive written by :meth:`to_npz`.
+
+        Parameters
+        ----------
+        path: str
+            path of the file.
+        mmap: bool, optional
+            memory map the vertex arrays of the archive instead of reading them at once.
+
+        Return
+        ------
+        skeleton: :class:`compas_skeleton.datastructure.Skeleton`
+            a skeleton object
+
+        Examples
+        --------
+        >>> skeleton = Skeleton.from_npz('skeleton.npz')
+        """
+        from compas_skeleton.files import SkeletonArchive
+
+        with SkeletonArchive(path, mmap=mmap) as archive:
+            return archive.to_skeleton(cls)
+
     def update_skeleton_lines(self, lines=[]):
         """ Update skeleton by adding more skeleon lines or remove current skeleton lines.
 
@@ -197,11 +290,21 @@ class Skeleton(Mesh):
         >>>
         >>> lines.append(([0.0, 10.0, 0.0], [5.0, 10.0, 0.0]))
         >>> skeleton = Skeleton.update_skeleton_lines(lines)
+
+        Notes
+        -----
+        If the lines only moved, i.e. they connect the same skeleton vertices in the same order around every joint,
+        the skeleton vertices are moved and the mesh keeps its topology and cached subdivision operators.
+        The result is the same as the one of rebuilding the skeleton.
+        Otherwise the skeleton is cleared and rebuilt from the lines, as by :meth:`from_skeleton_lines`,
+        with the current attributes.
         """
         network = Network.from_lines(lines)
 
-        self.clear()
-        self._mesh_from_network(network)
+        with self.edit('update_skeleton_lines'):
+            if not self._move_skeleton_vertices(network):
+                self.clear()
+                self._mesh_from_network(network)
 
     # --------------------------------------------------------------------------
     # builders
@@ -226,6 +329,46 @@ class Skeleton(Mesh):
         # update vertices positions accoding to current node width, leaf width
         self.update_mesh_vertices_pos()
 
+    def _move_skeleton_vertices(self, network):
+        """Update the skeleton to a network with the same topology, return False if the topology differs."""
+        if self.node_width == 0 and self.leaf_width == 0:
+            return False
+        if network.number_of_nodes() != len([key for key in self.vertex if self.vertex[key].get('type') in SKELETON_TYPES]):
+            return False
+
+        duality.network_sort_neighbors(network, True)
+        for key in network.nodes():
+            attr = self.vertex.get(key)
+            nbrs = list(network.adjacency[key])
+            if attr is None or not _same_cycle(attr.get('neighbors') or [], network.node[key]['neighbors']):
+                return False
+            if attr.get('type') != ('skeleton_leaf' if network.is_leaf(key) else 'skeleton_node'):
+                return False
+            if list(self.halfedge[key])[:len(nbrs)] != nbrs:
+                return False
+
+        # the attributes of a rebuilt skeleton, see _mesh_from_network
+        self._unshare('vertex', 'edgedata')
+        transformed = any('transform' in attr for attr in self.vertex.values())
+        moved = []
+        for key, attr in self.vertex.items():
+            if key in network.node:
+                network.node[key]['type'] = 'skeleton_leaf' if network.is_leaf(key) else 'skeleton_node'
+                new = dict(network.node[key])
+                if any(attr[name] != network.node[key][name] for name in 'xyz'):
+                    moved.append(key)
+            else:
+                new = {name: attr[name] for name in 'xyz' if name in attr}
+            if new != attr:
+                self._record('vertex', [key])
+            self.vertex[key] = new
+        edgedata = {edge: {'type': 'skeleton_branch'} for edge, attr in self.edgedata.items() if attr.get('type') == 'skeleton_branch'}
+        self._record('edgedata', [edge for edge, attr in self.edgedata.items() if attr != edgedata.get(edge)])
+        self.edgedata = edgedata
+
+        self.update_mesh_vertices_pos(None if transformed else moved)
+        return True
+
     def _mesh_from_center_point(self, pt):
         # add the point as the skeleton node
         self.add_vertex(0)
@@ -261,6 +404,7 @@ class Skeleton(Mesh):
 
     def _add_skeleton_branches(self, network):
         self.halfedge = copy.deepcopy(network.adjacency)
+        self._record('edgedata', [_edge_key(u, v) for u, v in self.edges()])
         for key, attr in self.edges(True):
             attr.update({'type': 'skeleton_branch'})
 
@@ -324,18 +468,156 @@ class Skeleton(Mesh):
                     network.adjacency[u][v]['sp']
                 ])
 
+    # --------------------------------------------------------------------------
+    # variants
+    # --------------------------------------------------------------------------
+
+    def fork(self):
+        """Return a lightweight variant of the skeleton.
+
+        The variant shares the vertices, faces and edges, and the cached subdivision operators, with this skeleton.
+        The first change of the vertices (coordinates, transforms) of either skeleton copies them,
+        the first change of the topology copies the faces and edges too.
+        The attributes, such as the widths, are copied.
+
+        Return
+        ------
+        skeleton: :class:`compas_skeleton.datastructure.Skeleton`
+            the variant.
+
+        Examples
+        --------
+        >>> variants = [skeleton.fork() for i in range(100)]
+        >>> variants[0].node_width = 5
+        >>> variants[0].update_mesh_vertices_pos()
+        """
+        fork = type(self)()
+        fork.attributes.update(self.attributes)
+        fork.default_vertex_attributes.update(self.default_vertex_attributes)
+        fork.default_edge_attributes.update(self.default_edge_attributes)
+        fork.default_face_attributes.update(self.default_face_attributes)
+        for name in SHARED_COPY:
+            setattr(fork, name, getattr(self, name))
+        fork._max_vertex = self._max_vertex
+        fork._max_face = self._max_face
+        fork._operators = self._operators
+        fork._topology = self._topology
+
+        fork._shared = set(SHARED_COPY)
+        self._shared = set(SHARED_COPY)
+        return fork
+
+    def _unshare(self, *names):
+        """Copy the data shared with forks before it is changed, all of it by default."""
+        for name in names or SHARED_COPY:
+            if name in self._shared:
+                self._shared.discard(name)
+                setattr(self, name, SHARED_COPY[name](getattr(self, name)))
+
+    def _record(self, name, keys=None, order=False):
+        """Store the state of vertices, faces or edges before they are changed, if an edit is recorded,
+        see :meth:`compas_skeleton.datastructure.SkeletonHistory.record`."""
+        if self.history is not None:
+            self.history.record(name, keys, order)
+
+    def _record_faces(self, fkeys):
+        """Store the state of faces before they are deleted, and of their edges."""
+        self._record('face', fkeys, True)
+        self._record('edgedata', [_edge_key(u, v) for fkey in fkeys for u, v in self.face_halfedges(fkey)])
+
+    def _changed_topology(self):
+        """Give the skeleton a new topology version, which keys its subdivision operators."""
+        self._topology = next(_VERSIONS)
+
+    def clear(self):
+        for name in ('vertex', 'face', 'edgedata'):
+            self._record(name, order=True)
+        super(Skeleton, self).clear()
+        self._shared = set()
+        self._changed_topology()
+
+    def add_vertex(self, key=None, attr_dict=None, **kwattr):
+        self._unshare()
+        self._record('vertex', [self._max_vertex + 1 if key is None else key], True)
+        self._changed_topology()
+        return super(Skeleton, self).add_vertex(key, attr_dict, **kwattr)
+
+    def add_face(self, vertices, fkey=None, attr_dict=None, **kwattr):
+        self._unshare()
+        self._record('face', [self._max_face + 1 if fkey is None else fkey], True)
+        self._changed_topology()
+        return super(Skeleton, self).add_face(vertices, fkey, attr_dict, **kwattr)
+
+    def delete_vertex(self, key):
+        self._unshare()
+        if self.history is not None:
+            self._record('vertex', [key], True)
+            self._record_faces(self.vertex_faces(key))
+            self._record('edgedata', [_edge_key(key, nbr) for nbr in self.halfedge[key]])
+        self._changed_topology()
+        return super(Skeleton, self).delete_vertex(key)
+
+    def delete_face(self, fkey):
+        self._unshare()
+        if self.history is not None:
+            self._record_faces([fkey])
+        self._changed_topology()
+        return super(Skeleton, self).delete_face(fkey)
+
+    def vertex_attribute(self, key, name, value=None):
+        if value is not None:
+            self._unshare('vertex')
+            self._record('vertex', [key])
+        return super(Skeleton, self).vertex_attribute(key, name, value)
+
+    def vertex_attributes(self, key, names=None, values=None):
+        if values is not None:
+            self._unshare('vertex')
+            self._record('vertex', [key])
+        return super(Skeleton, self).vertex_attributes(key, names, values)
+
+    def unset_vertex_attribute(self, key, name):
+        self._unshare('vertex')
+        self._record('vertex', [key])
+        return super(Skeleton, self).unset_vertex_attribute(key, name)
+
+    def edge_attribute(self, edge, name, value=None):
+        if value is not None:
+            self._unshare('edgedata')
+            self._record('edgedata', [_edge_key(*edge)])
+        return super(Skeleton, self).edge_attribute(edge, name, value)
+
+    def face_attribute(self, key, name, value=None):
+        if value is not None:
+            self._unshare('facedata')
+            self._record('face', [key])
+        return super(Skeleton, self).face_attribute(key, name, value)
+
+    def face_attributes(self, key, names=None, values=None):
+        if values is not None:
+            self._unshare('facedata')
+            self._record('face', [key])
+        return super(Skeleton, self).face_attributes(key, names, values)
+
     # --------------------------------------------------------------------------
     # modifiers
     # --------------------------------------------------------------------------
 
-    def update_mesh_vertices_pos(self):
+    def update_mesh_vertices_pos(self, keys=None):
         """Update all the vertex coordiates.
 
+        Parameters
+        ----------
+        keys : list, optional
+            the skeleton vertices which moved, only the mesh vertices depending on them are updated.
+            All mesh vertices are updated by default.
+
         Examples
         --------
         >>> skeleton.node_width = 20
         >>> skeleton.update_mesh_vertices_pos()
         """
+        self._unshare('vertex')
 
         def update_node_boundary_vertex(u, v):
             fkey = self.halfedge[u][v]
@@ -344,6 +626,7 @@ class Skeleton(Mesh):
             vec = Vector(*self.vertex_attribute(key, 'transform'))
             pt = add_vectors(pt, vec)
 
+            self._record('vertex', [key])
             self.vertex[key].update({'x': pt[0], 'y': pt[1], 'z': pt[2]})
 
         def update_leaf_boundary_vertex(u, v):
@@ -358,6 +641,7 @@ class Skeleton(Mesh):
             pt1 = add_vectors(pt1, vec1)
             pt2 = add_vectors(pt2, vec2)
 
+            self._record('vertex', [key1, key2])
             self.vertex[key1].update({'x': pt1[0], 'y': pt1[1], 'z': pt1[2]})
             self.vertex[key2].update({'x': pt2[0], 'y': pt2[1], 'z': pt2[2]})
 
@@ -368,10 +652,20 @@ class Skeleton(Mesh):
                 pt = pts[key-1]
                 vec = Vector(*self.vertex_attribute(key, 'transform'))
                 pt = add_vectors(pt, vec)
+                self._record('vertex', [key])
                 self.vertex[key].update({'x': pt[0], 'y': pt[1], 'z': pt[2]})
 
-        if list(self.skeleton_branches):
-            for u, v in self.skeleton_branches:
+        branches = self.skeleton_branches
+        if branches and keys is not None:
+            # the boundary vertices of a branch depend on the neighbors of its ends
+            keys = set(keys)
+            keys.update([nbr for key in keys for nbr in self.vertex[key].get('neighbors', [])])
+            branches = [(u, v) for u, v in branches if u in keys or v in keys]
+            if not branches:
+                return
+
+        if branches:
+            for u, v in branches:
                 if self.vertex[u]['type'] == 'skeleton_node':
                     update_node_boundary_vertex(u, v)
                 else:
@@ -516,9 +810,11 @@ class Skeleton(Mesh):
 
     def _mount_skeleton_vertex_transformation(self, key, f1, f2):
         # mount the skeleton vertex transformation to a descendent mesh vertex transformation
+        self._unshare('vertex')
         vec = Vector(*self.vertex_attribute(key, 'transform'))
         vec_l = f1.to_local_coordinates(vec)
         vec = f2.to_world_coordinates(vec_l)
+        self._record('vertex', [key])
         self.vertex[key].update({'transform': list(vec)})
 
     def _find_previous_vertex(self, u, v):
@@ -544,6 +840,88 @@ class Skeleton(Mesh):
 
         return leaf_left, leaf_right, joint_left, joint_right
 
+    # --------------------------------------------------------------------------
+    # history
+    # --------------------------------------------------------------------------
+
+    def enable_history(self, max_size=1000000):
+        """Record the edits of the skeleton, so that they can be undone and redone.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            the maximum number of attribute values and keys stored in the history, to undo and to redo edits,
+            see :class:`compas_skeleton.datastructure.SkeletonHistory`.
+
+        Examples
+        --------
+        >>> skeleton.enable_history()
+        >>> skeleton.subdivide()
+        >>> skeleton.undo()
+        """
+        from .history import SkeletonHistory
+
+        if self.history is None:
+            self.history = SkeletonHistory(self, max_size)
+        else:
+            self.history.max_size = max_size
+
+    def disable_history(self):
+        """Stop recording the edits of the skeleton and remove the history."""
+        self.history = None
+
+    @contextmanager
+    def edit(self, name=None):
+        """Record all the changes made in a block as one edit of the history.
+        Edits in the block, for example :meth:`update_skeleton_lines`, are part of this edit.
+        Without history, nothing is recorded.
+
+        Parameters
+        ----------
+        name : str, optional
+            name of the edit.
+
+        Examples
+        --------
+        >>> with skeleton.edit('leaf width'):
+        >>>     skeleton.leaf_width = 2
+        >>>     skeleton.update_mesh_vertices_pos()
+        """
+        history = self.history
+        if history is None:
+            yield
+            return
+
+        history.begin(name)
+        try:
+            yield
+        finally:
+            history.end()
+
+    def undo(self):
+        """Undo the latest edit.
+
+        Return
+        ------
+        str or None
+            name of the undone edit, None if there is nothing to undo.
+        """
+        if self.history is None:
+            return None
+        return self.history.undo()
+
+    def redo(self):
+        """Redo the latest undone edit.
+
+        Return
+        ------
+        str or None
+            name of the redone edit, None if there is nothing to redo.
+        """
+        if self.history is None:
+            return None
+        return self.history.redo()
+
     # --------------------------------------------------------------------------
     # visualization
     # --------------------------------------------------------------------------
@@ -555,7 +933,8 @@ class Skeleton(Mesh):
         --------
         >>> skeleton.subdivide(2)
         """
-        self.attributes['sub_level'] += k
+        with self.edit('subdivide'):
+            self.attributes['sub_level'] += k
 
     def merge(self, k=1):
         """Decrease the catmull-clark subdivison level of high-poly mesh
@@ -564,8 +943,9 @@ class Skeleton(Mesh):
         --------
         >>> skeleton.merge(1)
         """
-        if self.attributes['sub_level'] > 0:
-            self.attributes['sub_level'] -= k
+        with self.edit('merge'):
+            if self.attributes['sub_level'] > 0:
+                self.attributes['sub_level'] -= k
 
     def _subdivide(self, k=1):
         corners = []
@@ -579,29 +959,386 @@ class Skeleton(Mesh):
 
         return mesh_subdivide_catmullclark(self, k, fixed=corners)
 
+    def _subdivision_arrays(self):
+        key_index = self.key_index()
+        vertices = self.vertices_attributes('xyz')
+        faces = [[key_index[key] for key in self.face_vertices(fkey)] for fkey in self.faces()]
+        corners = [key_index[key] for key in self.vertices() if self.vertex_degree(key) == 2]
+
+        return vertices, faces, corners
+
+    def _subdivision_operator(self, k, faces, corners):
+        from .subdivision_numpy import SubdivisionOperator
+
+        key = (k, self._topology)
+        operator = self._operators.get(key)
+        if operator is None:
+            operator = SubdivisionOperator(self.number_of_vertices(), faces, k, fixed=corners)
+            self._operators[key] = operator
+            while len(self._operators) > OPERATOR_CACHE_SIZE:
+                self._operators.popitem(last=False)
+        return operator
+
+    def _subdivide_numpy(self, k=1, workers=None, dtype=float):
+        from .subdivision_numpy import mesh_subdivide_catmullclark_numpy
+
+        vertices, faces, corners = self._subdivision_arrays()
+        if workers and workers > 1:
+            return mesh_subdivide_catmullclark_numpy(vertices, faces, k, fixed=corners, workers=workers, dtype=dtype)
+        return self._subdivision_operator(k, faces, corners).apply(vertices, dtype)
+
+    def _subdivide_cached_numpy(self, k=1, workers=None, cache=None):
+        from compas_skeleton.files import SubdivisionCache
+
+        if not isinstance(cache, SubdivisionCache):
+            cache = SubdivisionCache(cache)
+
+        vertices, faces, corners = self._subdivision_arrays()
+        key = cache.key(vertices, faces, corners, k)
+        arrays = cache.get(key)
+        if arrays is None:
+            arrays = self._subdivide_numpy(k, workers)
+            cache.put(key, *arrays)
+        return arrays
+
+    def _subdivide_chunks_numpy(self, k=1, chunk_size=100000, workers=None):
+        from .subdivision_numpy import mesh_subdivide_catmullclark_chunks_numpy
+
+        vertices, faces, corners = self._subdivision_arrays()
+        return mesh_subdivide_catmullclark_chunks_numpy(vertices, faces, k, fixed=corners, chunk_size=chunk_size, workers=workers)
+
+    def _subdivide_adaptive_numpy(self, k=1, tolerance=None):
+        from .subdivision_numpy import mesh_subdivide_catmullclark_adaptive_numpy
+
+        vertices, faces, corners = self._subdivision_arrays()
+        joints = [self.vertex_coordinates(key) for key in self.skeleton_vertices[0]]
+        if tolerance is None:
+            tolerance = 0.01 * (self.leaf_width or self.node_width)
+
+        return mesh_subdivide_catmullclark_adaptive_numpy(
+            vertices, faces, k, fixed=corners, features=joints, radius=self.node_width, tolerance=tolerance)
+
     # --------------------------------------------------------------------------
     # exporting
     # --------------------------------------------------------------------------
 
-    def to_mesh(self):
+    def to_arrays(self, sub_level=None, dtype=float, workers=None, normals=False, cache=None):
+        """Return the vertices and faces of the high-poly skeleton mesh as arrays,
+        without building any intermediate mesh.
+
+        Parameters
+        ----------
+        sub_level : int, optional
+            subdivision level, the current level of the skeleton by default.
+        dtype : numpy.dtype, optional
+            type of the vertex coordinates.
+        workers : int, optional
+            number of processes used for subdividing the mesh.
+        normals : bool, optional
+            also return the area weighted vertex normals and the face normals.
+        cache : str or :class:`compas_skeleton.files.SubdivisionCache`, optional
+            cache directory of subdivided meshes. If the cache has the subdivision of the current skeleton
+            at this level, its arrays are memory mapped instead of computed.
+
+        Return
+        ------
+        vertices: :class:`numpy.ndarray`
+            a contiguous (V, 3) array of vertex coordinates
+        faces: :class:`numpy.ndarray`
+            a contiguous (F, 4) int32 array of vertex indices.
+            At subdivision level 0 triangles are padded with -1.
+        vertex_normals: :class:`numpy.ndarray`
+            a (V, 3) array of unit vertex normals, only if ``normals`` is True.
+        face_normals: :class:`numpy.ndarray`
+            a (F, 3) array of unit face normals, only if ``normals`` is True.
+
+        Examples
+        --------
+        >>> vertices, faces = skeleton.to_arrays(sub_level=2, dtype='float32')
+        >>> vertices, faces, vertex_normals, face_normals = skeleton.to_arrays(normals=True)
+        >>> vertices, faces = skeleton.to_arrays(cache='~/.cache/compas_skeleton')
+        """
+        if sub_level is None:
+            sub_level = self.attributes['sub_level']
+
+        if cache is not None:
+            vertices, faces = self._subdivide_cached_numpy(sub_level, workers, cache)
+            vertices = vertices.astype(dtype, copy=False)
+        else:
+            vertices, faces = self._subdivide_numpy(sub_level, workers, dtype)
+        if not normals:
+            return vertices, faces
+
+        from .normals_numpy import mesh_normals_numpy
+
+        vertex_normals, face_normals = mesh_normals_numpy(vertices, faces)
+        return vertices, faces, vertex_normals.astype(dtype), face_normals.astype(dtype)
+
+    def to_mesh(self, workers=None, adaptive=False, tolerance=None, normals=False, cache=None):
         """Return the high-poly skeleton mesh as a compas mesh
 
+        Parameters
+        ----------
+        workers : int, optional
+            number of processes used for subdividing the mesh.
+            The mesh is split into patches which are subdivided in parallel,
+            the result is identical to the one of a single process.
+        adaptive : bool, optional
+            only subdivide up to the current subdivision level near the skeleton joints and where the mesh is curved.
+            Neighbouring regions differ by at most one level and are connected without cracks,
+            the faces on the coarser side of a transition have more than four vertices.
+        tolerance : float, optional
+            for adaptive subdivision, the distance a further subdivision has to move a vertex of a face
+            for the face to be subdivided further. One percent of the leaf width by default.
+        normals : bool, optional
+            store the vertex and face normals as the attribute 'normal'.
+        cache : str or :class:`compas_skeleton.files.SubdivisionCache`, optional
+            cache directory of subdivided meshes, see :meth:`to_arrays`.
+
         Return
         ------
         mesh: :class:`compas.datastructures.Mesh`
+
+        Examples
+        --------
+        >>> mesh = skeleton.to_mesh(workers=4)
+        >>> mesh = skeleton.to_mesh(adaptive=True)
+        >>> mesh = skeleton.to_mesh(normals=True)
+        >>> mesh.vertex_attribute(0, 'normal')
         """
-        mesh = Mesh()
-        highpoly_mesh = self._subdivide(self.attributes['sub_level'])
+        if adaptive:
+            xyz, faces = self._subdivide_adaptive_numpy(self.attributes['sub_level'], tolerance)
+            mesh = Mesh.from_vertices_and_faces(xyz.tolist(), faces)
+
+        elif compas.IPY:
+            mesh = Mesh()
+            highpoly_mesh = self._subdivide(self.attributes['sub_level'])
+
+            for key, attr in highpoly_mesh.vertices(True):
+                mesh.add_vertex(key, x=attr['x'], y=attr['y'], z=attr['z'])
+
+            for fkey in highpoly_mesh.face:
+                mesh.add_face(highpoly_mesh.face[fkey])
+
+        else:
+            xyz, faces = self.to_arrays(workers=workers, cache=cache)
+            mesh = Mesh.from_vertices_and_faces(xyz.tolist(), [[key for key in face if key >= 0] for face in faces.tolist()])
 
-        for key, attr in highpoly_mesh.vertices(True):
-            mesh.add_vertex(key, x=attr['x'], y=attr['y'], z=attr['z'])
+        if normals and compas.IPY:
+            for key in mesh.vertices():
+                mesh.vertex[key]['normal'] = mesh.vertex_normal(key)
+            for fkey in mesh.faces():
+                mesh.facedata[fkey]['normal'] = mesh.face_normal(fkey)
 
-        for fkey in highpoly_mesh.face:
-            mesh.add_face(highpoly_mesh.face[fkey])
+        elif normals:
+            from .normals_numpy import mesh_normals_numpy
+
+            vertex_normals, face_normals = mesh_normals_numpy(xyz, faces)
+            for key, normal in zip(mesh.vertices(), vertex_normals.tolist()):
+                mesh.vertex[key]['normal'] = normal
+            for fkey, normal in zip(mesh.faces(), face_normals.tolist()):
+                mesh.facedata[fkey]['normal'] = normal
 
         mesh.name = 'Skeleton'
         return mesh
 
+    def to_json(self, filepath, pretty=False):
+        """Write the skeleton to a JSON file, one vertex, face and edge at a time.
+        The file is the same as the one written by :meth:`compas.datastructures.Mesh.to_json`.
+
+        Parameters
+        ----------
+        filepath : str or file-like object
+            path of the file, or a writable file-like object.
+        pretty : bool, optional
+            format the output with sorted keys and indentation.
+
+        Examples
+        --------
+        >>> skeleton.to_json('skeleton.json', pretty=True)
+        """
+        from compas_skeleton.files import json_dump_mesh
+
+        json_dump_mesh(self, filepath, pretty)
+
+    def to_npz(self, path):
+        """Write the skeleton to a compact binary archive of arrays.
+        The archive can be opened lazily with :class:`compas_skeleton.files.SkeletonArchive`.
+
+        Parameters
+        ----------
+        path : str
+            path of the file.
+
+        Examples
+        --------
+        >>> skeleton.to_npz('skeleton.npz')
+        >>> skeleton = Skeleton.from_npz('skeleton.npz')
+        """
+        from compas_skeleton.files import write_skeleton_npz
+
+        write_skeleton_npz(path, self)
+
+    def write(self, path, format=None, sub_level=None, chunk_size=100000, workers=None, cache=None):
+        """Write the high-poly skeleton mesh to a binary STL, a binary PLY or an OBJ file.
+        The mesh is subdivided and written patch by patch, it never exists in memory as a whole.
+
+        Parameters
+        ----------
+        path : str
+            path of the file.
+        format : {'stl', 'ply', 'obj'}, optional
+            file format, derived from the file extension by default.
+        sub_level : int, optional
+            subdivision level, the current level of the skeleton by default.
+        chunk_size : int, optional
+            approximate number of faces subdivided and written at once.
+        workers : int, optional
+            number of processes subdividing patches ahead of the writer.
+        cache : str or :class:`compas_skeleton.files.SubdivisionCache`, optional
+            cache directory of subdivided meshes, see :meth:`to_arrays`.
+            The mesh is then subdivided as a whole and added to the cache, or written from the cache.
+
+        Return
+        ------
+        int
+            the number of faces (triangles for STL) written.
+
+        Examples
+        --------
+        >>> skeleton.write('skeleton.ply', sub_level=4)
+        """
+        from compas_skeleton.files import array_chunks
+        from compas_skeleton.files import write_chunks
+
+        if sub_level is None:
+            sub_level = self.attributes['sub_level']
+
+        if cache is not None:
+            chunks = array_chunks(*self._subdivide_cached_numpy(sub_level, workers, cache), chunk_size=chunk_size)
+        else:
+            chunks = self._subdivide_chunks_numpy(sub_level, chunk_size, workers)
+        return write_chunks(path, chunks, format)
+
+    # --------------------------------------------------------------------------
+    # asynchronous
+    # --------------------------------------------------------------------------
+
+    @classmethod
+    def abuild(cls, lines, executor=None, **attributes):
+        """Construct a skeleton from lines in an executor, see :meth:`from_skeleton_lines`.
+
+        Parameters
+        ----------
+        lines: :class:`compas.geometry.Line`
+            a list of compas lines
+        executor : :class:`concurrent.futures.Executor`, optional
+            thread or process pool, the default executor of the event loop by default.
+        attributes : dict
+            skeleton attributes such as ``node_width``, ``leaf_width``, ``leaf_extend`` and ``sub_level``.
+
+        Return
+        ------
+        coroutine
+            a coroutine returning the skeleton.
+
+        Notes
+        -----
+        The asynchronous methods need Python 3.
+        Cancelling their coroutines returns control to the event loop at once,
+        a stage already running in the executor completes in the background.
+
+        Examples
+        --------
+        >>> skeleton = await Skeleton.abuild(lines, node_width=2.0, sub_level=2)
+        >>> mesh = await skeleton.ato_mesh()
+        """
+        from .asynchronous import build
+
+        return build(cls, lines, executor, attributes)
+
+    def ato_mesh(self, executor=None, **kwargs):
+        """Compute the high-poly skeleton mesh in an executor, see :meth:`to_mesh`.
+        A process pool receives a copy of the skeleton.
+
+        Return
+        ------
+        coroutine
+            a coroutine returning the mesh.
+
+        Examples
+        --------
+        >>> mesh = await skeleton.ato_mesh(workers=4)
+        """
+        from .asynchronous import call
+
+        return call(self, 'to_mesh', executor, kwargs)
+
+    def ato_arrays(self, executor=None, **kwargs):
+        """Compute the vertices and faces of the high-poly skeleton mesh in an executor, see :meth:`to_arrays`.
+
+        Return
+        ------
+        coroutine
+            a coroutine returning the arrays.
+
+        Examples
+        --------
+        >>> vertices, faces = await skeleton.ato_arrays(sub_level=3)
+        """
+        from .asynchronous import call
+
+        return call(self, 'to_arrays', executor, kwargs)
+
+    def awrite(self, path, executor=None, **kwargs):
+        """Write the high-poly skeleton mesh in an executor, see :meth:`write`.
+
+        Return
+        ------
+        coroutine
+            a coroutine returning the number of faces written.
+
+        Examples
+        --------
+        >>> await skeleton.awrite('skeleton.ply', sub_level=4)
+        """
+        from .asynchronous import call
+
+        kwargs['path'] = path
+        return call(self, 'write', executor, kwargs)
+
+    def astream(self, sub_level=None, chunk_size=100000, workers=None, executor=None):
+        """Subdivide the high-poly skeleton mesh patch by patch, computing every patch in a thread.
+
+        Parameters
+        ----------
+        sub_level : int, optional
+            subdivision level, the current level of the skeleton by default.
+        chunk_size : int, optional
+            approximate number of faces per chunk.
+        workers : int, optional
+            number of processes subdividing patches ahead of the iteration.
+        executor : :class:`concurrent.futures.ThreadPoolExecutor`, optional
+            thread pool, the default executor of the event loop by default.
+
+        Return
+        ------
+        async iterator
+            the chunks of vertex indices, vertex coordinates and faces,
+            see :func:`compas_skeleton.datastructure.mesh_subdivide_catmullclark_chunks_numpy`.
+            When the iteration stops early, or is cancelled, no further patches are subdivided.
+
+        Examples
+        --------
+        >>> async for vertices, xyz, faces in skeleton.astream(sub_level=5):
+        >>>     await send(xyz, faces)
+        """
+        from .asynchronous import stream
+
+        if sub_level is None:
+            sub_level = self.attributes['sub_level']
+        return stream(self._subdivide_chunks_numpy(sub_level, chunk_size, workers), executor)
+
 
 if __name__ == '__main__':
     pass
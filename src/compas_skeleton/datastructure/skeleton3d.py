@@ -2,19 +2,152 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import compas
 from compas.datastructures import Mesh
 from compas.geometry import Vector
-from compas.geometry import normalize_vector
+from compas.geometry import angle_vectors
 from compas.geometry import add_vectors
+from compas.geometry import centroid_points
+from compas.geometry import cross_vectors
+from compas.geometry import distance_point_point_sqrd
+from compas.geometry import dot_vectors
+from compas.geometry import length_vector
+from compas.geometry import normalize_vector
 from compas.geometry import orient_points
+from compas.geometry import subtract_vectors
 from compas.geometry.hull import convex_hull
+from compas.utilities import geometric_key
 from compas.utilities import pairwise
 
+from collections import OrderedDict
+from itertools import combinations
 import math
 
 __all__ = ['Skeleton3D']
 
 
+NODE_BATCH_SIZE = 256
+
+
+def _zip_rings(points, a, b):
+    """Triangles bridging two aligned rings of point indices following both in the same direction,
+    advancing on the ring which is behind, or along the shorter diagonal."""
+    n, m = len(a), len(b)
+    faces = []
+    i = j = 0
+    while i < n or j < m:
+        behind = (i + 1) * m - (j + 1) * n
+        if behind == 0:
+            behind = distance_point_point_sqrd(points[a[(i + 1) % n]], points[b[j]]) - \
+                distance_point_point_sqrd(points[a[i]], points[b[(j + 1) % m]])
+        if j == m or (i < n and behind <= 0):
+            faces.append([a[i], a[(i + 1) % n], b[j % m]])
+            i += 1
+        else:
+            faces.append([a[i % n], b[(j + 1) % m], b[j]])
+            j += 1
+    return faces
+
+
+def _ring_normal(points, ring):
+    center = centroid_points([points[i] for i in ring])
+    normal = [0.0, 0.0, 0.0]
+    for i, j in zip(ring, ring[1:] + ring[:1]):
+        normal = add_vectors(normal, cross_vectors(subtract_vectors(points[i], center), subtract_vectors(points[j], center)))
+    return center, normal
+
+
+def _stitch(points, sizes):
+    """The faces bridging the two sections of a node, oriented outwards."""
+    a = list(range(sizes[0]))
+    b = list(range(sizes[0], sizes[0] + sizes[1]))
+    n, m = len(a), len(b)
+
+    # a section lies on the side of its branch of the plane of the other section,
+    # which gives the direction of the sections along the tube,
+    # the sections of a straight node coincide
+    center_a, normal_a = _ring_normal(points, a)
+    center_b, normal_b = _ring_normal(points, b)
+    axis = subtract_vectors(center_a, center_b)
+    if dot_vectors(axis, axis) < 1e-12 * math.sqrt(dot_vectors(normal_a, normal_a)):
+        axis = normal_a
+    if (dot_vectors(normal_a, axis) > 0) != (dot_vectors(normal_b, axis) > 0):
+        b = b[:1] + b[:0:-1]
+
+    # align the sections by the rotation with the shortest distances between corresponding points
+    def cost(k):
+        return sum(distance_point_point_sqrd(points[a[i]], points[b[(k + i * m // n) % m]]) for i in range(n))
+
+    k = min(range(m), key=cost)
+    faces = _zip_rings(points, a, b[k:] + b[:k])
+
+    center = centroid_points(points)
+    volume = 0
+    for u, v, w in faces:
+        normal = cross_vectors(subtract_vectors(points[v], points[u]), subtract_vectors(points[w], points[u]))
+        volume += dot_vectors(normal, subtract_vectors(points[u], center))
+    if volume < 0:
+        faces = [face[::-1] for face in faces]
+    return faces
+
+
+def _node_faces(points, sizes):
+    """The faces of a node as indices of the points of its sections.
+    Two sections are stitched directly. More sections are connected by their convex hull without the faces closing a section,
+    computed with Qhull if scipy is available."""
+    if len(sizes) == 2:
+        return _stitch(points, sizes)
+
+    if not compas.IPY:
+        from .skeleton3d_numpy import _node_hull_numpy
+
+        try:
+            return _node_hull_numpy(points, sizes)
+        except (ImportError, RuntimeError):
+            # without scipy, or Qhull failed for degenerate sections
+            pass
+
+    ring = [i for i, size in enumerate(sizes) for _ in range(size)]
+    return [face for face in convex_hull(points) if not ring[face[0]] == ring[face[1]] == ring[face[2]]]
+
+
+def _nodes_faces(jobs):
+    return [_node_faces(points, sizes) for points, sizes in jobs]
+
+
+def _nodes_hulls(jobs, workers=None):
+    """The faces of the nodes, computed in a pool of processes if there are several workers."""
+    if not workers or workers < 2:
+        for points, sizes in jobs:
+            yield _node_faces(points, sizes)
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    def batches():
+        batch = []
+        for job in jobs:
+            batch.append(job)
+            if len(batch) == NODE_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep a bounded number of batches in flight
+        futures = deque()
+        for batch in batches():
+            futures.append(executor.submit(_nodes_faces, batch))
+            if len(futures) > 2 * workers:
+                for faces in futures.popleft().result():
+                    yield faces
+        while futures:
+            for faces in futures.popleft().result():
+                yield faces
+
+
 class Skeleton3D(Mesh):
 
     def __init__(self):
@@ -24,6 +157,15 @@ class Skeleton3D(Mesh):
         self.branch_radius = 1.0
         self.section_seg = 4
         self.node_radius_fac = 1.0
+        self.section_length = None
+        self.section_tolerance = None
+        self.nodes_radius = []
+        self._branches_radius = {}
+        self._node_index = {}
+        self._face_owner = {}
+        self._owner_faces = {}
+        self._dirty = set()
+        self._parameters = None
 
     @classmethod
     def from_skeleton_lines(cls, lines=[]):
@@ -37,11 +179,41 @@ class Skeleton3D(Mesh):
 
         return sk3
 
+    @classmethod
+    def from_json(cls, filepath):
+        """Instantiate the mesh of a skeleton from a JSON file, reading the vertices and faces one at a time."""
+        from compas_skeleton.files import json_load_mesh
+
+        if isinstance(filepath, str) and filepath.startswith(('http://', 'https://')):
+            return super(Skeleton3D, cls).from_json(filepath)
+        return json_load_mesh(filepath, cls)
+
+    def to_json(self, filepath, pretty=False):
+        """Write the mesh of the skeleton to a JSON file, one vertex and face at a time.
+        The nodes, branches and parameters are written by :meth:`to_npz`."""
+        from compas_skeleton.files import json_dump_mesh
+
+        json_dump_mesh(self, filepath, pretty)
+
+    @classmethod
+    def from_npz(cls, path):
+        """Instantiate a 3D skeleton, with its generated mesh, from a binary archive written by :meth:`to_npz`.
+        The mesh is only generated again for the parameters or nodes changed after reading it."""
+        from compas_skeleton.files import read_skeleton3d_npz
+
+        return read_skeleton3d_npz(path, cls)
+
+    def to_npz(self, path):
+        """Write the nodes, branches, parameters, sections and generated mesh of the skeleton to a binary archive of arrays."""
+        from compas_skeleton.files import write_skeleton3d_npz
+
+        write_skeleton3d_npz(path, self)
+
     @property
     def nodes_joint(self):
         nodes_joint = []
         for key in self.node:
-            if not self.is_node_leaf(key):
+            if self.is_node_joint(key):
                 nodes_joint.append(key)
 
         return nodes_joint
@@ -50,34 +222,98 @@ class Skeleton3D(Mesh):
     # builders
     # --------------------------------------------------------------------------
 
-    def generate_mesh(self):
-        self._get_pts_for_branches()
-        self._generate_branches_mesh()
-        self._generate_nodes_mesh()
-
-    def _generate_nodes_mesh(self):
-        for key in self.nodes_joint:
-            self._generate_node_mesh(key)
+    def generate_mesh(self, workers=None):
+        """Generate the mesh of the sections, the branches and the nodes.
+
+        Once the mesh is generated, only the sections, branches and nodes around the nodes changed by
+        :meth:`move_node`, :meth:`add_branch` and :meth:`delete_branch` are generated again.
+        If ``branch_radius``, ``section_seg``, ``node_radius_fac``, ``section_length`` or ``section_tolerance`` changed,
+        the whole mesh is generated again.
+        The number of points of the sections of every branch is given by :meth:`section_seg_for_radius`
+        for the radius of the branch, see :meth:`set_branches_radius`.
+
+        Parameters
+        ----------
+        workers : int, optional
+            number of processes computing the convex hulls of the nodes.
+            The mesh does not depend on the number of workers.
+        """
+        parameters = (self.branch_radius, self.section_seg, self.node_radius_fac, self.section_length, self.section_tolerance)
+        if self._parameters != parameters:
+            self.clear()
+            self._face_owner = {}
+            self._owner_faces = {}
+            for u in self.halfbranch:
+                for v in self.halfbranch[u]:
+                    self.halfbranch[u][v] = None
+            self._dirty = set(self.node)
+            self._parameters = parameters
+        if not self._dirty:
+            return
+
+        nodes = [key for key in self.node if key in self._dirty]
+        self._dirty = set()
+        self._node_index = self.node_index()
+        self._update_nodes_radius(nodes)
+
+        for u, v in self._get_pts_for_branches(self._node_branches(nodes)):
+            self._generate_branch_mesh(u, v)
+        self._delete_nodes_mesh(nodes)
+        self._generate_nodes_mesh([key for key in nodes if self.is_node_joint(key)], workers)
+
+    def _delete_nodes_mesh(self, nodes):
+        self._delete_faces_of(set(nodes))
+
+    def _delete_faces_of(self, owners):
+        """Delete the faces of nodes and branches."""
+        for owner in owners:
+            for fkey in list(self._owner_faces.get(owner, ())):
+                self._delete_face(fkey)
+
+    def _set_face_owner(self, fkey, owner):
+        """Set the node or the branch of a face."""
+        self._face_owner[fkey] = owner
+        self._owner_faces.setdefault(owner, set()).add(fkey)
+
+    def _delete_face(self, fkey):
+        """Delete a face, also if some of its halfedges were taken by other faces."""
+        vertices = self.face.pop(fkey)
+        for u, v in zip(vertices, vertices[1:] + vertices[:1]):
+            if self.halfedge[u].get(v) == fkey:
+                self.halfedge[u][v] = None
+            if self.halfedge[u].get(v) is None and self.halfedge[v].get(u) is None:
+                self.halfedge[u].pop(v, None)
+                self.halfedge[v].pop(u, None)
+        self.facedata.pop(fkey, None)
+        owner = self._face_owner.pop(fkey, None)
+        if owner is not None:
+            faces = self._owner_faces[owner]
+            faces.discard(fkey)
+            if not faces:
+                del self._owner_faces[owner]
+        return owner
+
+    def _generate_nodes_mesh(self, nodes=None, workers=None):
+        nodes = self.nodes_joint if nodes is None else nodes
+        jobs = (self._node_sections(key) for key in nodes)
+        for key, faces in zip(nodes, _nodes_hulls(jobs, workers)):
+            keys = self._node_keys(key)
+            for face in faces:
+                self._set_face_owner(self.add_face([keys[i] for i in face]), key)
 
     def _generate_node_mesh(self, u):
-        keys = []
-        for v in self.halfbranch[u]:
-            keys.extend(self.halfbranch[u][v])
-
-        points = [self.vertex_attributes(key, 'xyz') for key in keys]
-        faces_index = convex_hull(points)
+        keys = self._node_keys(u)
+        for face in _node_faces(*self._node_sections(u)):
+            self._set_face_owner(self.add_face([keys[i] for i in face]), u)
 
-        for face_index in faces_index:
-            face = [keys[i] for i in face_index]
-            add_face = True
-
-            for v in self.halfbranch[u]:
-                if len(set(face) & set(self.halfbranch[u][v])) == 3:
-                    add_face = False
-                    break
+    def _node_keys(self, u):
+        return [key for v in self.halfbranch[u] for key in self.halfbranch[u][v]]
 
-            if add_face:
-                self.add_face(face)
+    def _node_sections(self, u):
+        """The points of the sections of a node, and the number of points of every section."""
+        points = [[self.vertex[key][xyz] for xyz in 'xyz'] for key in self._node_keys(u)]
+        sizes = [len(self.halfbranch[u][v]) for v in self.halfbranch[u]]
+        return points, sizes
 
     def _generate_branches_mesh(self):
         for u, v in self.branches():
@@ -89,81 +325,223 @@ class Skeleton3D(Mesh):
 
         index = list(pairwise(range(len(keys1)))) + [(len(keys1)-1, 0)]
         for i, j in index:
-            self.add_face([
+            fkey = self.add_face([
                 keys1[i], keys1[j], keys2[j], keys2[i]
                 ])
-
-    def _get_pts_for_branches(self):
-        for u, v in self.branches():
+            self._set_face_owner(fkey, (u, v))
+
+    def _get_pts_for_branches(self, branches=None):
+        """Place the sections of branches, return the branches of which the sections were added."""
+        branches = list(self.branches()) if branches is None else branches
+        if not self._node_index:
+            self._node_index = self.node_index()
+            self._update_nodes_radius()
+        if not compas.IPY:
+            return self._get_pts_for_branches_numpy(branches)
+
+        added = [(u, v) for u, v in branches if not self.halfbranch[u][v]]
+        for u, v in branches:
             self._get_pts_for_branch(u, v)
+        return added
+
+    def _get_pts_for_branches_numpy(self, branches):
+        """Place the sections of branches at once for every number of section points,
+        the vertex keys of the added sections of the same number of points are a contiguous block."""
+        import numpy as np
+        from .skeleton3d_numpy import skeleton3d_sections_numpy
+
+        index = self._node_index
+        xyz = self._nodes_xyz()
+        offsets = np.asarray(self.nodes_radius) * self.node_radius_fac
+        if self._branches_radius:
+            offsets = np.array([[self._section_offset(u, v), self._section_offset(v, u)] for u, v in branches]).reshape(-1, 2)
+        segs = np.array([self._branch_section_seg(u, v) for u, v in branches], dtype=int)
+        added = []
+        for seg in np.unique(segs).tolist():
+            ids = np.nonzero(segs == seg)[0]
+            group = [branches[i] for i in ids.tolist()]
+            sections = skeleton3d_sections_numpy(
+                xyz, [[index[u], index[v]] for u, v in group], self.branches_radius(group), seg,
+                offsets[ids] if offsets.ndim == 2 else offsets)
+
+            new = [i for i, (u, v) in enumerate(group) if not self.halfbranch[u][v]]
+            if new:
+                keys = self._add_vertices(sections[new].reshape(-1, 3))
+                for i, (keys_u, keys_v) in zip(new, np.reshape(keys, (len(new), 2, -1)).tolist()):
+                    u, v = group[i]
+                    self.halfbranch[u][v] = keys_u
+                    self.halfbranch[v][u] = keys_v
+                added.extend(group[i] for i in new)
+
+            moved = np.ones(len(group), dtype=bool)
+            moved[new] = False
+            for i, points in zip(np.nonzero(moved)[0].tolist(), sections[moved].tolist()):
+                u, v = group[i]
+                self._move_section(self.halfbranch[u][v], points[0])
+                self._move_section(self.halfbranch[v][u], points[1])
+        return added
+
+    def _add_vertices(self, xyz):
+        """Add vertices with consecutive keys after the largest key, and return the keys."""
+        start = self._max_vertex + 1
+        keys = range(start, start + len(xyz))
+        self.vertex.update((key, {'x': x, 'y': y, 'z': z}) for key, (x, y, z) in zip(keys, xyz.tolist()))
+        self.halfedge.update((key, {}) for key in keys)
+        self._max_vertex = start + len(xyz) - 1
+        return keys
+
+    def _move_section(self, keys, points):
+        for key, (x, y, z) in zip(keys, points):
+            attr = self.vertex[key]
+            attr['x'], attr['y'], attr['z'] = x, y, z
 
     def _get_pts_for_branch(self, u, v):
-        self._get_pts_for_halfbranch(u, v, 1)
-        self._get_pts_for_halfbranch(v, u, -1)
+        section_seg = self._branch_section_seg(u, v)
+        radius = self.get_branch_radius(u, v)
+        self._get_pts_for_halfbranch(u, v, 1, section_seg, radius)
+        self._get_pts_for_halfbranch(v, u, -1, section_seg, radius)
 
-    def _get_pts_for_halfbranch(self, u, v, flag):
+    def _get_pts_for_halfbranch(self, u, v, flag, section_seg=None, radius=None):
         pt_u = [self.node[u][xyz] for xyz in 'xyz']
         pt_v = [self.node[v][xyz] for xyz in 'xyz']
         vec = Vector.from_start_end(pt_u, pt_v)
         vec.unitize()
 
-        buffer_dist = self._calculate_nodes_radius() * self.node_radius_fac
+        buffer_dist = self._section_offset(u, v)
         if not self.is_node_leaf(u):
             pt_u = add_vectors(pt_u, vec * buffer_dist)
 
         target_plane = (pt_u, vec * flag)  # flip vec for the other end
-        points = self._generate_section(target_plane)
+        points = self._generate_section(target_plane, section_seg, radius)
 
-        keys = [self.add_vertex(x=x, y=y, z=z) for x, y, z in points]
-        self.halfbranch[u][v] = keys
+        if self.halfbranch[u][v]:
+            self._move_section(self.halfbranch[u][v], points)
+        else:
+            self.halfbranch[u][v] = [self.add_vertex(x=x, y=y, z=z) for x, y, z in points]
 
-    def _generate_section(self, target_plane):
-        theta = 2 * math.pi / self.section_seg
+    def _generate_section(self, target_plane, section_seg=None, radius=None):
+        section_seg = section_seg or self.section_seg
+        radius = radius or self.branch_radius
+        theta = 2 * math.pi / section_seg
         points = [
             (
-                self.branch_radius * math.cos(theta * i),
-                self.branch_radius * math.sin(theta * i),
+                radius * math.cos(theta * i),
+                radius * math.sin(theta * i),
                 0.
-            ) for i in range(self.section_seg)
+            ) for i in range(section_seg)
             ]
 
         ref_plane = ([0.0, 0.0, 0.0], [0.0, 0.0, 1.0])
 
         return orient_points(points, ref_plane, target_plane)
 
-    def _calculate_nodes_radius(self):
-
-        node_radius_all = [self._calculate_node_radius(key) for key in self.nodes_joint]
-        return max(node_radius_all)
+    def _section_offset(self, u, v):
+        """The distance of the section of a branch to its node,
+        on the sphere of the sections of the node with the largest radius."""
+        offset = self.nodes_radius[self._node_index[u]] * self.node_radius_fac
+        if not self._branches_radius:
+            return offset
+        radius = self.get_branch_radius(u, v)
+        largest = max(self.branches_radius([(u, w) for w in self.halfbranch[u]]))
+        if radius == largest:
+            return offset
+        return math.sqrt(offset * offset + largest * largest - radius * radius)
+
+    def _branch_section_seg(self, u, v):
+        return self.section_seg_for_radius(self.get_branch_radius(u, v))
+
+    def section_seg_for_radius(self, radius):
+        """The number of points of the sections of a branch.
+
+        Without ``section_length`` and ``section_tolerance``, the number is ``section_seg``.
+        Otherwise, it is the smallest number of points, at least three, for which the edges of the section
+        are at most ``section_length`` long and deviate at most ``section_tolerance`` from the circle of the branch.
+
+        Parameters
+        ----------
+        radius : float
+            the radius of the branch.
+
+        Return
+        ------
+        int
+        """
+        if not self.section_length and not self.section_tolerance:
+            return self.section_seg
+        section_seg = 3
+        if self.section_length:
+            section_seg = max(section_seg, int(math.ceil(2 * math.pi * radius / self.section_length - 1e-9)))
+        if self.section_tolerance and self.section_tolerance < radius:
+            # the distance of the middle of an edge to the circle is radius * (1 - cos(pi / n))
+            angle = math.acos(1 - self.section_tolerance / radius)
+            section_seg = max(section_seg, int(math.ceil(math.pi / angle - 1e-9)))
+        return section_seg
+
+    def _update_nodes_radius(self, nodes=None):
+        """Compute the radius of all nodes, or update the radius of some nodes."""
+        if nodes is None or len(nodes) == len(self.node):
+            self.nodes_radius = self._calculate_nodes_radius()
+            return
+
+        missing = len(self.node) - len(self.nodes_radius)
+        if missing > 0:
+            self.nodes_radius = list(self.nodes_radius) + [0.0] * missing
+            if not compas.IPY:
+                import numpy as np
+
+                self.nodes_radius = np.array(self.nodes_radius)
+        for key, radius in zip(nodes, self._calculate_nodes_radius(nodes)):
+            self.nodes_radius[self._node_index[key]] = radius
+
+    def _calculate_nodes_radius(self, nodes=None):
+        """The radius of the nodes, of all nodes in their order by default, zero for the leaves."""
+        nodes = list(self.node) if nodes is None else nodes
+        if compas.IPY:
+            return [self._calculate_node_radius(key) if self.is_node_joint(key) else 0.0 for key in nodes]
+
+        from .skeleton3d_numpy import skeleton3d_nodes_radius_numpy
+
+        index = self._node_index or self.node_index()
+        halfbranches = [(u, v) for u in nodes for v in self.halfbranch[u]]
+        nodes_radius = skeleton3d_nodes_radius_numpy(
+            self._nodes_xyz(), [[index[u], index[v]] for u, v in halfbranches], self.branches_radius(halfbranches))
+        return nodes_radius[[index[key] for key in nodes]]
 
     def _calculate_node_radius(self, key):
-        nbrs = list(self.halfbranch[key])
-
         pt_center = [self.node[key][xyz] for xyz in 'xyz']
-        pt_nbrs = [[self.node[nbr][xyz] for xyz in 'xyz'] for nbr in nbrs]
-
-        vecs = [normalize_vector(Vector.from_start_end(pt_center, pt_nbr)) for pt_nbr in pt_nbrs]
-        pts = [add_vectors(pt_center, vec) for vec in vecs]
-
-        ang_min = math.pi * 2
-        for i, pt1 in enumerate(pts):
-            for j, pt2 in enumerate(pts):
-                if i == j:
-                    continue
-
-                vec1 = Vector.from_start_end(pt_center, pt1)
-                vec2 = Vector.from_start_end(pt_center, pt2)
-                ang_min = min(ang_min, vec1.angle(vec2))
-
-        return self.branch_radius/math.tan(ang_min * .5)
+        vecs = [Vector.from_start_end(pt_center, [self.node[nbr][xyz] for xyz in 'xyz']) for nbr in self.halfbranch[key]]
+        radii = self.branches_radius([(key, nbr) for nbr in self.halfbranch[key]])
+
+        if min(radii) == max(radii):
+            ang_min = min(angle_vectors(vec1, vec2) for vec1, vec2 in combinations(vecs, 2))
+            return radii[0]/math.tan(ang_min * .5)
+
+        # the sections are placed on the smallest sphere on which no two sections overlap
+        largest = max(radii)
+        sphere = largest * largest
+        for (vec1, r1), (vec2, r2) in combinations(zip(vecs, radii), 2):
+            cos = math.cos(angle_vectors(vec1, vec2))
+            if cos * max(r1, r2) > -min(r1, r2):
+                sphere = max(sphere, (r1 * r1 + r2 * r2 + 2 * r1 * r2 * cos) / (1 - cos * cos))
+        return math.sqrt(sphere - largest * largest)
 
     # --------------------------------------------------------------------------
     # info
     # --------------------------------------------------------------------------
 
+    def _nodes_xyz(self):
+        return [[attr[xyz] for xyz in 'xyz'] for attr in self.node.values()]
+
+    def node_index(self):
+        """Returns a dictionary mapping the node keys to their index in the order of the nodes."""
+        return {key: index for index, key in enumerate(self.node)}
+
     def is_node_leaf(self, key):
         return len(list(self.halfbranch[key])) == 1
 
+    def is_node_joint(self, key):
+        return len(self.halfbranch[key]) > 1
+
     def branches(self):
         seen = set()
         for u in self.halfbranch:
@@ -177,54 +555,398 @@ class Skeleton3D(Mesh):
 
                 yield key
 
+    def get_branch_radius(self, u, v):
+        """The radius of a branch, ``branch_radius`` unless it was set by :meth:`set_branches_radius`."""
+        return self._branches_radius.get((u, v), self.branch_radius)
+
+    def branches_radius(self, branches=None):
+        """The radii of branches, of all branches in the order of :meth:`branches` by default."""
+        branches = self.branches() if branches is None else branches
+        return [self.get_branch_radius(u, v) for u, v in branches]
+
+    def _node_branches(self, nodes):
+        """The branches of nodes, in the order and direction of :meth:`branches`."""
+        index = self._node_index
+        branches = OrderedDict()
+        for u in nodes:
+            for v in self.halfbranch[u]:
+                branches[(u, v) if index[u] < index[v] else (v, u)] = None
+        return list(branches)
+
+    # --------------------------------------------------------------------------
+    # editing
+    # --------------------------------------------------------------------------
+
+    def move_node(self, key, xyz):
+        """Move a node. The mesh around the node is updated by the next :meth:`generate_mesh`.
+
+        Parameters
+        ----------
+        key : int
+            the node.
+        xyz : list
+            the new coordinates of the node.
+        """
+        self.node[key].update(zip('xyz', xyz))
+        self._dirty.add(key)
+        self._dirty.update(self.halfbranch[key])
+
+    def update_skeleton_lines(self, lines=[]):
+        """Update the skeleton to new lines.
+        The mesh is updated by the next :meth:`generate_mesh`, around the nodes which moved
+        and the branches which were added or deleted only.
+
+        Parameters
+        ----------
+        lines : list
+            a list of compas lines.
+
+        Notes
+        -----
+        If the lines connect the same nodes, the nodes are moved with :meth:`move_node`.
+        Otherwise, the nodes are matched by position: the branches which are not in the lines are deleted
+        with :meth:`delete_branch`, and the branches which are new are added with :meth:`add_branch`,
+        with new nodes at new positions. Nodes without branches are kept, they have no mesh.
+        """
+        from compas.datastructures import Network
+
+        network = Network.from_lines(lines)
+        if set(network.node) == set(self.node) and all(set(network.adjacency[key]) == set(self.halfbranch[key]) for key in self.node):
+            keys = {key: key for key in network.node}
+        else:
+            nodes = {geometric_key([attr[axis] for axis in 'xyz']): key for key, attr in self.node.items()}
+            keys = {}
+            for key, attr in network.node.items():
+                xyz = [attr[axis] for axis in 'xyz']
+                gkey = geometric_key(xyz)
+                keys[key] = nodes[gkey] if gkey in nodes else self.add_node(xyz)
+
+        for key, attr in network.node.items():
+            xyz = [attr[axis] for axis in 'xyz']
+            if xyz != [self.node[keys[key]][axis] for axis in 'xyz']:
+                self.move_node(keys[key], xyz)
+
+        branches = OrderedDict((frozenset([keys[u], keys[v]]), (keys[u], keys[v])) for u, v in network.edges())
+        for u, v in list(self.branches()):
+            if frozenset([u, v]) not in branches:
+                self.delete_branch(u, v)
+        for u, v in branches.values():
+            if v not in self.halfbranch[u]:
+                self.add_branch(u, v)
+
+    def add_node(self, xyz):
+        """Add a node without branches, and return its key."""
+        key = max(self.node) + 1 if self.node else 0
+        self.node[key] = dict(zip('xyz', xyz))
+        self.halfbranch[key] = {}
+        return key
+
+    def add_branch(self, u, v):
+        """Add a branch between two nodes. The mesh is updated by the next :meth:`generate_mesh`."""
+        if u == v or v in self.halfbranch[u]:
+            raise ValueError('The branch {} already exists or is a loop.'.format((u, v)))
+        self.halfbranch[u][v] = None
+        self.halfbranch[v][u] = None
+        self._dirty.update((u, v))
+
+    def delete_branch(self, u, v):
+        """Delete a branch and its part of the mesh.
+        The meshes of its nodes are updated by the next :meth:`generate_mesh`, nodes without branches are kept."""
+        self._delete_branches_mesh([(u, v)])
+        del self.halfbranch[u][v]
+        del self.halfbranch[v][u]
+        self._branches_radius.pop((u, v), None)
+        self._branches_radius.pop((v, u), None)
+
+    def set_branches_radius(self, radius, branches=None):
+        """Set the radius of branches, instead of ``branch_radius``.
+        The sections and the meshes of the branches of which the radius changed, and of their nodes,
+        are generated again by the next :meth:`generate_mesh`, with the number of points of :meth:`section_seg_for_radius`.
+
+        Parameters
+        ----------
+        radius : float or list
+            the radius of the branches, or a radius for every branch.
+        branches : list, optional
+            the branches, all branches in the order of :meth:`branches` by default.
+
+        Examples
+        --------
+        >>> radii = [0.1 + 0.01 * i for i, branch in enumerate(skeleton.branches())]
+        >>> skeleton.set_branches_radius(radii)
+        >>> skeleton.generate_mesh()
+        """
+        branches = list(self.branches()) if branches is None else list(branches)
+        radii = [radius] * len(branches) if isinstance(radius, (int, float)) else list(radius)
+        if len(radii) != len(branches):
+            raise ValueError('Expected {} radii, got {}.'.format(len(branches), len(radii)))
+
+        for u, v in branches:
+            if u not in self.halfbranch or v not in self.halfbranch[u]:
+                raise ValueError('The branch {} does not exist.'.format((u, v)))
+
+        changed = []
+        for (u, v), radius in zip(branches, radii):
+            radius = float(radius)
+            if radius != self.get_branch_radius(u, v):
+                changed.append((u, v))
+            self._branches_radius[u, v] = self._branches_radius[v, u] = radius
+        if len(changed) == sum(len(nbrs) for nbrs in self.halfbranch.values()) // 2:
+            # the whole mesh is generated again
+            self._parameters = None
+        else:
+            self._delete_branches_mesh(changed)
+
+    def _delete_branches_mesh(self, branches):
+        """Delete the sections of branches, and the faces of the branches and of their nodes."""
+        owners = set()
+        for u, v in branches:
+            owners.update([u, v, (u, v), (v, u)])
+        self._delete_faces_of(owners)
+        for u, v in branches:
+            for key in (self.halfbranch[u][v] or []) + (self.halfbranch[v][u] or []):
+                self.delete_vertex(key)
+            self.halfbranch[u][v] = self.halfbranch[v][u] = None
+            self._dirty.update((u, v))
+
     # --------------------------------------------------------------------------
     # modifiers
     # --------------------------------------------------------------------------
 
-    def merge_triangles(self):
-        faces_to_merge = []
-        seen = []
+    def merge_triangles(self, quality=False):
+        """Merge pairs of adjacent triangles into quads.
+
+        Parameters
+        ----------
+        quality : bool, optional
+            pair the triangles by the quality of the quads, the most planar and most square quads first,
+            instead of in the order of the edges. Triangles forming a concave quad are not merged.
+        """
+        pairs = self._triangle_pairs_by_quality() if quality else self._triangle_pairs()
+        for f1, f2 in pairs:
+            self.merge_triangle(f1, f2)
+
+    def _adjacent_triangles(self):
+        """The pairs of triangles sharing an edge."""
         for u, v in self.edges():
             f1 = self.halfedge[u][v]
-            f2 = self.halfedge[v][u]
-            if not f1 or not f2:
+            f2 = self.halfedge[v].get(u)
+            if f1 is None or f2 is None or f1 == f2:
                 continue
+            if len(self.face[f1]) == len(self.face[f2]) == 3:
+                yield f1, f2
 
-            if f1 in seen or f2 in seen:
+    def _triangle_pairs(self, candidates=None):
+        paired = set()
+        pairs = []
+        for f1, f2 in candidates or self._adjacent_triangles():
+            if f1 in paired or f2 in paired:
                 continue
+            paired.add(f1)
+            paired.add(f2)
+            pairs.append((f1, f2))
+        return pairs
+
+    def _triangle_pairs_by_quality(self):
+        candidates = []
+        for f1, f2 in self._adjacent_triangles():
+            face = self._merged_triangles(f1, f2)
+            error = self._quad_error(face) if face else None
+            if error is not None:
+                candidates.append((error, f1, f2))
+        candidates.sort()
+        return self._triangle_pairs([(f1, f2) for _, f1, f2 in candidates])
+
+    def _quad_error(self, face):
+        """The deviation of a quad from a planar square, as the angle between the normals of its triangles
+        and the largest cosine of its corners, None for a concave or degenerate quad."""
+        points = [self.vertex_coordinates(key) for key in face]
+        normals = [
+            cross_vectors(subtract_vectors(points[1], points[0]), subtract_vectors(points[2], points[0])),
+            cross_vectors(subtract_vectors(points[2], points[0]), subtract_vectors(points[3], points[0]))
+            ]
+        if not length_vector(normals[0]) or not length_vector(normals[1]):
+            return None
+        normal = add_vectors(*normals)
+
+        cos_max = 0
+        for i in range(4):
+            a = subtract_vectors(points[i - 1], points[i])
+            b = subtract_vectors(points[(i + 1) % 4], points[i])
+            if dot_vectors(cross_vectors(b, a), normal) <= 0:
+                return None
+            cos_max = max(cos_max, abs(dot_vectors(a, b)) / (length_vector(a) * length_vector(b)))
+        return 1 - dot_vectors(normalize_vector(normals[0]), normalize_vector(normals[1])) + cos_max
+
+    def _merged_triangles(self, f1, f2):
+        """The quad of two triangles sharing an edge, None if they do not."""
+        face1, face2 = self.face[f1], self.face[f2]
+        if not len(face1) == len(face2) == 3:
+            return None
+        keys_shared = set(face1) & set(face2)
+        if len(keys_shared) != 2:
+            return None
+        u, v = keys_shared
+        if (u, v) in self.face_halfedges(f1):
+            return [
+                u,
+                face2[(face2.index(u) + 1) % 3],
+                v,
+                face1[(face1.index(v) + 1) % 3]
+                ]
+        return [
+            u,
+            face1[(face1.index(u) + 1) % 3],
+            v,
+            face2[(face2.index(v) + 1) % 3]
+            ]
 
-            if len(self.face[f1]) == len(self.face[f2]) == 3:
-                faces_to_merge.append([f1, f2])
-                seen.extend([f1, f2])
+    def merge_triangle(self, f1, f2):
+        add_face = self._merged_triangles(f1, f2)
+        if add_face:
+            owner = self._delete_face(f1)
+            self._delete_face(f2)
 
-        for f1, f2 in faces_to_merge:
-            self.merge_triangle(f1, f2)
+            fkey = self.add_face(add_face)
+            if owner is not None:
+                self._set_face_owner(fkey, owner)
 
-    def merge_triangle(self, f1, f2):
-        face1, face2 = self.face[f1], self.face[f2]
-        if len(face1) == len(face2) == 3:
-            keys_shared = set(face1) & set(face2)
-            if len(keys_shared) == 2:
-                u, v = keys_shared
-                if (u, v) in self.face_halfedges(f1):
-                    add_face = [
-                        u,
-                        face2[(face2.index(u) + 1) % 3],
-                        v,
-                        face1[(face1.index(v) + 1) % 3]
-                        ]
-                else:
-                    add_face = [
-                        u,
-                        face1[(face1.index(u) + 1) % 3],
-                        v,
-                        face2[(face2.index(v) + 1) % 3]
-                        ]
-
-                self.delete_face(f1)
-                self.delete_face(f2)
-
-                self.add_face(add_face)
+    # --------------------------------------------------------------------------
+    # exporting
+    # --------------------------------------------------------------------------
+
+    def to_arrays(self, dtype=float, normals=False):
+        """Return the vertices and faces of the generated mesh as arrays.
+
+        Parameters
+        ----------
+        dtype : numpy.dtype, optional
+            type of the vertex coordinates.
+        normals : bool, optional
+            also return the area weighted vertex normals and the face normals.
+
+        Return
+        ------
+        vertices: :class:`numpy.ndarray`
+            a (V, 3) array of vertex coordinates
+        faces: :class:`numpy.ndarray`
+            a (F, 4) int32 array of vertex indices, triangles are padded with -1.
+        vertex_normals: :class:`numpy.ndarray`
+            a (V, 3) array of unit vertex normals, only if ``normals`` is True.
+        face_normals: :class:`numpy.ndarray`
+            a (F, 3) array of unit face normals, only if ``normals`` is True.
+        """
+        import numpy as np
+
+        key_index = self.key_index()
+        vertices = np.array(self.vertices_attributes('xyz'), dtype=dtype).reshape(-1, 3)
+        faces = np.full((self.number_of_faces(), 4), -1, dtype=np.int32)
+        for i, fkey in enumerate(self.faces()):
+            face = [key_index[key] for key in self.face_vertices(fkey)]
+            faces[i, :len(face)] = face
+
+        if not normals:
+            return vertices, faces
+
+        from .normals_numpy import mesh_normals_numpy
+
+        vertex_normals, face_normals = mesh_normals_numpy(vertices, faces)
+        return vertices, faces, vertex_normals.astype(dtype), face_normals.astype(dtype)
+
+    def stream_mesh(self, chunk_size=100000, workers=None):
+        """Generate the mesh in chunks of faces without adding it to the skeleton, for example to write it to a file.
+
+        The chunks contain the quads of the branches first, and then the triangles of the nodes.
+        The sections are computed again for every chunk, and their points have the same index in all chunks,
+        so that the memory used does not depend on the size of the skeleton.
+        The faces are the faces of :meth:`generate_mesh`, without merged triangles.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            approximate number of faces of a chunk.
+        workers : int, optional
+            number of processes computing the convex hulls of the nodes ahead of the chunks.
+
+        Return
+        ------
+        iterable
+            chunks of sorted vertex indices, their coordinates, and faces as a (F, 4) array of vertex indices
+            in which triangles are padded with -1, see :func:`compas_skeleton.files.write_chunks`.
+            The total number of vertices is ``number_of_vertices``.
+
+        Examples
+        --------
+        >>> for vertices, xyz, faces in skeleton.stream_mesh(chunk_size=10000):
+        >>>     print(len(faces))
+        """
+        from .skeleton3d_numpy import _MeshChunks
+
+        return _MeshChunks(self, chunk_size, workers)
+
+    def write(self, path, format=None, chunk_size=100000, workers=None):
+        """Write the mesh to a binary STL, a binary PLY or an OBJ file chunk by chunk, see :meth:`stream_mesh`.
+        The mesh is generated while it is written, it never exists in memory as a whole.
+
+        Parameters
+        ----------
+        path : str
+            path of the file.
+        format : {'stl', 'ply', 'obj'}, optional
+            file format, derived from the file extension by default.
+        chunk_size : int, optional
+            approximate number of faces generated and written at once.
+        workers : int, optional
+            number of processes computing the convex hulls of the nodes ahead of the writer.
+
+        Return
+        ------
+        int
+            the number of faces (triangles for STL) written.
+
+        Examples
+        --------
+        >>> skeleton.write('lattice.stl')
+        """
+        from compas_skeleton.files import write_chunks
+
+        return write_chunks(path, self.stream_mesh(chunk_size, workers), format)
+
+    # --------------------------------------------------------------------------
+    # asynchronous
+    # --------------------------------------------------------------------------
+
+    def agenerate_mesh(self, executor=None, merge=False):
+        """Generate the mesh in an executor, see :meth:`generate_mesh`.
+        In a process pool, the mesh is generated for a copy of the skeleton which then replaces its state.
+
+        Parameters
+        ----------
+        executor : :class:`concurrent.futures.Executor`, optional
+            thread or process pool, the default executor of the event loop by default.
+        merge : bool, optional
+            also merge the triangles of the nodes, see :meth:`merge_triangles`.
+
+        Return
+        ------
+        coroutine
+            a coroutine returning the skeleton.
+        """
+        from .asynchronous import generate_mesh
+
+        return generate_mesh(self, executor, merge)
+
+    def ato_arrays(self, executor=None, **kwargs):
+        """Return the vertices and faces of the generated mesh as arrays in an executor, see :meth:`to_arrays`.
+
+        Return
+        ------
+        coroutine
+            a coroutine returning the arrays.
+        """
+        from .asynchronous import call
+
+        return call(self, 'to_arrays', executor, kwargs)
 
 
 if __name__ == '__main__':
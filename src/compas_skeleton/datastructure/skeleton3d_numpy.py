@@ -0,0 +1,304 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+__all__ = [
+    'skeleton3d_nodes_radius_numpy',
+    'skeleton3d_sections_numpy',
+]
+
+
+def _halfbranch_directions(xyz, halfbranches):
+    vectors = xyz[halfbranches[:, 1]] - xyz[halfbranches[:, 0]]
+    lengths = np.linalg.norm(vectors, axis=1)
+    return vectors / np.where(lengths > 0, lengths, 1.0)[:, None]
+
+
+def _section_frames(normals):
+    """The images of the X and Y axis under the rotations of the Z axis to unit normals,
+    the rotations of :func:`compas.geometry.orient_points`."""
+    a, b, c = normals.T
+    flipped = c < -1.0 + 1e-9
+    d = 1.0 / np.where(flipped, 1.0, 1.0 + c)
+    xaxis = np.stack([1.0 - a * a * d, -a * b * d, -a], axis=1)
+    yaxis = np.stack([-a * b * d, 1.0 - b * b * d, -b], axis=1)
+    # the rotation of the Z axis to its opposite is a half turn about the X axis
+    xaxis[flipped] = [1.0, 0.0, 0.0]
+    yaxis[flipped] = [0.0, -1.0, 0.0]
+    return xaxis, yaxis
+
+
+def _node_hull_numpy(points, sizes):
+    """The faces of the convex hull of the sections of a node computed with Qhull, oriented outwards,
+    without the faces of which all points are in the same section."""
+    from scipy.spatial import ConvexHull
+
+    points = np.asarray(points, dtype=float)
+    hull = ConvexHull(points)
+    faces = hull.simplices
+    a, b, c = points[faces].transpose(1, 0, 2)
+    flipped = np.einsum('ij,ij->i', np.cross(b - a, c - a), hull.equations[:, :3]) < 0
+    faces[flipped] = faces[flipped][:, ::-1]
+    ring = np.repeat(np.arange(len(sizes)), sizes)[faces]
+    caps = (ring[:, 0] == ring[:, 1]) & (ring[:, 1] == ring[:, 2])
+    return faces[~caps].tolist()
+
+
+def skeleton3d_nodes_radius_numpy(xyz, halfbranches, radius):
+    """Compute the radius of the nodes of a 3D skeleton, the distance from a node to the sections of its branches.
+
+    Parameters
+    ----------
+    xyz : array-like
+        XYZ coordinates of the nodes.
+    halfbranches : array-like
+        A (H, 2) array of the indices of the start and end nodes of the halfbranches,
+        both halfbranches of every branch are included.
+    radius : float or array-like
+        The radius of the branches, or a (H,) array of the radii of the halfbranches.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        A (N,) array of radii, the distances from the nodes to the sections with the largest radius, zero for the leaves.
+
+    Notes
+    -----
+    If the branches of a node have the same radius, the radius of the node is the distance at which the sections
+    of the two branches with the smallest angle, ``radius / tan(angle / 2)``, touch.
+    Otherwise, the sections of a node are placed on a sphere around the node, the smallest sphere on which
+    the sections of no two branches overlap, and the radius of the node is the distance of the largest sections.
+    The angles of the branches of a node are found from the Gram matrix of its unit branch directions,
+    computed for all nodes of the same degree at once.
+
+    Examples
+    --------
+    >>> xyz = [[0, 0, 0], [1, 0, 0], [0, 1, 0]]
+    >>> skeleton3d_nodes_radius_numpy(xyz, [[0, 1], [1, 0], [0, 2], [2, 0]], 1.0).tolist()
+    [1.0, 0.0, 0.0]
+
+    """
+    xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+    halfbranches = np.asarray(halfbranches, dtype=np.int64).reshape(-1, 2)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), len(halfbranches))
+    directions = _halfbranch_directions(xyz, halfbranches)
+
+    # the halfbranches grouped by start node
+    order = np.argsort(halfbranches[:, 0], kind='stable')
+    degree = np.bincount(halfbranches[:, 0], minlength=len(xyz))
+    starts = np.cumsum(degree) - degree
+
+    nodes_radius = np.zeros(len(xyz))
+    for k in np.unique(degree[degree > 1]):
+        nodes = np.nonzero(degree == k)[0]
+        ids = order[starts[nodes][:, None] + np.arange(k)]
+        vectors = directions[ids]
+        cos = np.clip(np.einsum('nik,njk->nij', vectors, vectors), -1.0, 1.0)
+        # a branch and itself do not constrain the radius
+        cos[:, np.arange(k), np.arange(k)] = -1.0
+        overlap = np.any(cos >= 1.0 - 1e-12, axis=(1, 2))
+        if np.any(overlap):
+            raise ValueError('Two branches of node {} overlap.'.format(nodes[np.argmax(overlap)]))
+
+        # radius / tan(angle / 2)
+        radii = radius[ids]
+        largest = cos.reshape(len(nodes), -1).max(axis=1)
+        nodes_radius[nodes] = radii[:, 0] * np.sqrt((1.0 + largest) / (1.0 - largest))
+
+        graded = radii.min(axis=1) < radii.max(axis=1)
+        if np.any(graded):
+            nodes_radius[nodes[graded]] = _nodes_sphere_distances(cos[graded], radii[graded])
+    return nodes_radius
+
+
+def _nodes_sphere_distances(cos, radii):
+    """The distances from nodes to their largest sections on the smallest spheres on which no two sections overlap,
+    from the cosines of the angles of the branches of the nodes, and the radii of the branches."""
+    r1 = radii[:, :, None]
+    r2 = radii[:, None, :]
+    # the sections touch on a sphere of squared radius (r1² + r2² + 2 r1 r2 cos) / sin²,
+    # unless the branches are so far apart that the larger section alone bounds the sphere
+    apart = cos * np.maximum(r1, r2) <= -np.minimum(r1, r2)
+    sphere = np.where(apart, 0.0, (r1 * r1 + r2 * r2 + 2 * r1 * r2 * cos) / np.where(apart, 1.0, 1.0 - cos * cos))
+    largest = radii.max(axis=1)
+    sphere = np.maximum(sphere.max(axis=(1, 2)), largest * largest)
+    return np.sqrt(sphere - largest * largest)
+
+
+def _sections_offsets(pairs, radii, offsets):
+    """The distances of the sections at both ends of branches to their nodes, on the spheres of the largest sections
+    of the nodes, from the indices of the nodes of the branches, the radii of the branches,
+    and the distances of the largest sections of the nodes."""
+    largest = np.zeros(len(offsets))
+    np.maximum.at(largest, pairs.ravel(), np.repeat(radii, 2))
+    largest = largest[pairs]
+    offsets = offsets[pairs]
+    radii = np.asarray(radii)[:, None]
+    return np.where(radii == largest, offsets, np.sqrt(offsets * offsets + largest * largest - radii * radii))
+
+
+def skeleton3d_sections_numpy(xyz, branches, radius, section_seg, offsets=None):
+    """Compute the sections at both ends of all branches of a 3D skeleton.
+
+    Parameters
+    ----------
+    xyz : array-like
+        XYZ coordinates of the nodes.
+    branches : array-like
+        A (B, 2) array of the indices of the start and end nodes of the branches.
+    radius : float or array-like
+        The radius of the branches, or a (B,) array of the radii of the branches.
+    section_seg : int
+        The number of points of a section.
+    offsets : array-like, optional
+        The distances of the sections to their node, for every node,
+        or a (B, 2) array of the distances at the start and at the end of every branch.
+        By default, the sections are placed at the nodes.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        A (B, 2, S, 3) array of the points of the sections at the start and at the end of the branches.
+
+    Notes
+    -----
+    The sections are circles of ``section_seg`` points in the plane perpendicular to the branch,
+    oriented like the sections of :func:`compas.geometry.orient_points`.
+    The sections at both ends of a branch share the same orientation, their points correspond.
+
+    Examples
+    --------
+    >>> sections = skeleton3d_sections_numpy([[0, 0, 0], [0, 0, 2]], [[0, 1]], 1.0, 4)
+    >>> sections.shape
+    (1, 2, 4, 3)
+    >>> sections[0, 1, 0].tolist()
+    [1.0, 0.0, 2.0]
+
+    """
+    xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+    branches = np.asarray(branches, dtype=np.int64).reshape(-1, 2)
+    normals = _halfbranch_directions(xyz, branches)
+
+    origins = xyz[branches]
+    if offsets is not None:
+        offsets = np.asarray(offsets, dtype=float)
+        offsets = offsets.reshape(-1, 2) if offsets.ndim == 2 else offsets[branches]
+        origins = origins + offsets[:, :, None] * np.stack([normals, -normals], axis=1)
+
+    theta = 2 * np.pi / section_seg * np.arange(section_seg)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), len(branches))
+    circle = radius[:, None, None] * np.stack([np.cos(theta), np.sin(theta)], axis=1)
+    xaxis, yaxis = _section_frames(normals)
+    ring = circle[:, :, 0, None] * xaxis[:, None] + circle[:, :, 1, None] * yaxis[:, None]
+    return origins[:, :, None] + ring[:, None]
+
+
+# ==============================================================================
+# streaming
+# ==============================================================================
+
+
+def _chunk(indices, points, faces):
+    """A chunk of the writers from the vertex indices and points of sections, and faces padded to quads."""
+    vertices, index = np.unique(np.concatenate(indices), return_index=True)
+    faces = np.concatenate([np.pad(face, ((0, 0), (0, 4 - face.shape[1])), constant_values=-1) for face in faces])
+    return vertices, np.concatenate(points)[index], faces
+
+
+class _MeshChunks(object):
+    """The faces of the branches and then of the nodes of a 3D skeleton in chunks,
+    with the sections computed for every chunk."""
+
+    def __init__(self, skeleton, chunk_size=100000, workers=None):
+        self.skeleton = skeleton
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+        index = skeleton.node_index()
+        self.xyz = np.asarray(skeleton._nodes_xyz(), dtype=float).reshape(-1, 3)
+        self.branches = list(skeleton.branches())
+        self.pairs = np.array([[index[u], index[v]] for u, v in self.branches], dtype=np.int64).reshape(-1, 2)
+        self.halfbranches = {}
+        for i, (u, v) in enumerate(self.branches):
+            self.halfbranches[u, v] = i, 0
+            self.halfbranches[v, u] = i, 1
+
+        self.radii = np.array(skeleton.branches_radius(self.branches), dtype=float)
+        halfbranches = np.concatenate([self.pairs, self.pairs[:, ::-1]])
+        radii = np.concatenate([self.radii, self.radii])
+        offsets = skeleton3d_nodes_radius_numpy(self.xyz, halfbranches, radii) * skeleton.node_radius_fac
+        self.offsets = _sections_offsets(self.pairs, self.radii, offsets)
+        self.segs = np.array([skeleton._branch_section_seg(u, v) for u, v in self.branches], dtype=np.int64)
+        self.starts = np.cumsum(2 * self.segs) - 2 * self.segs
+        self.number_of_vertices = int(2 * self.segs.sum())
+
+    def _sections(self, ids):
+        """The sections of branches, and the indices of their points."""
+        sections = {}
+        segs = self.segs[ids]
+        for seg in np.unique(segs).tolist():
+            group = ids[segs == seg]
+            points = skeleton3d_sections_numpy(self.xyz, self.pairs[group], self.radii[group], seg, self.offsets[group])
+            indices = self.starts[group][:, None, None] + np.arange(2 * seg).reshape(2, seg)
+            sections.update(zip(group.tolist(), zip(points, indices)))
+        return sections
+
+    def _branch_chunks(self):
+        ids = np.arange(len(self.branches))
+        step = max(1, self.chunk_size // max(1, int(self.segs.max(initial=1))))
+        for start in range(0, len(ids), step):
+            sections = self._sections(ids[start:start + step])
+            points = [sections[i][0].reshape(-1, 3) for i in sorted(sections)]
+            indices = [sections[i][1].ravel() for i in sorted(sections)]
+            faces = []
+            for i in sorted(sections):
+                ring1, ring2 = sections[i][1]
+                shifted = np.roll(np.arange(len(ring1)), -1)
+                faces.append(np.stack([ring1, ring1[shifted], ring2[shifted], ring2], axis=1))
+            yield _chunk(indices, points, faces)
+
+    def _node_jobs(self, nodes, pending):
+        """The section points of nodes, computed for batches of nodes, keeping their indices in ``pending``."""
+        halfbranch = self.skeleton.halfbranch
+        step = max(1, self.chunk_size // 8)
+        for start in range(0, len(nodes), step):
+            batch = nodes[start:start + step]
+            ids = np.unique([self.halfbranches[u, v][0] for u in batch for v in halfbranch[u]])
+            sections = self._sections(ids)
+            for u in batch:
+                ends = [self.halfbranches[u, v] for v in halfbranch[u]]
+                points = np.concatenate([sections[i][0][end] for i, end in ends])
+                indices = np.concatenate([sections[i][1][end] for i, end in ends])
+                pending.append((indices, points))
+                yield points.tolist(), [self.segs[i] for i, _ in ends]
+
+    def _node_chunks(self):
+        from collections import deque
+        from .skeleton3d import _nodes_hulls
+
+        nodes = [key for key in self.skeleton.node if self.skeleton.is_node_joint(key)]
+        pending = deque()
+        chunk = [], [], []
+        count = 0
+        for faces in _nodes_hulls(self._node_jobs(nodes, pending), self.workers):
+            indices, points = pending.popleft()
+            if faces:
+                chunk[0].append(indices)
+                chunk[1].append(points)
+                chunk[2].append(indices[np.asarray(faces, dtype=np.int64)])
+                count += len(faces)
+            if count >= self.chunk_size:
+                yield _chunk(*chunk)
+                chunk = [], [], []
+                count = 0
+        if count:
+            yield _chunk(*chunk)
+
+    def __iter__(self):
+        for chunk in self._branch_chunks():
+            yield chunk
+        for chunk in self._node_chunks():
+            yield chunk
@@ -0,0 +1,748 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+__all__ = [
+    'SubdivisionOperator',
+    'mesh_subdivide_catmullclark_numpy',
+    'mesh_subdivide_catmullclark_chunks_numpy',
+    'mesh_subdivide_catmullclark_adaptive_numpy',
+]
+
+
+# ==============================================================================
+# topology
+# ==============================================================================
+
+
+class _Level(object):
+    """Topology of (part of) one subdivision level, expressed in global ids.
+
+    Vertex, edge and face ids are global, so that any part of a mesh refines to
+    exactly the same ids as the whole mesh. Every level is numbered from the
+    previous one: old vertices keep their ids, edge points follow in edge order
+    and face points follow in face order. Edge ``e`` splits into ``2e`` and ``2e + 1``
+    and the corners of all faces (in face order) define the remaining edges and the new faces.
+
+    """
+
+    def __init__(self):
+        # global totals
+        self.V = 0
+        self.E = 0
+        self.F = 0
+        self.S = 0
+        # local items, sorted by global id
+        self.vid = None
+        self.vfix = None
+        self.eid = None
+        self.ev = None
+        self.eb = None
+        self.fid = None
+        self.fs = None
+        self.fo = None
+        self.fv = None
+        self.fe = None
+        self.own = None
+
+    @property
+    def fn(self):
+        return np.diff(self.fo)
+
+    def vertex_index(self, ids):
+        return _local_index(self.vid, self.V, ids)
+
+    def edge_index(self, ids):
+        return _local_index(self.eid, self.E, ids)
+
+    def face_corners(self):
+        """Local face and corner index of every local face corner, and the flat index of the previous corner."""
+        fn = self.fn
+        fc = np.repeat(np.arange(len(fn)), fn)
+        j = np.arange(len(self.fv)) - self.fo[fc]
+        prv = np.where(j == 0, self.fo[fc + 1] - 1, np.arange(len(self.fv)) - 1)
+        return fc, j, prv
+
+
+def _local_index(ids, total, query):
+    if len(ids) == total:
+        return query
+    return np.searchsorted(ids, query)
+
+
+def _coarse_level(number_of_vertices, faces, fixed=None):
+    fn = np.array([len(face) for face in faces], dtype=np.int64)
+    fo = np.zeros(len(fn) + 1, dtype=np.int64)
+    np.cumsum(fn, out=fo[1:])
+    fv = np.fromiter((key for face in faces for key in face), dtype=np.int64, count=fo[-1])
+
+    fc = np.repeat(np.arange(len(fn)), fn)
+    j = np.arange(len(fv)) - fo[fc]
+    nxt = np.where(j == fn[fc] - 1, fo[fc], np.arange(len(fv)) + 1)
+
+    u = fv
+    v = fv[nxt]
+    lo = np.minimum(u, v)
+    hi = np.maximum(u, v)
+    edges, fe, count = np.unique(lo * number_of_vertices + hi, return_inverse=True, return_counts=True)
+
+    level = _Level()
+    level.V = number_of_vertices
+    level.E = len(edges)
+    level.F = len(fn)
+    level.S = len(fv)
+    level.vid = np.arange(number_of_vertices)
+    level.vfix = np.zeros(number_of_vertices, dtype=bool)
+    if fixed is not None and len(fixed):
+        level.vfix[np.asarray(fixed, dtype=np.int64)] = True
+    level.eid = np.arange(level.E)
+    level.ev = np.column_stack((edges // number_of_vertices, edges % number_of_vertices))
+    level.eb = count == 1
+    level.fid = np.arange(level.F)
+    level.fs = fo[:-1].copy()
+    level.fo = fo
+    level.fv = fv
+    level.fe = fe.reshape(-1)
+    level.own = np.ones(level.F, dtype=bool)
+    return level
+
+
+def _sublevel(level, faces, own):
+    """Restrict a level to a sorted selection of its (local) faces."""
+    fn = level.fn[faces]
+    fo = np.zeros(len(faces) + 1, dtype=np.int64)
+    np.cumsum(fn, out=fo[1:])
+    corners = np.repeat(level.fo[faces], fn) + (np.arange(fo[-1]) - np.repeat(fo[:-1], fn))
+
+    sub = _Level()
+    sub.V, sub.E, sub.F, sub.S = level.V, level.E, level.F, level.S
+    sub.fid = level.fid[faces]
+    sub.fs = level.fs[faces]
+    sub.fo = fo
+    sub.fv = level.fv[corners]
+    sub.fe = level.fe[corners]
+    sub.vid = np.unique(sub.fv)
+    sub.vfix = level.vfix[level.vertex_index(sub.vid)]
+    sub.eid = np.unique(sub.fe)
+    edges = level.edge_index(sub.eid)
+    sub.ev = level.ev[edges]
+    sub.eb = level.eb[edges]
+    sub.own = own
+    return sub
+
+
+def _refine(level):
+    """Refine the topology of a level once."""
+    V, E, F, S = level.V, level.E, level.F, level.S
+    fc, j, prv = level.face_corners()
+    fel = level.edge_index(level.fe)
+    gs = level.fs[fc] + j
+
+    nxt = _Level()
+    nxt.V = V + E + F
+    nxt.E = 2 * E + S
+    nxt.F = S
+    nxt.S = 4 * S
+
+    nxt.vid = np.concatenate((level.vid, V + level.eid, V + E + level.fid))
+    nxt.vfix = np.concatenate((level.vfix, np.zeros(len(level.eid) + len(level.fid), dtype=bool)))
+
+    a = level.ev[:, 0]
+    b = level.ev[:, 1]
+    w = V + level.eid
+    split = np.empty((2 * len(level.eid), 2), dtype=np.int64)
+    split[0::2, 0] = a
+    split[0::2, 1] = w
+    split[1::2, 0] = w
+    split[1::2, 1] = b
+    inner = np.column_stack((V + level.fe, V + E + level.fid[fc]))
+
+    children = np.empty(2 * len(level.eid), dtype=np.int64)
+    children[0::2] = 2 * level.eid
+    children[1::2] = 2 * level.eid + 1
+    nxt.eid = np.concatenate((children, 2 * E + gs))
+    nxt.ev = np.concatenate((split, inner))
+    nxt.eb = np.concatenate((np.repeat(level.eb, 2), np.zeros(len(gs), dtype=bool)))
+
+    nxt.fid = gs
+    nxt.fs = 4 * gs
+    nxt.fo = np.arange(0, 4 * len(gs) + 1, 4)
+
+    key = level.fv
+    fp = level.fe[prv]
+    fv = np.empty((len(gs), 4), dtype=np.int64)
+    fv[:, 0] = V + fp
+    fv[:, 1] = key
+    fv[:, 2] = V + level.fe
+    fv[:, 3] = V + E + level.fid[fc]
+
+    fe = np.empty((len(gs), 4), dtype=np.int64)
+    fe[:, 0] = 2 * fp + (b[fel[prv]] == key)
+    fe[:, 1] = 2 * level.fe + (b[fel] == key)
+    fe[:, 2] = 2 * E + gs
+    fe[:, 3] = 2 * E + gs[prv]
+
+    nxt.fv = fv.reshape(-1)
+    nxt.fe = fe.reshape(-1)
+    nxt.own = level.own[fc]
+    return nxt
+
+
+# ==============================================================================
+# geometry
+# ==============================================================================
+
+
+def _bincount3(index, weights, length):
+    out = np.empty((length, 3))
+    for i in range(3):
+        out[:, i] = np.bincount(index, weights=weights[:, i], minlength=length)
+    return out
+
+
+class _Stencil(object):
+    """The part of the smoothing of a level that only depends on its topology.
+
+    The rules are those of :func:`compas.datastructures.mesh_subdivide_catmullclark`
+    with every boundary edge treated as an infinitely sharp crease.
+
+    """
+
+    def __init__(self, level):
+        nv = self.nv = len(level.vid)
+        ne = self.ne = len(level.eid)
+        nf = self.nf = len(level.fid)
+        fn = level.fn
+        self.fn = fn[:, None]
+        self.fc = np.repeat(np.arange(nf), fn)
+        self.fvl = level.vertex_index(level.fv)
+        self.fel = level.edge_index(level.fe)
+        evl = level.vertex_index(level.ev)
+        self.a = a = evl[:, 0]
+        self.b = b = evl[:, 1]
+
+        self.nfe = (2 + np.bincount(self.fel, minlength=ne))[:, None]
+        self.eb = eb = level.eb
+
+        self.ends = ends = np.concatenate((a, b))
+        valence = np.bincount(ends, minlength=nv)
+        self.nfv = np.maximum(np.bincount(self.fvl, minlength=nv), 1)[:, None]
+        self.valence = np.maximum(valence, 1)[:, None]
+        self.n = valence[:, None].astype(float)
+        self.n1 = np.maximum(self.n, 1.0)
+
+        creases = np.bincount(ends, weights=np.concatenate((eb, eb)), minlength=nv)
+        self.crease_ends = np.concatenate((a[eb], b[eb]))
+        self.crease_others = np.concatenate((b[eb], a[eb]))
+        self.corner = creases == 2
+        self.keep = level.vfix | (creases > 2) | (valence == 0)
+
+    def apply(self, xyz):
+        """Compute the vertex coordinates of the next level from the coordinates of this level."""
+        fc = self.fc
+
+        # face points
+        fpts = _bincount3(fc, xyz[self.fvl], self.nf) / self.fn
+
+        # edge points
+        mids = xyz[self.a] + xyz[self.b]
+        epts = (mids + _bincount3(self.fel, fpts[fc], self.ne)) / self.nfe
+        epts[self.eb] = 0.5 * mids[self.eb]
+
+        # vertex points
+        nv = self.nv
+        F = _bincount3(self.fvl, fpts[fc], nv) / self.nfv
+        E = 0.5 * _bincount3(self.ends, np.concatenate((mids, mids)), nv) / self.valence
+        vpts = (F + 2.0 * E + (self.n - 3.0) * xyz) / self.n1
+
+        corner = self.corner
+        C = _bincount3(self.crease_ends, xyz[self.crease_others], nv)
+        vpts[corner] = (6.0 * xyz[corner] + C[corner]) / 8.0
+
+        keep = self.keep
+        vpts[keep] = xyz[keep]
+
+        return np.concatenate((vpts, epts, fpts))
+
+
+def _smooth(level, xyz):
+    """Compute the vertex coordinates of the next level from the coordinates of this level."""
+    return _Stencil(level).apply(xyz)
+
+
+def _subdivide_level(level, xyz, k):
+    for _ in range(k):
+        xyz = _smooth(level, xyz)
+        level = _refine(level)
+    return level, xyz
+
+
+def _limit(level, xyz):
+    """Project the vertices of an all-quad level onto the limit surface."""
+    nv = len(level.vid)
+    fc, j, _ = level.face_corners()
+    fvl = level.vertex_index(level.fv)
+    evl = level.vertex_index(level.ev)
+    a = evl[:, 0]
+    b = evl[:, 1]
+    eb = level.eb
+
+    ends = np.concatenate((a, b))
+    valence = np.bincount(ends, minlength=nv)
+    n = valence[:, None].astype(float)
+    E = _bincount3(ends, np.concatenate((xyz[b], xyz[a])), nv)
+    diagonal = fvl[level.fo[fc] + (j + 2) % 4]
+    F = _bincount3(fvl, xyz[diagonal], nv)
+    limit = (n * n * xyz + 4.0 * E + F) / np.maximum(n * (n + 5.0), 1.0)
+
+    creases = np.bincount(ends, weights=np.concatenate((eb, eb)), minlength=nv)
+    C = _bincount3(np.concatenate((a[eb], b[eb])), np.concatenate((xyz[b][eb], xyz[a][eb])), nv)
+    corner = creases == 2
+    limit[corner] = (4.0 * xyz[corner] + C[corner]) / 6.0
+
+    keep = level.vfix | (creases > 2) | (valence == 0)
+    limit[keep] = xyz[keep]
+    return limit
+
+
+def _emit(level, faces, refined):
+    """Faces of a level as quads, or as polygons that include the edge points of their refined neighbours."""
+    fn = level.fn
+    fel = level.edge_index(level.fe)
+    split = np.zeros(len(level.eid), dtype=bool)
+    split[fel[np.repeat(refined, fn)]] = True
+
+    corners = level.fv.reshape(-1, 4)
+    edges = level.fe.reshape(-1, 4)
+    hanging = split[fel].reshape(-1, 4)
+    transition = faces & hanging.any(axis=1)
+
+    polygons = []
+    for f in np.nonzero(transition)[0]:
+        polygon = []
+        for key, edge, hang in zip(corners[f].tolist(), edges[f].tolist(), hanging[f].tolist()):
+            polygon.append(key)
+            if hang:
+                polygon.append(level.V + edge)
+        polygons.append(polygon)
+    return corners[faces & ~transition], polygons
+
+
+def _adaptive(level, xyz, k, min_level, refine):
+    keys = []
+    points = []
+    quads = []
+    polygons = []
+    blocked = np.zeros(len(level.fid), dtype=bool)
+
+    for L in range(k + 1):
+        smoothed = _smooth(level, xyz) if L < k else None
+
+        candidates = level.own & ~blocked
+        if L == k:
+            targets = np.zeros(len(level.fid), dtype=bool)
+        elif L < min_level:
+            targets = candidates
+        else:
+            targets = candidates & refine(level, xyz, smoothed)
+
+        emitted = level.own & ~targets
+        if np.any(emitted):
+            a, b = _emit(level, emitted, targets)
+            quads.append(a)
+            polygons.extend(b)
+            vertices = np.unique(level.vertex_index(level.fv[np.repeat(emitted, level.fn)]))
+            keys.append(level.vid[vertices])
+            points.append(_limit(level, xyz)[vertices])
+
+        if not np.any(targets):
+            break
+
+        # faces next to coarser faces are refined at most once more
+        blocked = targets & _touching(level, ~targets)
+
+        selection = np.nonzero(targets | _touching(level, targets))[0]
+        vid = np.concatenate((level.vid, level.V + level.eid, level.V + level.E + level.fid))
+        level = _refine(_sublevel(level, selection, targets[selection]))
+        blocked = np.repeat(blocked[selection], 4)
+        xyz = smoothed[np.searchsorted(vid, level.vid)]
+
+    keys, index = np.unique(np.concatenate(keys), return_index=True)
+    xyz = np.concatenate(points)[index]
+    faces = np.searchsorted(keys, np.concatenate(quads)).tolist()
+    faces += [np.searchsorted(keys, polygon).tolist() for polygon in polygons]
+    return xyz, faces
+
+
+# ==============================================================================
+# partitioning
+# ==============================================================================
+
+
+def _face_centroids(level, xyz):
+    fn = level.fn
+    fc = np.repeat(np.arange(len(fn)), fn)
+    return _bincount3(fc, xyz[level.vertex_index(level.fv)], len(fn)) / fn[:, None]
+
+
+def _partition(points, parts):
+    """Split points into spatially coherent groups by recursive coordinate bisection."""
+    groups = []
+    stack = [(np.arange(len(points)), parts)]
+    while stack:
+        index, n = stack.pop()
+        if n == 1 or len(index) < 2:
+            groups.append(np.sort(index))
+            continue
+        pts = points[index]
+        axis = np.argmax(pts.max(axis=0) - pts.min(axis=0))
+        order = index[np.argsort(pts[:, axis], kind='mergesort')]
+        n1 = n // 2
+        cut = len(order) * n1 // n
+        stack.append((order[cut:], n - n1))
+        stack.append((order[:cut], n1))
+    return [group for group in groups if len(group)]
+
+
+def _halo(level, faces):
+    """Extend a selection of faces with all faces sharing a vertex with it."""
+    fn = level.fn
+    selected = np.zeros(len(fn), dtype=bool)
+    selected[faces] = True
+    return np.nonzero(_touching(level, selected))[0]
+
+
+def _touching(level, selected):
+    """Mark the faces sharing a vertex with a selection of faces."""
+    fn = level.fn
+    fvl = level.vertex_index(level.fv)
+    mark = np.zeros(len(level.vid), dtype=bool)
+    mark[fvl[np.repeat(selected, fn)]] = True
+    return np.bincount(np.repeat(np.arange(len(fn)), fn), weights=mark[fvl], minlength=len(fn)) > 0
+
+
+def _patch(level, xyz, faces):
+    extended = _halo(level, faces)
+    own = np.zeros(len(extended), dtype=bool)
+    own[np.searchsorted(extended, faces)] = True
+    sub = _sublevel(level, extended, own)
+    return sub, xyz[sub.vid]
+
+
+def _subdivide_patch(args):
+    level, xyz, k = args
+    level, xyz = _subdivide_level(level, xyz, k)
+    fv = level.fv.reshape(-1, 4)[level.own]
+    vid = np.unique(fv)
+    return vid, xyz[level.vertex_index(vid)], level.fid[level.own], fv
+
+
+def _subdivide_patches(level, xyz, k, parts, workers=None):
+    groups = _partition(_face_centroids(level, xyz), parts)
+    jobs = (_patch(level, xyz, faces) + (k, ) for faces in groups)
+    if workers and workers > 1:
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # keep a bounded number of patches in flight
+            futures = deque()
+            for job in jobs:
+                futures.append(executor.submit(_subdivide_patch, job))
+                if len(futures) > workers:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+    else:
+        for job in jobs:
+            yield _subdivide_patch(job)
+
+
+class _Chunks(object):
+
+    def __init__(self, vertices, faces, k, fixed, chunk_size, workers):
+        self.xyz = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        self.level = _coarse_level(len(self.xyz), faces, fixed)
+        self.k = k
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.number_of_vertices, self.number_of_faces = _totals(self.level, k)
+
+    def __iter__(self):
+        level, xyz = self.level, self.xyz
+        isolated = np.setdiff1d(level.vid, level.fv)
+        if len(isolated):
+            yield isolated, xyz[isolated], np.empty((0, 4), dtype=np.int64)
+        if self.k == 0:
+            yield level.vid, xyz, _faces_array(level)
+            return
+        parts = max(1, -(-self.number_of_faces // self.chunk_size))
+        parts = min(parts, level.F)
+        for vid, pts, _, fv in _subdivide_patches(level, xyz, self.k, parts, self.workers):
+            yield vid, pts, fv
+
+
+# ==============================================================================
+# subdivision
+# ==============================================================================
+
+
+def _totals(level, k):
+    V, E, F, S = level.V, level.E, level.F, level.S
+    for _ in range(k):
+        V, E, F, S = V + E + F, 2 * E + S, S, 4 * S
+    return V, F
+
+
+def _faces_array(level):
+    fn = level.fn
+    if not len(fn):
+        return np.empty((0, 4), dtype=np.int32)
+    if np.all(fn == 4):
+        return level.fv.reshape(-1, 4).astype(np.int32)
+    faces = np.full((len(fn), max(4, fn.max())), -1, dtype=np.int32)
+    faces[np.arange(faces.shape[1]) < fn[:, None]] = level.fv
+    return faces
+
+
+class SubdivisionOperator(object):
+    """Catmull-Clark subdivision of a fixed topology, for any coordinates of its vertices.
+
+    The topology of all levels is computed once, applying the operator only computes coordinates.
+    The result is the same as the one of :func:`mesh_subdivide_catmullclark_numpy`.
+
+    Parameters
+    ----------
+    number_of_vertices : int
+        The number of vertices.
+    faces : list
+        Faces as lists of vertex indices.
+    k : int, optional
+        The number of levels of subdivision.
+    fixed : list, optional
+        Indices of vertices that should not move.
+
+    Attributes
+    ----------
+    faces : :class:`numpy.ndarray`
+        The vertex indices of the faces of the subdivided mesh as a (F, 4) array of 32 bit integers,
+        padded with ``-1`` if ``k`` is zero.
+
+    Examples
+    --------
+    >>> operator = SubdivisionOperator(4, [[0, 1, 2, 3]], k=2)
+    >>> xyz, faces = operator.apply([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]])
+    >>> xyz.shape, faces.shape
+    ((25, 3), (16, 4))
+
+    """
+
+    def __init__(self, number_of_vertices, faces, k=1, fixed=None):
+        self.k = k
+        level = _coarse_level(number_of_vertices, faces, fixed)
+        self.number_of_vertices = number_of_vertices
+        self.stencils = []
+        for _ in range(k):
+            self.stencils.append(_Stencil(level))
+            level = _refine(level)
+        self.faces = _faces_array(level)
+
+    @property
+    def number_of_subdivided_vertices(self):
+        if not self.stencils:
+            return self.number_of_vertices
+        stencil = self.stencils[-1]
+        return stencil.nv + stencil.ne + stencil.nf
+
+    def apply(self, vertices, dtype=float):
+        """Subdivide the mesh with the given vertex coordinates.
+
+        Parameters
+        ----------
+        vertices : array-like
+            XYZ coordinates of the vertices.
+        dtype : numpy.dtype, optional
+            The type of the returned vertex coordinates.
+
+        Returns
+        -------
+        tuple
+            The vertex coordinates as a (V, 3) array and the faces, see :attr:`faces`.
+
+        """
+        xyz = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        if len(xyz) != self.number_of_vertices:
+            raise ValueError('Expected {} vertices, got {}.'.format(self.number_of_vertices, len(xyz)))
+        for stencil in self.stencils:
+            xyz = stencil.apply(xyz)
+        return xyz.astype(dtype, copy=False), self.faces
+
+
+def mesh_subdivide_catmullclark_numpy(vertices, faces, k=1, fixed=None, workers=None, dtype=float):
+    """Subdivide a mesh given as vertices and faces with the Catmull-Clark scheme.
+
+    Parameters
+    ----------
+    vertices : array-like
+        XYZ coordinates of the vertices.
+    faces : list
+        Faces as lists of vertex indices.
+    k : int, optional
+        The number of levels of subdivision.
+    fixed : list, optional
+        Indices of vertices that should not move.
+    workers : int, optional
+        The number of processes used for subdividing the mesh.
+        The mesh is partitioned into spatially coherent patches, which are subdivided independently,
+        together with the ring of faces around them, and stitched back together.
+    dtype : numpy.dtype, optional
+        The type of the returned vertex coordinates.
+
+    Returns
+    -------
+    tuple
+        The vertex coordinates as a (V, 3) array,
+        and the vertex indices of the faces as a (F, 4) array of 32 bit integers.
+        Faces with less than four vertices, which only exist if ``k`` is zero, are padded with ``-1``.
+
+    Notes
+    -----
+    All boundary edges are treated as infinitely sharp creases,
+    like the boundaries of a skeleton are in :meth:`compas_skeleton.datastructure.Skeleton.to_mesh`.
+    The result does not depend on the number of workers.
+
+    Examples
+    --------
+    >>> vertices = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+    >>> xyz, faces = mesh_subdivide_catmullclark_numpy(vertices, [[0, 1, 2, 3]], k=2)
+    >>> xyz.shape, faces.shape
+    ((25, 3), (16, 4))
+
+    """
+    xyz = np.asarray(vertices, dtype=float).reshape(-1, 3)
+    level = _coarse_level(len(xyz), faces, fixed)
+    if k == 0:
+        return xyz.astype(dtype), _faces_array(level)
+
+    V, F = _totals(level, k)
+    out_xyz = np.empty((V, 3), dtype=dtype)
+    out_xyz[:len(xyz)] = xyz
+    out_faces = np.empty((F, 4), dtype=np.int32)
+
+    parts = workers if workers and workers > 1 else 1
+    for vid, pts, fid, fv in _subdivide_patches(level, xyz, k, parts, workers):
+        out_xyz[vid] = pts
+        out_faces[fid] = fv
+
+    return out_xyz, out_faces
+
+
+def mesh_subdivide_catmullclark_chunks_numpy(vertices, faces, k=1, fixed=None, chunk_size=100000, workers=None):
+    """Subdivide a mesh given as vertices and faces with the Catmull-Clark scheme, one patch at a time.
+
+    Parameters
+    ----------
+    vertices : array-like
+        XYZ coordinates of the vertices.
+    faces : list
+        Faces as lists of vertex indices.
+    k : int, optional
+        The number of levels of subdivision.
+    fixed : list, optional
+        Indices of vertices that should not move.
+    chunk_size : int, optional
+        The approximate number of subdivided faces per chunk.
+        Chunks are never smaller than the subdivision of a single face.
+    workers : int, optional
+        The number of processes subdividing patches ahead of the consumer.
+
+    Returns
+    -------
+    iterable
+        The chunks as tuples of vertex indices, vertex coordinates and faces.
+        The faces refer to the vertex indices of the complete subdivided mesh,
+        and all vertices of the faces of a chunk are part of the chunk.
+        Vertices on the boundary of a patch are part of more than one chunk.
+        The iterable has the attributes ``number_of_vertices`` and ``number_of_faces``
+        of the complete subdivided mesh.
+
+    Examples
+    --------
+    >>> vertices = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0], [2, 1, 0]]
+    >>> chunks = mesh_subdivide_catmullclark_chunks_numpy(vertices, [[0, 1, 2, 3], [1, 4, 5, 2]], k=2, chunk_size=16)
+    >>> chunks.number_of_faces
+    32
+    >>> [len(faces) for vertices, xyz, faces in chunks]
+    [16, 16]
+
+    """
+    return _Chunks(vertices, faces, k, fixed, chunk_size, workers)
+
+
+def mesh_subdivide_catmullclark_adaptive_numpy(vertices, faces, k=1, fixed=None, min_level=1, features=None, radius=0.0, tolerance=None):
+    """Subdivide a mesh given as vertices and faces with the Catmull-Clark scheme,
+    refining only where the surface needs it.
+
+    Parameters
+    ----------
+    vertices : array-like
+        XYZ coordinates of the vertices.
+    faces : list
+        Faces as lists of vertex indices.
+    k : int, optional
+        The highest level of subdivision.
+    fixed : list, optional
+        Indices of vertices that should not move.
+    min_level : int, optional
+        The level to which all faces are subdivided.
+    features : array-like, optional
+        XYZ coordinates of points around which faces are subdivided up to the highest level.
+    radius : float, optional
+        Faces with a vertex within this distance of a feature are subdivided up to the highest level.
+    tolerance : float, optional
+        Faces are subdivided further as long as a further subdivision moves one of their vertices
+        by more than this distance.
+
+    Returns
+    -------
+    tuple
+        The vertex coordinates as a (V, 3) array and the faces as lists of vertex indices.
+
+    Notes
+    -----
+    Neighbouring faces differ by at most one level of subdivision.
+    The faces of the coarser level include the vertex splitting their edge on the side of the finer level,
+    so that the mesh has no cracks, and all vertices are placed on the limit surface.
+
+    Examples
+    --------
+    >>> vertices = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0], [2, 1, 0]]
+    >>> xyz, faces = mesh_subdivide_catmullclark_adaptive_numpy(vertices, [[0, 1, 2, 3], [1, 4, 5, 2]], k=3, features=[[0, 0, 0]], radius=0.3)
+    >>> len(faces) < 2 * 4 ** 3
+    True
+
+    """
+    xyz = np.asarray(vertices, dtype=float).reshape(-1, 3)
+    level = _coarse_level(len(xyz), faces, fixed)
+    if k == 0:
+        return xyz.copy(), [face[:] for face in faces]
+
+    tree = None
+    if features is not None and len(features):
+        from scipy.spatial import cKDTree
+        tree = cKDTree(np.asarray(features, dtype=float).reshape(-1, 3))
+
+    def refine(level, xyz, smoothed):
+        flags = np.zeros(len(level.fid), dtype=bool)
+        if tree is not None:
+            distances, _ = tree.query(xyz)
+            near = distances <= radius
+            flags |= np.bincount(np.repeat(np.arange(len(level.fid)), level.fn), weights=near[level.vertex_index(level.fv)]) > 0
+        if tolerance is not None:
+            moved = np.linalg.norm(smoothed[:len(xyz)] - xyz, axis=1) > tolerance
+            flags |= np.bincount(np.repeat(np.arange(len(level.fid)), level.fn), weights=moved[level.vertex_index(level.fv)]) > 0
+        return flags
+
+    return _adaptive(level, xyz, k, max(1, min_level), refine)
@@ -0,0 +1,312 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+from .subdivision_numpy import SubdivisionOperator
+from .subdivision_numpy import _Stencil
+
+
+__all__ = [
+    'SubdivisionSweep',
+]
+
+
+ALIGNMENT = 64
+
+# the operator of a worker process, attached to the shared block of the sweep
+_WORKER = {}
+
+
+# ==============================================================================
+# shared blocks
+# ==============================================================================
+
+
+def _attach(name):
+    """Attach to a shared memory block created by the sweep, which also removes it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # the workers share the resource tracker of the sweep, which unregisters the block when removing it
+        return shared_memory.SharedMemory(name=name)
+
+
+class _SharedArray(object):
+    """The array interface of a shared block, keeping the block mapped as long as arrays of it exist."""
+
+    def __init__(self, block, shape, dtype):
+        self.block = block
+        self.__array_interface__ = np.ndarray(shape, dtype=dtype, buffer=block.buf).__array_interface__
+
+
+def _pack(arrays):
+    """Copy named arrays into one shared block, return the block and the index of the arrays in it."""
+    index = []
+    size = 0
+    for name, array in arrays:
+        size = -(-size // ALIGNMENT) * ALIGNMENT
+        index.append((name, array.dtype.str, array.shape, size))
+        size += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (name, dtype, shape, offset), (_, array) in zip(index, arrays):
+        np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = array
+    return block, index
+
+
+def _unpack(block, index):
+    return {name: np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset) for name, dtype, shape, offset in index}
+
+
+def _operator_arrays(operator):
+    """The arrays and the scalars of a subdivision operator."""
+    arrays = [('faces', operator.faces)]
+    scalars = {'k': operator.k, 'number_of_vertices': operator.number_of_vertices, 'stencils': []}
+    for i, stencil in enumerate(operator.stencils):
+        values = {}
+        for name, value in vars(stencil).items():
+            if isinstance(value, np.ndarray):
+                arrays.append(('{}.{}'.format(i, name), value))
+            else:
+                values[name] = value
+        scalars['stencils'].append(values)
+    return arrays, scalars
+
+
+def _operator_from_arrays(arrays, scalars):
+    """Reconstruct a subdivision operator of which the arrays are views, for example of a shared block."""
+    operator = SubdivisionOperator.__new__(SubdivisionOperator)
+    operator.k = scalars['k']
+    operator.number_of_vertices = scalars['number_of_vertices']
+    operator.faces = arrays['faces']
+    operator.stencils = []
+    for i, values in enumerate(scalars['stencils']):
+        stencil = _Stencil.__new__(_Stencil)
+        stencil.__dict__.update(values)
+        prefix = '{}.'.format(i)
+        stencil.__dict__.update({name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)})
+        operator.stencils.append(stencil)
+    return operator
+
+
+# ==============================================================================
+# workers
+# ==============================================================================
+
+
+def _coordinates(skeleton, variant):
+    """The coarse vertex coordinates of a variant of a skeleton."""
+    if isinstance(variant, dict) or callable(variant):
+        fork = skeleton.fork()
+        if callable(variant):
+            variant(fork)
+        else:
+            fork.attributes.update(variant)
+            fork.update_mesh_vertices_pos()
+        variant = fork.vertices_attributes('xyz')
+    xyz = np.asarray(variant, dtype=float).reshape(-1, 3)
+    if len(xyz) != skeleton.number_of_vertices():
+        raise ValueError('A variant has to keep the topology of the skeleton: expected {} vertices, got {}.'.format(
+            skeleton.number_of_vertices(), len(xyz)))
+    return xyz
+
+
+def _init_worker(name, index, scalars, skeleton):
+    block = _attach(name)
+    _WORKER['block'] = block
+    _WORKER['operator'] = _operator_from_arrays(_unpack(block, index), scalars)
+    _WORKER['skeleton'] = skeleton
+
+
+def _subdivide(variants, inputs, outputs, start, stop):
+    """Subdivide the variants of a range, given as such or as coordinates in a shared block,
+    and write the results to a shared block."""
+    operator = _WORKER['operator']
+    blocks = [_attach(outputs[0])]
+    try:
+        out = np.ndarray(outputs[2], dtype=outputs[1], buffer=blocks[0].buf)
+        if variants is None:
+            blocks.append(_attach(inputs[0]))
+            xyz = np.ndarray(inputs[2], dtype=inputs[1], buffer=blocks[1].buf)
+            for i in range(start, stop):
+                out[i] = operator.apply(xyz[i])[0]
+            del xyz
+        else:
+            for i, variant in zip(range(start, stop), variants):
+                out[i] = operator.apply(_coordinates(_WORKER['skeleton'], variant))[0]
+        del out
+    finally:
+        for block in blocks:
+            block.close()
+
+
+# ==============================================================================
+# sweep
+# ==============================================================================
+
+
+class SubdivisionSweep(object):
+    """Subdivide many variants of a skeleton with the same topology in a pool of processes.
+
+    The subdivision operator of the skeleton is copied once into a shared memory block,
+    to which the worker processes attach without copying it.
+    Every worker receives the coarse skeleton once, and computes the coarse coordinates of the variants it is given,
+    or reads them from a shared input block. The workers write the subdivided coordinates
+    into a preallocated shared output block, so that no mesh is pickled.
+
+    Parameters
+    ----------
+    skeleton : :class:`compas_skeleton.datastructure.Skeleton`
+        The skeleton.
+    sub_level : int, optional
+        The subdivision level, the level of the skeleton by default.
+    workers : int, optional
+        The number of processes, the number of CPUs by default.
+        With one worker, the variants are subdivided in the current process.
+
+    Notes
+    -----
+    The arrays returned by :meth:`run` are the shared output blocks of the workers,
+    which are released when the arrays are deleted.
+
+    Examples
+    --------
+    >>> with SubdivisionSweep(skeleton, sub_level=3, workers=8) as sweep:
+    >>>     vertices, faces = sweep.run([{'node_width': width} for width in widths])
+    >>>     vertices.shape
+    (len(widths), V, 3)
+    """
+
+    def __init__(self, skeleton, sub_level=None, workers=None):
+        if shared_memory is None:
+            raise RuntimeError('Subdivision sweeps need the shared memory of Python 3.8 or later.')
+        if sub_level is None:
+            sub_level = skeleton.attributes['sub_level']
+        self.skeleton = skeleton
+        self.workers = workers or os.cpu_count() or 1
+        vertices, faces, corners = skeleton._subdivision_arrays()
+        self.operator = skeleton._subdivision_operator(sub_level, faces, corners)
+        self.faces = self.operator.faces
+        self._blocks = []
+        self._executor = None
+
+        if self.workers > 1:
+            arrays, scalars = _operator_arrays(self.operator)
+            block, index = _pack(arrays)
+            self._blocks.append(block)
+            # the workers receive the coarse skeleton without its operators and history
+            coarse = skeleton.fork()
+            coarse._operators = OrderedDict()
+            coarse.history = None
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(block.name, index, scalars, coarse))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Shut the workers down and release the shared memory."""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def coordinates(self, variant):
+        """The coarse vertex coordinates of a variant.
+
+        Parameters
+        ----------
+        variant : dict or callable or array-like
+            Skeleton attributes such as ``node_width``, ``leaf_width`` and ``leaf_extend``,
+            or a function modifying a fork of the skeleton, see :meth:`compas_skeleton.datastructure.Skeleton.fork`,
+            without changing its topology, or the coordinates of the vertices.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            A (V, 3) array.
+
+        """
+        return _coordinates(self.skeleton, variant)
+
+    def run(self, variants, dtype=float):
+        """Subdivide variants of the skeleton.
+
+        Parameters
+        ----------
+        variants : list or :class:`numpy.ndarray`
+            The variants, see :meth:`coordinates`, or their coordinates as a (N, V, 3) array.
+            The coordinates of attributes and functions are computed by the workers,
+            functions therefore have to be defined at the top level of a module.
+        dtype : numpy.dtype, optional
+            The type of the subdivided coordinates.
+
+        Returns
+        -------
+        tuple
+            The subdivided coordinates of the variants as a (N, V, 3) array,
+            and the faces shared by all variants as a (F, 4) array.
+
+        """
+        arrays = isinstance(variants, np.ndarray)
+        if arrays:
+            xyz = variants.astype(float, copy=False).reshape(len(variants), -1, 3)
+            if xyz.shape[1] != self.operator.number_of_vertices:
+                raise ValueError('Expected {} vertices per variant, got {}.'.format(self.operator.number_of_vertices, xyz.shape[1]))
+        else:
+            variants = list(variants)
+        count = len(variants)
+        shape = (count, self.operator.number_of_subdivided_vertices, 3)
+        dtype = np.dtype(dtype)
+
+        if not self._executor:
+            out = np.empty(shape, dtype=dtype)
+            for i in range(count):
+                out[i] = self.operator.apply(xyz[i] if arrays else self.coordinates(variants[i]))[0]
+            return out, self.faces
+
+        inputs = None
+        if arrays:
+            inputs, _ = _pack([('xyz', xyz)])
+        outputs = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        futures = []
+        try:
+            step = max(1, -(-count // (4 * self.workers)))
+            for start in range(0, count, step):
+                stop = min(start + step, count)
+                futures.append(self._executor.submit(
+                    _subdivide,
+                    None if arrays else variants[start:stop],
+                    (inputs.name, xyz.dtype.str, xyz.shape) if arrays else None,
+                    (outputs.name, dtype.str, shape),
+                    start, stop))
+            for future in futures:
+                future.result()
+        except BaseException:
+            # the blocks which did not start are cancelled, and the output is not returned
+            for future in futures:
+                future.cancel()
+            outputs.close()
+            raise
+        finally:
+            # the workers are done with the blocks, the output stays mapped until its arrays are deleted
+            if inputs:
+                inputs.close()
+                inputs.unlink()
+            outputs.unlink()
+        return np.asarray(_SharedArray(outputs, shape, dtype)), self.faces
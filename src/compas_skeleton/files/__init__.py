@@ -0,0 +1,95 @@
+"""
+********************************************************************************
+compas_skeleton.files
+********************************************************************************
+
+.. currentmodule:: compas_skeleton.files
+
+Writers
+=======
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    array_chunks
+    write_chunks
+    write_obj
+    write_ply
+    write_stl
+
+JSON
+====
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    json_dump_mesh
+    json_load_mesh
+
+Archives
+========
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    SkeletonArchive
+    read_skeleton_npz
+    write_skeleton_npz
+    read_skeleton3d_npz
+    write_skeleton3d_npz
+
+Caches
+======
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    SubdivisionCache
+
+"""
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import division
+
+import compas
+
+from .jsonstream import json_dump_mesh  # noqa: F401
+from .jsonstream import json_load_mesh  # noqa: F401
+
+if not compas.IPY:
+    from .writers import array_chunks  # noqa: F401
+    from .writers import write_chunks  # noqa: F401
+    from .writers import write_obj  # noqa: F401
+    from .writers import write_ply  # noqa: F401
+    from .writers import write_stl  # noqa: F401
+    from .npz import SkeletonArchive  # noqa: F401
+    from .npz import read_skeleton_npz  # noqa: F401
+    from .npz import write_skeleton_npz  # noqa: F401
+    from .npz import read_skeleton3d_npz  # noqa: F401
+    from .npz import write_skeleton3d_npz  # noqa: F401
+    from .cache import SubdivisionCache  # noqa: F401
+
+
+__all__ = [
+    'json_dump_mesh',
+    'json_load_mesh'
+]
+
+if not compas.IPY:
+    __all__ += [
+        'array_chunks',
+        'write_chunks',
+        'write_obj',
+        'write_ply',
+        'write_stl',
+        'SkeletonArchive',
+        'read_skeleton_npz',
+        'write_skeleton_npz',
+        'read_skeleton3d_npz',
+        'write_skeleton3d_npz',
+        'SubdivisionCache'
+    ]
@@ -0,0 +1,204 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+__all__ = [
+    'SubdivisionCache',
+]
+
+
+CACHE_VERSION = 1
+
+XYZ = 'xyz.npy'
+FACES = 'faces.npy'
+
+
+def _is_entry(name):
+    return len(name) == 64 and all(c in '0123456789abcdef' for c in name)
+
+
+class SubdivisionCache(object):
+    """A persistent, content addressed cache of subdivided meshes in a directory.
+
+    Every entry is a directory named after the hash of the subdivision input,
+    holding the vertices and the faces as ``.npy`` files which are memory mapped when read.
+    Several processes can share a cache directory: entries are written to a temporary directory
+    and renamed into place, and evicted by renaming them out of place before removing them,
+    so that an entry is either complete or absent.
+
+    Parameters
+    ----------
+    path : str
+        The cache directory, created if it does not exist.
+    max_size : int, optional
+        The size of the cache in bytes. When it is exceeded,
+        the least recently used entries are removed. Unlimited by default.
+
+    Examples
+    --------
+    >>> from compas_skeleton.datastructure import Skeleton
+    >>> skeleton = Skeleton.from_skeleton_lines([([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]), ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0])])
+    >>> cache = SubdivisionCache('~/.cache/compas_skeleton', max_size=2 ** 30)  # doctest: +SKIP
+    >>> vertices, faces = skeleton.to_arrays(sub_level=4, cache=cache)  # doctest: +SKIP
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.max_size = max_size
+        try:
+            os.makedirs(self.path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    @staticmethod
+    def key(vertices, faces, fixed, k):
+        """Compute the key of a subdivision input.
+
+        Parameters
+        ----------
+        vertices : array-like
+            XYZ coordinates of the vertices.
+        faces : list
+            The vertex indices of the faces.
+        fixed : list
+            The indices of the fixed vertices.
+        k : int
+            The number of subdivisions.
+
+        Returns
+        -------
+        str
+            The SHA-256 hex digest of the input.
+
+        """
+        h = hashlib.sha256()
+        h.update('{}:{}:'.format(CACHE_VERSION, k).encode('ascii'))
+        h.update(np.ascontiguousarray(vertices, dtype='<f8').tobytes())
+        h.update(np.array([len(face) for face in faces], dtype='<i8').tobytes())
+        h.update(np.fromiter((key for face in faces for key in face), dtype='<i8').tobytes())
+        h.update(b':')
+        h.update(np.array(sorted(fixed or []), dtype='<i8').tobytes())
+        return h.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.path, key)
+
+    def __contains__(self, key):
+        return os.path.isdir(self._entry(key))
+
+    def get(self, key):
+        """Memory map the vertices and faces of an entry.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+
+        Returns
+        -------
+        tuple or None
+            Read only memory maps of the vertices and the faces, or None if the cache has no such entry.
+
+        """
+        entry = self._entry(key)
+        try:
+            xyz = np.load(os.path.join(entry, XYZ), mmap_mode='r')
+            faces = np.load(os.path.join(entry, FACES), mmap_mode='r')
+            os.utime(entry, None)
+        except (IOError, OSError):
+            return None
+        return xyz, faces
+
+    def put(self, key, xyz, faces):
+        """Add an entry to the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+        xyz : :class:`numpy.ndarray`
+            The vertices.
+        faces : :class:`numpy.ndarray`
+            The faces.
+
+        """
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        temp = tempfile.mkdtemp(prefix='.tmp-', dir=self.path)
+        try:
+            np.save(os.path.join(temp, XYZ), np.asarray(xyz))
+            np.save(os.path.join(temp, FACES), np.asarray(faces))
+            try:
+                os.rename(temp, entry)
+            except OSError:
+                # another process added the entry first
+                pass
+        finally:
+            if os.path.isdir(temp):
+                shutil.rmtree(temp, ignore_errors=True)
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def entries(self):
+        """The entries of the cache, from the least to the most recently used.
+
+        Returns
+        -------
+        list
+            Tuples of key, time of last use and size in bytes.
+
+        """
+        entries = []
+        for name in os.listdir(self.path):
+            if not _is_entry(name):
+                continue
+            entry = self._entry(name)
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, filename)) for filename in (XYZ, FACES))
+                entries.append((name, os.path.getmtime(entry), size))
+            except OSError:
+                continue
+        entries.sort(key=lambda entry: entry[1])
+        return entries
+
+    def size(self):
+        """The total size of the entries in bytes."""
+        return sum(size for _, _, size in self.entries())
+
+    def evict(self, max_size=0):
+        """Remove the least recently used entries until the cache fits in a size.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            The size in bytes, zero by default, which clears the cache.
+
+        """
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if total <= max_size:
+                break
+            trash = os.path.join(self.path, '.del-{}-{}'.format(key, os.getpid()))
+            try:
+                os.rename(self._entry(key), trash)
+            except OSError:
+                # removed by another process
+                continue
+            shutil.rmtree(trash, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        self.evict(0)
@@ -0,0 +1,351 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import re
+from ast import literal_eval
+from itertools import islice
+
+try:
+    from compas.data import DataDecoder
+    from compas.data import DataEncoder
+except ImportError:
+    from compas.utilities import DataDecoder
+    from compas.utilities import DataEncoder
+
+
+__all__ = [
+    'json_dump_mesh',
+    'json_load_mesh',
+]
+
+
+BLOCK_SIZE = 65536
+BATCH_SIZE = 1024
+INDENT = 4
+
+STREAMED = ('vertex', 'face', 'facedata', 'edgedata')
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _open(object):
+    """Open a path, or use a file-like object as it is."""
+
+    def __init__(self, fp, mode):
+        self.fp = fp
+        self.mode = mode
+        self.f = None
+
+    def __enter__(self):
+        if hasattr(self.fp, 'read') or hasattr(self.fp, 'write'):
+            return self.fp
+        self.f = open(self.fp, self.mode)
+        return self.f
+
+    def __exit__(self, *args):
+        if self.f:
+            self.f.close()
+
+
+# ==============================================================================
+# writer
+# ==============================================================================
+
+
+class _Object(object):
+    """A JSON object of which the members are written one by one, or in batches if they are all plain values."""
+
+    def __init__(self, items, batched=False):
+        self.items = items
+        self.batched = batched
+
+
+def _members(dictionary, sort_keys, batched=False):
+    keys = sorted(dictionary) if sort_keys else dictionary
+    return _Object(((key, dictionary[key]) for key in keys), batched)
+
+
+class _Writer(object):
+    """Buffered writer of JSON objects of which the members are written one by one."""
+
+    def __init__(self, f, pretty):
+        self.f = f
+        self.pretty = pretty
+        if pretty:
+            self.encoder = DataEncoder(sort_keys=True, indent=INDENT)
+        else:
+            self.encoder = DataEncoder()
+        self.parts = []
+        self.size = 0
+
+    def _add(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size > BLOCK_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.f.write(''.join(self.parts))
+        self.parts = []
+        self.size = 0
+
+    def write(self, value, depth=0):
+        if not isinstance(value, _Object):
+            text = self.encoder.encode(value)
+            if self.pretty:
+                text = text.replace('\n', '\n' + ' ' * (INDENT * depth))
+            self._add(text)
+            return
+
+        if value.batched:
+            self._write_batched(value, depth)
+            return
+
+        empty = True
+        self._add('{')
+        for key, item in value.items:
+            if not empty:
+                self._add(',' if self.pretty else ', ')
+            if self.pretty:
+                self._add('\n' + ' ' * (INDENT * (depth + 1)))
+            self._add(json.dumps(str(key)) + ': ')
+            self.write(item, depth + 1)
+            empty = False
+        if self.pretty and not empty:
+            self._add('\n' + ' ' * (INDENT * depth))
+        self._add('}')
+
+    def _write_batched(self, value, depth):
+        # the members of a batch are encoded as one object without its braces
+        empty = True
+        self._add('{')
+        items = iter(value.items)
+        while True:
+            batch = dict(islice(items, BATCH_SIZE))
+            if not batch:
+                break
+            if not empty:
+                self._add(',' if self.pretty else ', ')
+            text = self.encoder.encode(batch)
+            if self.pretty:
+                self._add(text[1:-2].replace('\n', '\n' + ' ' * (INDENT * depth)))
+            else:
+                self._add(text[1:-1])
+            empty = False
+        if self.pretty and not empty:
+            self._add('\n' + ' ' * (INDENT * depth))
+        self._add('}')
+
+
+def json_dump_mesh(mesh, fp, pretty=False):
+    """Write the data of a mesh to a JSON file, one vertex, face or edge at a time.
+
+    Parameters
+    ----------
+    mesh : :class:`compas.datastructures.Mesh`
+        The mesh, for example a skeleton.
+    fp : str or file-like object
+        The path of the file or a writable file-like object.
+    pretty : bool, optional
+        Format the output with sorted keys and indentation.
+
+    Notes
+    -----
+    The output is the same as the one of ``mesh.to_json(fp, pretty)``,
+    but neither the complete data of the vertices, faces and edges nor the complete string are built in memory.
+
+    """
+    data = mesh.data
+    if 'compas' in data:
+        sections = data['data']
+        document = _members(data, pretty)
+        document.items = ((key, _sections(sections, pretty) if key == 'data' else value) for key, value in document.items)
+    else:
+        document = _sections(data, pretty)
+
+    with _open(fp, 'w') as f:
+        writer = _Writer(f, pretty)
+        writer.write(document)
+        writer.flush()
+
+
+def _sections(data, pretty):
+    sections = _members(data, pretty)
+    sections.items = ((key, _members(value, pretty, True) if key in STREAMED else value) for key, value in sections.items)
+    return sections
+
+
+# ==============================================================================
+# reader
+# ==============================================================================
+
+
+class _Reader(object):
+    """Incremental reader of the members of JSON objects."""
+
+    def __init__(self, f):
+        self.f = f
+        self.decoder = DataDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.pos > BLOCK_SIZE:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        block = self.f.read(BLOCK_SIZE)
+        if not block:
+            self.eof = True
+        self.buffer += block
+
+    def _peek(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                raise ValueError('Unexpected end of the JSON document.')
+            self._fill()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError('Expected {!r} at position {} of the JSON document.'.format(char, self.pos))
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # a number at the end of the buffer may continue in the next block
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Iterate over the keys of the next object, the value of every key has to be read before the next one."""
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            char = self._peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError("Expected ',' or '}}' at position {} of the JSON document.".format(self.pos - 1))
+
+
+def json_load_mesh(fp, cls=None):
+    """Construct a mesh from a JSON file, one vertex, face or edge at a time.
+
+    Parameters
+    ----------
+    fp : str or file-like object
+        The path of the file or a readable file-like object.
+    cls : type, optional
+        The mesh class, :class:`compas.datastructures.Mesh` by default.
+
+    Returns
+    -------
+    :class:`compas.datastructures.Mesh`
+
+    Notes
+    -----
+    Both the current data schema of COMPAS and the older one, with the keys ``max_int_key`` and ``max_int_fkey``,
+    are supported. The members of the document can be in any order.
+
+    """
+    if cls is None:
+        from compas.datastructures import Mesh as cls
+
+    mesh = cls()
+    mesh.vertex = {}
+    mesh.face = {}
+    mesh.halfedge = {}
+    mesh.facedata = {}
+    mesh.edgedata = {}
+
+    state = {'vertices': [], 'faces': [], 'max_vertex': -1, 'max_face': -1}
+
+    with _open(fp, 'r') as f:
+        reader = _Reader(f)
+        for key in reader.members():
+            if key == 'data':
+                for name in reader.members():
+                    _read_section(reader, mesh, name, state)
+            else:
+                _read_section(reader, mesh, key, state)
+
+    # restore the order of the vertices if the faces came first
+    if list(mesh.vertex) != state['vertices']:
+        mesh.vertex = {key: mesh.vertex[key] for key in state['vertices']}
+        mesh.halfedge = {key: mesh.halfedge[key] for key in state['vertices']}
+    if list(mesh.facedata) != state['faces']:
+        mesh.facedata = {fkey: mesh.facedata[fkey] for fkey in state['faces']}
+
+    mesh._max_vertex = state['max_vertex']
+    mesh._max_face = state['max_face']
+    return mesh
+
+
+def _read_section(reader, mesh, name, state):
+    if name == 'vertex':
+        for key in reader.members():
+            key = int(key)
+            mesh.add_vertex(key, attr_dict=reader.value())
+            state['vertices'].append(key)
+
+    elif name == 'face':
+        for fkey in reader.members():
+            fkey = int(fkey)
+            vertices = reader.value()
+            for key in vertices:
+                if int(key) not in mesh.vertex:
+                    mesh.add_vertex(int(key))
+            mesh.add_face(vertices, fkey=fkey, attr_dict={})
+            state['faces'].append(fkey)
+
+    elif name == 'facedata':
+        for fkey in reader.members():
+            attr = reader.value()
+            fkey = int(fkey)
+            if attr:
+                mesh.facedata.setdefault(fkey, {}).update(attr)
+
+    elif name == 'edgedata':
+        for edge in reader.members():
+            attr = reader.value()
+            if edge.startswith('('):
+                edge = '-'.join(map(str, sorted(literal_eval(edge))))
+            mesh.edgedata.setdefault(edge, {}).update(attr or {})
+
+    elif name == 'attributes':
+        mesh.attributes.update(reader.value())
+    elif name == 'dva':
+        mesh.default_vertex_attributes.update(reader.value() or {})
+    elif name == 'dea':
+        mesh.default_edge_attributes.update(reader.value() or {})
+    elif name == 'dfa':
+        mesh.default_face_attributes.update(reader.value() or {})
+    elif name in ('max_vertex', 'max_int_key'):
+        state['max_vertex'] = reader.value()
+    elif name in ('max_face', 'max_int_fkey'):
+        state['max_face'] = reader.value()
+    else:
+        reader.value()
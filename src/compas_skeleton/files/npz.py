@@ -0,0 +1,507 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import struct
+import zipfile
+
+import numpy as np
+
+
+__all__ = [
+    'SkeletonArchive',
+    'read_skeleton_npz',
+    'write_skeleton_npz',
+    'read_skeleton3d_npz',
+    'write_skeleton3d_npz',
+]
+
+
+FORMAT_VERSION = 1
+
+HAS_TRANSFORM = 1
+HAS_TYPE = 2
+HAS_NEIGHBORS = 4
+
+NONE_CODE = -1
+ABSENT_CODE = -2
+
+VERTEX_COLUMNS = ('x', 'y', 'z', 'transform', 'type', 'neighbors')
+EDGE_COLUMNS = ('type', )
+XYZ_COLUMNS = ('x', 'y', 'z')
+
+SKELETON3D_PARAMETERS = ('branch_radius', 'section_seg', 'node_radius_fac', 'section_length', 'section_tolerance')
+
+
+class _Absent(object):
+    pass
+
+
+_ABSENT = _Absent()
+
+
+def _codes(values, table):
+    """Encode a list of hashable values as small integers into a growing table."""
+    codes = np.empty(len(values), dtype=np.int8)
+    for i, value in enumerate(values):
+        if value is _ABSENT:
+            codes[i] = ABSENT_CODE
+        elif value is None:
+            codes[i] = NONE_CODE
+        else:
+            if value not in table:
+                table.append(value)
+            codes[i] = table.index(value)
+    return codes
+
+
+def _csr(lists):
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(items) for items in lists])
+    values = np.fromiter((item for items in lists for item in items), dtype=np.int64, count=offsets[-1])
+    return offsets, values
+
+
+def _extra(attr, columns):
+    extra = {name: value for name, value in attr.items() if name not in columns}
+    return extra or None
+
+
+def write_skeleton_npz(path, skeleton):
+    """Write a skeleton to a binary archive of arrays.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file, usually with the extension ``.npz``.
+    skeleton : :class:`compas_skeleton.datastructure.Skeleton`
+        The skeleton.
+
+    Notes
+    -----
+    The archive is an uncompressed numpy ``.npz`` file with one section per array,
+    vertex coordinates, transforms and type codes, the neighbors of the skeleton vertices and the faces
+    in compressed sparse rows, and the edge type codes.
+    The mesh attributes, the default attributes, the type tables and any other vertex, edge or face attributes
+    are stored as JSON in the section ``header``.
+    Because the archive is not compressed, its arrays can be memory mapped by :class:`SkeletonArchive`.
+
+    """
+    keys = list(skeleton.vertices())
+    n = len(keys)
+
+    vertex_types = []
+    edge_types = []
+    header = {
+        'version': FORMAT_VERSION,
+        'datatype': '{}/{}'.format(skeleton.__class__.__module__, skeleton.__class__.__name__),
+        'attributes': skeleton.attributes,
+        'dva': skeleton.default_vertex_attributes,
+        'dea': skeleton.default_edge_attributes,
+        'dfa': skeleton.default_face_attributes,
+        'max_vertex': skeleton._max_vertex,
+        'max_face': skeleton._max_face,
+        'vertex_types': vertex_types,
+        'edge_types': edge_types,
+        'vertex_attributes': {},
+        'edge_attributes': {},
+        'facedata': {},
+    }
+
+    xyz = np.empty((n, 3), dtype=float)
+    transform = np.zeros((n, 3), dtype=float)
+    flags = np.zeros(n, dtype=np.uint8)
+    types = []
+    neighbors = []
+    default = skeleton.default_vertex_attributes
+    for i, key in enumerate(keys):
+        attr = skeleton.vertex[key]
+        xyz[i] = [attr.get(name, default.get(name, 0.0)) for name in 'xyz']
+        if 'transform' in attr:
+            transform[i] = attr['transform']
+            flags[i] |= HAS_TRANSFORM
+        types.append(attr.get('type', _ABSENT))
+        if 'type' in attr:
+            flags[i] |= HAS_TYPE
+        neighbors.append(attr.get('neighbors', []))
+        if 'neighbors' in attr:
+            flags[i] |= HAS_NEIGHBORS
+        extra = _extra(attr, VERTEX_COLUMNS)
+        if extra:
+            header['vertex_attributes'][str(key)] = extra
+
+    fkeys = list(skeleton.faces())
+    face_offsets, face_vertices = _csr([skeleton.face[fkey] for fkey in fkeys])
+    for fkey in fkeys:
+        if skeleton.facedata.get(fkey):
+            header['facedata'][str(fkey)] = skeleton.facedata[fkey]
+
+    edgekeys = list(skeleton.edgedata)
+    edges = np.array([[int(key) for key in edge.split('-')] for edge in edgekeys], dtype=np.int64).reshape(-1, 2)
+    for edge in edgekeys:
+        extra = _extra(skeleton.edgedata[edge], EDGE_COLUMNS)
+        if extra:
+            header['edge_attributes'][edge] = extra
+
+    neighbors_offsets, neighbors = _csr(neighbors)
+    arrays = {
+        'vertex_keys': np.array(keys, dtype=np.int64),
+        'vertex_flags': flags,
+        'xyz': xyz,
+        'transform': transform,
+        'vertex_type': _codes(types, vertex_types),
+        'neighbors_offsets': neighbors_offsets,
+        'neighbors': neighbors,
+        'face_keys': np.array(fkeys, dtype=np.int64),
+        'face_offsets': face_offsets,
+        'face_vertices': face_vertices,
+        'edges': edges,
+        'edge_type': _codes([skeleton.edgedata[edge].get('type', _ABSENT) for edge in edgekeys], edge_types),
+    }
+    # the header is written last, once the type tables are complete
+    arrays['header'] = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+class SkeletonArchive(object):
+    """A skeleton archive opened for reading.
+
+    The header and the topology are read when the archive is opened,
+    the other arrays are memory mapped, or read, the first time they are accessed.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    mmap : bool, optional
+        Memory map the arrays instead of reading them into memory.
+
+    Attributes
+    ----------
+    header : dict
+        The mesh attributes, the default attributes, the type tables and the remaining attributes.
+    attributes : dict
+        The attributes of the skeleton.
+    names : list
+        The names of the arrays of the archive.
+
+    Examples
+    --------
+    >>> from compas_skeleton.datastructure import Skeleton
+    >>> skeleton = Skeleton.from_skeleton_lines([([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]), ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0])])
+    >>> skeleton.to_npz('skeleton.npz')  # doctest: +SKIP
+    >>> with SkeletonArchive('skeleton.npz') as archive:  # doctest: +SKIP
+    ...     xyz = archive['xyz']
+    ...     skeleton = archive.to_skeleton()
+    """
+
+    TOPOLOGY = ('vertex_keys', 'face_keys', 'face_offsets', 'face_vertices')
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        self.mmap = mmap
+        self._zip = zipfile.ZipFile(path)
+        self._arrays = {}
+        self.names = [name[:-4] for name in self._zip.namelist() if name.endswith('.npy')]
+        self.header = json.loads(self._read('header').tobytes().decode('utf-8'))
+        if self.header.get('version', 0) > FORMAT_VERSION:
+            raise ValueError('The archive was written by a newer version: {}'.format(self.header['version']))
+        for name in self.TOPOLOGY:
+            self._arrays[name] = self._read(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        if name not in self._arrays:
+            if name not in self.names:
+                raise KeyError(name)
+            self._arrays[name] = self._memmap(name) if self.mmap else self._read(name)
+        return self._arrays[name]
+
+    @property
+    def attributes(self):
+        return self.header['attributes']
+
+    def close(self):
+        self._arrays = {}
+        self._zip.close()
+
+    def _read(self, name):
+        with self._zip.open(name + '.npy') as f:
+            return np.lib.format.read_array(f)
+
+    def _memmap(self, name):
+        info = self._zip.getinfo(name + '.npy')
+        if info.compress_type != zipfile.ZIP_STORED:
+            return self._read(name)
+
+        with open(self.path, 'rb') as f:
+            f.seek(info.header_offset)
+            local = f.read(30)
+            size, extra = struct.unpack('<HH', local[26:30])
+            f.seek(info.header_offset + 30 + size + extra)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+
+        if not int(np.prod(shape)):
+            return np.empty(shape, dtype=dtype)
+        order = 'F' if fortran_order else 'C'
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape, order=order)
+
+    def faces(self):
+        """The vertex keys of the faces, as lists."""
+        offsets = self['face_offsets'].tolist()
+        vertices = self['face_vertices'].tolist()
+        return [vertices[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def to_skeleton(self, cls=None):
+        """Construct a skeleton from the archive.
+
+        Parameters
+        ----------
+        cls : type, optional
+            The skeleton class, :class:`compas_skeleton.datastructure.Skeleton` by default.
+
+        Returns
+        -------
+        :class:`compas_skeleton.datastructure.Skeleton`
+
+        """
+        if cls is None:
+            from compas_skeleton.datastructure import Skeleton as cls
+
+        header = self.header
+        skeleton = cls()
+        skeleton.attributes.update(header['attributes'])
+        skeleton.default_vertex_attributes.update(header['dva'])
+        skeleton.default_edge_attributes.update(header['dea'])
+        skeleton.default_face_attributes.update(header['dfa'])
+
+        vertex_types = header['vertex_types']
+        extras = header['vertex_attributes']
+        offsets = self['neighbors_offsets'].tolist()
+        neighbors = self['neighbors'].tolist()
+        columns = zip(
+            self['vertex_keys'].tolist(),
+            self['vertex_flags'].tolist(),
+            self['xyz'].tolist(),
+            self['transform'].tolist(),
+            self['vertex_type'].tolist())
+
+        for i, (key, flags, xyz, transform, code) in enumerate(columns):
+            attr = {'x': xyz[0], 'y': xyz[1], 'z': xyz[2]}
+            if flags & HAS_TRANSFORM:
+                attr['transform'] = transform
+            if flags & HAS_TYPE:
+                attr['type'] = None if code == NONE_CODE else vertex_types[code]
+            if flags & HAS_NEIGHBORS:
+                attr['neighbors'] = neighbors[offsets[i]:offsets[i + 1]]
+            attr.update(extras.get(str(key), {}))
+            skeleton.add_vertex(key, attr_dict=attr)
+
+        facedata = header['facedata']
+        for fkey, vertices in zip(self['face_keys'].tolist(), self.faces()):
+            skeleton.add_face(vertices, fkey=fkey, attr_dict=facedata.get(str(fkey)) or {})
+
+        edge_types = header['edge_types']
+        extras = header['edge_attributes']
+        for (u, v), code in zip(self['edges'].tolist(), self['edge_type'].tolist()):
+            edge = '{}-{}'.format(u, v)
+            attr = skeleton.edgedata.setdefault(edge, {})
+            if code != ABSENT_CODE:
+                attr['type'] = None if code == NONE_CODE else edge_types[code]
+            attr.update(extras.get(edge, {}))
+
+        skeleton._max_vertex = header['max_vertex']
+        skeleton._max_face = header['max_face']
+        return skeleton
+
+
+def read_skeleton_npz(path, mmap=True):
+    """Read a skeleton from a binary archive of arrays.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    mmap : bool, optional
+        Memory map the coordinates and transforms instead of reading them into memory.
+
+    Returns
+    -------
+    :class:`compas_skeleton.datastructure.Skeleton`
+
+    """
+    with SkeletonArchive(path, mmap=mmap) as archive:
+        return archive.to_skeleton()
+
+
+# ==============================================================================
+# 3D skeletons
+# ==============================================================================
+
+
+def _xyz(items, header, name):
+    """The coordinates of vertices or nodes, and their other attributes in the section ``name`` of the header."""
+    xyz = np.empty((len(items), 3), dtype=float)
+    for i, (key, attr) in enumerate(items):
+        xyz[i] = [attr[axis] for axis in XYZ_COLUMNS]
+        extra = _extra(attr, XYZ_COLUMNS)
+        if extra:
+            header[name][str(key)] = extra
+    return xyz
+
+
+def write_skeleton3d_npz(path, skeleton):
+    """Write a 3D skeleton, its graph, its parameters and its generated mesh, to a binary archive of arrays.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file, usually with the extension ``.npz``.
+    skeleton : :class:`compas_skeleton.datastructure.Skeleton3D`
+        The 3D skeleton.
+
+    Notes
+    -----
+    The archive has the layout of the archives of :func:`write_skeleton_npz` for the vertices and faces of the mesh,
+    which can therefore be read by :class:`SkeletonArchive`.
+    The node coordinates, the halfbranches as pairs of node keys, the vertex keys of their sections
+    in compressed sparse rows, empty for the halfbranches without sections, the radii of the nodes,
+    the owners of the faces, a node or a branch, the nodes to update, and the branches with their own radius
+    and their radii are stored as arrays.
+    The parameters of the skeleton and the parameters of the generated mesh are stored in the section ``header``.
+
+    """
+    header = {
+        'version': FORMAT_VERSION,
+        'datatype': '{}/{}'.format(skeleton.__class__.__module__, skeleton.__class__.__name__),
+        'attributes': skeleton.attributes,
+        'dva': skeleton.default_vertex_attributes,
+        'dea': skeleton.default_edge_attributes,
+        'dfa': skeleton.default_face_attributes,
+        'max_vertex': skeleton._max_vertex,
+        'max_face': skeleton._max_face,
+        'parameters': {name: getattr(skeleton, name) for name in SKELETON3D_PARAMETERS},
+        'generated': skeleton._parameters,
+        'node_attributes': {},
+        'vertex_attributes': {},
+        'facedata': {},
+    }
+
+    halfbranches = [(u, v) for u in skeleton.halfbranch for v in skeleton.halfbranch[u]]
+    radius_branches = [(u, v) for u, v in skeleton.branches() if (u, v) in skeleton._branches_radius]
+    section_offsets, section_keys = _csr([skeleton.halfbranch[u][v] or [] for u, v in halfbranches])
+
+    fkeys = list(skeleton.faces())
+    face_offsets, face_vertices = _csr([skeleton.face[fkey] for fkey in fkeys])
+    owners = np.full((len(fkeys), 2), -1, dtype=np.int64)
+    for i, fkey in enumerate(fkeys):
+        owner = skeleton._face_owner.get(fkey)
+        if isinstance(owner, tuple):
+            owners[i] = owner
+        elif owner is not None:
+            owners[i, 0] = owner
+        if skeleton.facedata.get(fkey):
+            header['facedata'][str(fkey)] = skeleton.facedata[fkey]
+
+    arrays = {
+        'node_keys': np.array(list(skeleton.node), dtype=np.int64),
+        'node_xyz': _xyz(list(skeleton.node.items()), header, 'node_attributes'),
+        'nodes_radius': np.array(skeleton.nodes_radius, dtype=float),
+        'dirty': np.array(sorted(skeleton._dirty), dtype=np.int64),
+        'halfbranches': np.array(halfbranches, dtype=np.int64).reshape(-1, 2),
+        'section_offsets': section_offsets,
+        'section_keys': section_keys,
+        'radius_branches': np.array(radius_branches, dtype=np.int64).reshape(-1, 2),
+        'branches_radius': np.array(skeleton.branches_radius(radius_branches), dtype=float),
+        'vertex_keys': np.array(list(skeleton.vertices()), dtype=np.int64),
+        'xyz': _xyz(list(skeleton.vertices(True)), header, 'vertex_attributes'),
+        'face_keys': np.array(fkeys, dtype=np.int64),
+        'face_offsets': face_offsets,
+        'face_vertices': face_vertices,
+        'face_owners': owners,
+    }
+    arrays['header'] = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def read_skeleton3d_npz(path, cls=None):
+    """Read a 3D skeleton written by :func:`write_skeleton3d_npz`.
+    The generated mesh is read as such, it is not generated again.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    cls : type, optional
+        The skeleton class, :class:`compas_skeleton.datastructure.Skeleton3D` by default.
+
+    Returns
+    -------
+    :class:`compas_skeleton.datastructure.Skeleton3D`
+
+    """
+    if cls is None:
+        from compas_skeleton.datastructure import Skeleton3D as cls
+
+    with SkeletonArchive(path, mmap=False) as archive:
+        header = archive.header
+        skeleton = cls()
+        skeleton.attributes.update(header['attributes'])
+        skeleton.default_vertex_attributes.update(header['dva'])
+        skeleton.default_edge_attributes.update(header['dea'])
+        skeleton.default_face_attributes.update(header['dfa'])
+        for name, value in header['parameters'].items():
+            setattr(skeleton, name, value)
+        skeleton._parameters = tuple(header['generated']) if header['generated'] is not None else None
+
+        extras = header['node_attributes']
+        for key, xyz in zip(archive['node_keys'].tolist(), archive['node_xyz'].tolist()):
+            skeleton.node[key] = dict(zip(XYZ_COLUMNS, xyz))
+            skeleton.node[key].update(extras.get(str(key), {}))
+            skeleton.halfbranch[key] = {}
+
+        offsets = archive['section_offsets'].tolist()
+        keys = archive['section_keys'].tolist()
+        for i, (u, v) in enumerate(archive['halfbranches'].tolist()):
+            skeleton.halfbranch[u][v] = keys[offsets[i]:offsets[i + 1]] or None
+        if 'radius_branches' in archive:
+            for (u, v), radius in zip(archive['radius_branches'].tolist(), archive['branches_radius'].tolist()):
+                skeleton._branches_radius[u, v] = skeleton._branches_radius[v, u] = radius
+
+        extras = header['vertex_attributes']
+        for key, xyz in zip(archive['vertex_keys'].tolist(), archive['xyz'].tolist()):
+            attr = dict(zip(XYZ_COLUMNS, xyz))
+            attr.update(extras.get(str(key), {}))
+            skeleton.add_vertex(key, attr_dict=attr)
+
+        facedata = header['facedata']
+        for fkey, vertices, (u, v) in zip(archive['face_keys'].tolist(), archive.faces(), archive['face_owners'].tolist()):
+            skeleton.add_face(vertices, fkey=fkey, attr_dict=facedata.get(str(fkey)) or {})
+            if u != -1:
+                skeleton._set_face_owner(fkey, u if v == -1 else (u, v))
+
+        skeleton.nodes_radius = archive['nodes_radius']
+        skeleton._dirty = set(archive['dirty'].tolist())
+
+    skeleton._node_index = skeleton.node_index()
+    skeleton._max_vertex = header['max_vertex']
+    skeleton._max_face = header['max_face']
+    return skeleton
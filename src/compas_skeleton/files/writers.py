@@ -0,0 +1,294 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+import compas
+
+
+__all__ = [
+    'array_chunks',
+    'write_chunks',
+    'write_obj',
+    'write_ply',
+    'write_stl',
+]
+
+
+BLOCK_SIZE = 65536
+
+STL_TRIANGLE = np.dtype([
+    ('normal', '<f4', (3, )),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute', '<u2')
+])
+
+PLY_QUAD = np.dtype([
+    ('n', 'u1'),
+    ('vertices', '<i4', (4, ))
+])
+
+
+class _VertexStore(object):
+    """Disk backed vertex coordinates, indexed by the vertex indices of the complete mesh."""
+
+    def __init__(self, number_of_vertices):
+        self.number_of_vertices = number_of_vertices
+        self.file = tempfile.TemporaryFile()
+        self.xyz = np.memmap(self.file, dtype=float, mode='w+', shape=(max(1, number_of_vertices), 3))
+
+    def add(self, vertices, xyz):
+        self.xyz[vertices] = xyz
+
+    def blocks(self, size=BLOCK_SIZE):
+        for i in range(0, self.number_of_vertices, size):
+            yield self.xyz[i:i + size]
+
+    def close(self):
+        del self.xyz
+        self.file.close()
+
+
+class _ArrayChunks(object):
+
+    def __init__(self, xyz, faces, chunk_size):
+        self.xyz = xyz
+        self.faces = faces
+        self.chunk_size = chunk_size
+        self.number_of_vertices = len(xyz)
+        self.number_of_faces = len(faces)
+
+    def __iter__(self):
+        yield np.arange(self.number_of_vertices), self.xyz, np.empty((0, 4), dtype=np.int32)
+        for i in range(0, self.number_of_faces, self.chunk_size):
+            faces = np.asarray(self.faces[i:i + self.chunk_size])
+            vertices = np.unique(faces[faces >= 0])
+            yield vertices, self.xyz[vertices], faces
+
+
+def array_chunks(xyz, faces, chunk_size=100000):
+    """Split the vertices and faces of a mesh into chunks for the writers.
+
+    Parameters
+    ----------
+    xyz : :class:`numpy.ndarray`
+        A (V, 3) array of vertex coordinates, for example a memory map.
+    faces : :class:`numpy.ndarray`
+        A (F, N) array of vertex indices padded with -1.
+    chunk_size : int, optional
+        The number of faces per chunk.
+
+    Returns
+    -------
+    iterable
+        Chunks of vertex indices, vertex coordinates and faces.
+        All vertices are in the first chunk, which has no faces.
+
+    """
+    return _ArrayChunks(xyz, faces, chunk_size)
+
+
+def _triangles(faces):
+    """Fan triangulation of faces padded with -1."""
+    return np.concatenate([faces[faces[:, j] >= 0][:, [0, j - 1, j]] for j in range(2, faces.shape[1])])
+
+
+def _spill(chunks, encode):
+    """Collect the vertices of the chunks and write the encoded faces to a temporary file."""
+    store = _VertexStore(chunks.number_of_vertices)
+    spill = tempfile.TemporaryFile()
+    count = 0
+    for vertices, xyz, faces in chunks:
+        store.add(vertices, xyz)
+        if len(faces):
+            spill.write(encode(faces))
+            count += len(faces)
+    spill.seek(0)
+    return store, spill, count
+
+
+def write_stl(path, chunks):
+    """Write subdivision chunks to a binary STL file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    chunks : iterable
+        Chunks of vertex indices, vertex coordinates and faces,
+        as returned by :func:`compas_skeleton.datastructure.mesh_subdivide_catmullclark_chunks_numpy`.
+
+    Returns
+    -------
+    int
+        The number of triangles written.
+
+    Notes
+    -----
+    Every chunk is written as soon as it is available. Quads are split into two triangles.
+
+    """
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(b'compas_skeleton'.ljust(80, b' '))
+        f.write(struct.pack('<I', 0))
+
+        for vertices, xyz, faces in chunks:
+            if not len(faces):
+                continue
+            points = xyz[np.searchsorted(vertices, _triangles(faces))]
+            normals = np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0])
+            lengths = np.linalg.norm(normals, axis=1)
+            normals /= np.where(lengths > 0, lengths, 1.0)[:, None]
+
+            triangles = np.zeros(len(points), dtype=STL_TRIANGLE)
+            triangles['normal'] = normals
+            triangles['vertices'] = points
+            f.write(triangles.tobytes())
+            count += len(points)
+
+        f.seek(80)
+        f.write(struct.pack('<I', count))
+    return count
+
+
+def _ply_faces(faces):
+    sizes = (faces >= 0).sum(axis=1)
+    if np.all(sizes == 4):
+        records = np.empty(len(faces), dtype=PLY_QUAD)
+        records['n'] = 4
+        records['vertices'] = faces[:, :4]
+        return records.tobytes()
+    return b''.join(
+        struct.pack('<B%di' % size, size, *face[:size]) for size, face in zip(sizes.tolist(), faces.tolist())
+    )
+
+
+def write_ply(path, chunks):
+    """Write subdivision chunks to a binary PLY file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    chunks : iterable
+        Chunks of vertex indices, vertex coordinates and faces,
+        as returned by :func:`compas_skeleton.datastructure.mesh_subdivide_catmullclark_chunks_numpy`.
+
+    Returns
+    -------
+    int
+        The number of faces written.
+
+    Notes
+    -----
+    While the chunks are consumed, the vertices are kept in a memory mapped temporary file
+    and the faces are written to a second temporary file, because PLY stores all vertices before the faces.
+
+    """
+    store, spill, count = _spill(chunks, _ply_faces)
+    try:
+        with open(path, 'wb') as f:
+            header = [
+                'ply',
+                'format binary_little_endian 1.0',
+                'comment compas_skeleton',
+                'element vertex {}'.format(store.number_of_vertices),
+                'property float x',
+                'property float y',
+                'property float z',
+                'element face {}'.format(count),
+                'property list uchar int vertex_indices',
+                'end_header',
+            ]
+            f.write(('\n'.join(header) + '\n').encode('ascii'))
+            for block in store.blocks():
+                f.write(block.astype('<f4').tobytes())
+            shutil.copyfileobj(spill, f, BLOCK_SIZE * 16)
+    finally:
+        spill.close()
+        store.close()
+    return count
+
+
+def _obj_faces(faces):
+    faces = faces + 1
+    sizes = (faces > 0).sum(axis=1)
+    if np.all(sizes == 4):
+        return (('f %d %d %d %d\n' * len(faces)) % tuple(faces[:, :4].ravel())).encode('ascii')
+    return ''.join('f {}\n'.format(' '.join(str(key) for key in face[:size])) for size, face in zip(sizes.tolist(), faces.tolist())).encode('ascii')
+
+
+def write_obj(path, chunks, precision=None):
+    """Write subdivision chunks to an OBJ file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    chunks : iterable
+        Chunks of vertex indices, vertex coordinates and faces,
+        as returned by :func:`compas_skeleton.datastructure.mesh_subdivide_catmullclark_chunks_numpy`.
+    precision : str, optional
+        The precision of the coordinates, ``compas.PRECISION`` by default.
+
+    Returns
+    -------
+    int
+        The number of faces written.
+
+    """
+    precision = precision or compas.PRECISION
+    line = 'v %.{0} %.{0} %.{0}\n'.format(precision)
+
+    store, spill, count = _spill(chunks, _obj_faces)
+    try:
+        with open(path, 'wb') as f:
+            f.write(b'# compas_skeleton\n')
+            for block in store.blocks():
+                f.write(((line * len(block)) % tuple(block.ravel())).encode('ascii'))
+            shutil.copyfileobj(spill, f, BLOCK_SIZE * 16)
+    finally:
+        spill.close()
+        store.close()
+    return count
+
+
+WRITERS = {
+    'obj': write_obj,
+    'ply': write_ply,
+    'stl': write_stl,
+}
+
+
+def write_chunks(path, chunks, format=None):
+    """Write subdivision chunks to a file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    chunks : iterable
+        Chunks of vertex indices, vertex coordinates and faces,
+        as returned by :func:`compas_skeleton.datastructure.mesh_subdivide_catmullclark_chunks_numpy`.
+    format : {'obj', 'ply', 'stl'}, optional
+        The file format. By default, the format is derived from the file extension.
+
+    Returns
+    -------
+    int
+        The number of faces written.
+
+    """
+    if not format:
+        format = os.path.splitext(path)[1][1:]
+    format = format.lower()
+    if format not in WRITERS:
+        raise ValueError('Unsupported file format: {}'.format(format))
+    return WRITERS[format](path, chunks)
@@ -559,7 +559,7 @@ class SkeletonObject(BaseObject):
         vec = Vector.from_start_end(sp, ep)
         vec_prvs = self.skeleton.vertex_attribute(key, 'transform')
         vec = add_vectors(vec_prvs, vec)
-        self.skeleton.vertex[key].update({'transform': list(vec)})
+        self.skeleton.vertex_attribute(key, 'transform', list(vec))
         self.clear_mesh_vertices()
 
     def move_skeleton_vertex(self):
@@ -679,6 +679,14 @@ class SkeletonObject(BaseObject):
     def skeleton_merge(self):
         self.skeleton.merge()
 
+    def skeleton_undo(self):
+        if not self.skeleton.undo():
+            print('Nothing to undo.')
+
+    def skeleton_redo(self):
+        if not self.skeleton.redo():
+            print('Nothing to redo.')
+
     config = {
         "name": "modify",
         "message": "Modify",
@@ -732,6 +740,16 @@ class SkeletonObject(BaseObject):
                 "name": "Merge",
                 "message": "Merge",
                 "action": skeleton_merge
+            },
+            {
+                "name": "Undo",
+                "message": "Undo",
+                "action": skeleton_undo
+            },
+            {
+                "name": "Redo",
+                "message": "Redo",
+                "action": skeleton_redo
             }
         ]
     }
@@ -753,6 +771,9 @@ class SkeletonObject(BaseObject):
         """
         compas_rhino.rs.EnableRedraw(True)
 
+        if self.skeleton.history is None:
+            self.skeleton.enable_history()
+
         while True:
             menu = CommandMenu(self.config)
             action = menu.select_action()
@@ -763,11 +784,16 @@ class SkeletonObject(BaseObject):
             if action['name'] == 'Finish':
                 return
 
-            if action['name'] == 'NodeWidth' or action['name'] == 'LeafWidth' or action['name'] == 'LeafExtend':
-                action['action'](self, action['message'].lower())
+            if action['name'] == 'Undo' or action['name'] == 'Redo':
+                action['action'](self)
+
+            elif action['name'] == 'NodeWidth' or action['name'] == 'LeafWidth' or action['name'] == 'LeafExtend':
+                with self.skeleton.edit(action['name']):
+                    action['action'](self, action['message'].lower())
 
             else:
-                action['action'](self)
+                with self.skeleton.edit(action['name']):
+                    action['action'](self)
 
             self.draw()
 
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from compas_skeleton.datastructure import Skeleton
+from compas_skeleton.datastructure.asynchronous import stream
+
+
+LINES = [
+    ([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]),
+    ([0.0, 0.0, 0.0], [-8.6, -5.0, 0.0]),
+    ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0]),
+    ([0.0, 10.0, 0.0], [5.0, 12.0, 0.0]),
+]
+
+
+def test_abuild():
+    async def main():
+        skeleton = await Skeleton.abuild(LINES, node_width=1.5, sub_level=2)
+        return skeleton, await skeleton.ato_arrays()
+
+    skeleton, (xyz, faces) = asyncio.run(main())
+    expected = Skeleton.from_skeleton_lines(LINES)
+    expected.node_width = 1.5
+    expected.update_mesh_vertices_pos()
+    assert skeleton.vertex == expected.vertex
+    assert np.array_equal(xyz, expected.to_arrays(sub_level=2)[0])
+    assert len(faces) == 16 * skeleton.number_of_faces()
+
+
+def test_astream():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+
+    async def main():
+        return [chunk async for chunk in skeleton.astream(sub_level=2, chunk_size=20)]
+
+    chunks = asyncio.run(main())
+    assert len(chunks) > 1
+    assert sum(len(faces) for _, _, faces in chunks) == 16 * skeleton.number_of_faces()
+
+
+def test_stream_closed():
+    state = {'chunks': 0, 'closed': False}
+
+    def chunks():
+        try:
+            while True:
+                state['chunks'] += 1
+                yield state['chunks']
+        finally:
+            time.sleep(0.1)
+            state['closed'] = True
+
+    async def first(executor):
+        iterator = stream(chunks(), executor)
+        async for chunk in iterator:
+            break
+        await iterator.aclose()
+        assert state['closed']
+        return chunk
+
+    async def cancelled(executor):
+        async def consume():
+            async for _ in stream(chunks(), executor):
+                pass
+        task = asyncio.ensure_future(consume())
+        while state['chunks'] < 3:
+            await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert state['closed']
+
+    # the generator is closed before the iteration returns, when it stops early or is cancelled
+    with ThreadPoolExecutor(2) as executor:
+        assert asyncio.run(first(executor)) == 1
+        state.update(chunks=0, closed=False)
+        asyncio.run(cancelled(executor))
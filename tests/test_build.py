@@ -0,0 +1,156 @@
+import json
+import os
+
+import pytest
+
+from compas_skeleton.__main__ import main
+from compas_skeleton.build import Watcher
+from compas_skeleton.build import read_manifest
+
+
+LINES = [
+    [[0.0, 0.0, 0.0], [0.0, 10.0, 0.0]],
+    [[0.0, 0.0, 0.0], [-8.6, -5.0, 0.0]],
+    [[0.0, 0.0, 0.0], [8.6, -5.0, 0.0]],
+]
+
+
+def _manifest(tmpdir, jobs):
+    tmpdir.join('tree.json').write(json.dumps(LINES))
+    path = tmpdir.join('manifest.jsonl')
+    path.write('# jobs\n\n' + '\n'.join(json.dumps(job) for job in jobs) + '\n')
+    return str(path)
+
+
+def test_read_manifest(tmpdir):
+    path = _manifest(tmpdir, [
+        {'lines': 'tree.json'},
+        {'lines': 'tree.json', 'id': 'tube', 'type': 'skeleton3d', 'output': 'out/tube.obj', 'merge': False},
+    ])
+    first, second = read_manifest(path)
+
+    assert first['id'] == '3'
+    assert first['type'] == 'skeleton'
+    assert first['format'] == 'ply'
+    assert first['lines'] == str(tmpdir.join('tree.json'))
+    assert first['output'] == str(tmpdir.join('tree.ply'))
+
+    assert second['id'] == 'tube'
+    assert second['format'] == 'obj'
+    assert second['output'] == str(tmpdir.join('out', 'tube.obj'))
+    assert second['merge'] is False
+
+    output_dir = str(tmpdir.join('build'))
+    assert read_manifest(path, output_dir)[0]['output'] == os.path.join(output_dir, 'tree.ply')
+
+
+@pytest.mark.parametrize('job', [
+    {'output': 'tree.ply'},
+    {'lines': 'tree.json', 'type': 'skeleton4d'},
+    {'lines': 'tree.json', 'type': 'skeleton3d', 'format': 'npy'},
+])
+def test_read_manifest_invalid(tmpdir, job):
+    with pytest.raises(ValueError):
+        read_manifest(_manifest(tmpdir, [job]))
+
+
+def test_cli_build(tmpdir):
+    path = _manifest(tmpdir, [
+        {'lines': 'tree.json', 'sub_level': 2, 'format': 'stl'},
+        {'lines': 'tree.json', 'type': 'skeleton3d', 'output': 'tube.obj'},
+    ])
+    report = str(tmpdir.join('report.jsonl'))
+    assert main(['build', path, '-w', '1', '-q', '--report', report]) == 0
+
+    assert tmpdir.join('tree.stl').size() > 84
+    assert tmpdir.join('tube.obj').size() > 0
+    with open(report, 'r') as f:
+        results = [json.loads(line) for line in f]
+    assert sorted(result['status'] for result in results) == ['ok', 'ok']
+    assert all(result['faces'] > 0 for result in results)
+
+
+def test_cli_build_failure(tmpdir):
+    path = _manifest(tmpdir, [
+        {'lines': 'tree.json'},
+        {'lines': 'missing.json'},
+    ])
+    report = str(tmpdir.join('report.jsonl'))
+    assert main(['build', path, '-w', '1', '-q', '--report', report]) == 1
+
+    # the other jobs are built
+    assert tmpdir.join('tree.ply').check()
+    with open(report, 'r') as f:
+        results = {result['id']: result for result in map(json.loads, f)}
+    assert results['3']['status'] == 'ok'
+    assert results['4']['status'] == 'failed'
+    assert 'missing.json' in results['4']['error']
+
+
+def test_cli_invalid_manifest(tmpdir):
+    path = _manifest(tmpdir, [{'lines': 'tree.json', 'type': 'skeleton4d'}])
+    assert main(['build', path, '-q']) == 2
+    assert main(['build', str(tmpdir.join('missing.jsonl')), '-q']) == 2
+
+
+def test_cli_build_numeric_id(tmpdir):
+    path = _manifest(tmpdir, [
+        {'lines': 'tree.json', 'id': 7},
+        {'lines': 'missing.json', 'id': 8},
+    ])
+    assert [job['id'] for job in read_manifest(path)] == ['7', '8']
+
+    report = str(tmpdir.join('report.jsonl'))
+    assert main(['build', path, '-w', '1', '-q', '--report', report]) == 1
+    with open(report, 'r') as f:
+        results = {result['id']: result for result in map(json.loads, f)}
+    assert results['7']['status'] == 'ok'
+    assert results['8']['status'] == 'failed'
+
+
+def test_cli_build_npz_3d(tmpdir):
+    from compas_skeleton.datastructure import Skeleton3D
+
+    path = _manifest(tmpdir, [{'lines': 'tree.json', 'type': 'skeleton3d', 'output': 'tube.npz'}])
+    assert read_manifest(path)[0]['format'] == 'npz'
+    assert main(['build', path, '-w', '1', '-q']) == 0
+
+    skeleton = Skeleton3D.from_npz(str(tmpdir.join('tube.npz')))
+    assert len(skeleton.node) == 4
+    assert skeleton.number_of_faces() > 0
+
+
+def _touch(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + int(seconds * 1e9)))
+
+
+def test_watcher(tmpdir):
+    path = _manifest(tmpdir, [
+        {'lines': 'tree.json', 'id': 'flat'},
+        {'lines': 'tree.json', 'id': 'tube', 'type': 'skeleton3d', 'output': 'tube.obj'},
+    ])
+    watcher = Watcher(path)
+    assert sorted(result['id'] for result in watcher.poll()) == ['flat', 'tube']
+    assert tmpdir.join('tree.ply').check() and tmpdir.join('tube.obj').check()
+    assert watcher.poll() == []
+    skeletons = dict(watcher.skeletons)
+
+    # moved lines update the skeletons in place
+    moved = [[start, [x * 1.5 for x in end]] for start, end in LINES]
+    tmpdir.join('tree.json').write(json.dumps(moved))
+    _touch(str(tmpdir.join('tree.json')), 1)
+    results = watcher.poll()
+    assert sorted((result['id'], result['status']) for result in results) == [('flat', 'ok'), ('tube', 'ok')]
+    assert all(watcher.skeletons[key] is skeleton for key, skeleton in skeletons.items())
+    assert watcher.skeletons['flat'].vertex_coordinates(1) == [0.0, 15.0, 0.0]
+
+    # a changed job is rebuilt, the others are left as they are
+    tmpdir.join('manifest.jsonl').write('\n'.join(json.dumps(job) for job in [
+        {'lines': 'tree.json', 'id': 'flat'},
+        {'lines': 'tree.json', 'id': 'tube', 'type': 'skeleton3d', 'output': 'tube.stl'},
+    ]))
+    _touch(path, 2)
+    assert [result['id'] for result in watcher.poll()] == ['tube']
+    assert tmpdir.join('tube.stl').check()
+    assert watcher.skeletons['flat'] is skeletons['flat']
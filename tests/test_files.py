@@ -0,0 +1,284 @@
+import io
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+from compas.datastructures import Mesh
+
+from compas_skeleton.datastructure import Skeleton
+from compas_skeleton.datastructure import Skeleton3D
+from compas_skeleton.datastructure import mesh_subdivide_catmullclark_chunks_numpy
+from compas_skeleton.datastructure import mesh_subdivide_catmullclark_numpy
+from compas_skeleton.files import SkeletonArchive
+from compas_skeleton.files import SubdivisionCache
+from compas_skeleton.files import array_chunks
+from compas_skeleton.files import json_dump_mesh
+from compas_skeleton.files import json_load_mesh
+from compas_skeleton.files import write_chunks
+
+
+LINES = [
+    ([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]),
+    ([0.0, 0.0, 0.0], [-8.6, -5.0, 0.0]),
+    ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0]),
+    ([0.0, 10.0, 0.0], [5.0, 12.0, 0.0]),
+]
+
+LINES_3D = [
+    ([0.0, 0.0, 0.0], [0.0, 0.0, 3.0]),
+    ([0.0, 0.0, 0.0], [3.0, 0.0, 0.0]),
+    ([0.0, 0.0, 0.0], [0.0, 3.0, 0.5]),
+    ([0.0, 0.0, 3.0], [2.0, 2.0, 4.0]),
+]
+
+
+def _faces_xyz(xyz, faces, decimals=4):
+    xyz = np.round(np.asarray(xyz, dtype=float), decimals)
+    return sorted(tuple(sorted(tuple(xyz[key]) for key in face if key >= 0)) for face in faces)
+
+
+def _mesh_data(mesh):
+    return mesh.vertex, mesh.face, mesh.edgedata, mesh.attributes
+
+
+def _read_ply(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    end = data.index(b'end_header\n') + len(b'end_header\n')
+    header = data[:end].decode('ascii').splitlines()
+    assert header[:2] == ['ply', 'format binary_little_endian 1.0']
+    nv = int([line for line in header if line.startswith('element vertex')][0].split()[-1])
+    nf = int([line for line in header if line.startswith('element face')][0].split()[-1])
+    xyz = np.frombuffer(data, dtype='<f4', count=nv * 3, offset=end).reshape(nv, 3)
+    offset = end + nv * 12
+    faces = []
+    for _ in range(nf):
+        size = data[offset]
+        faces.append(list(struct.unpack_from('<%di' % size, data, offset + 1)))
+        offset += 1 + 4 * size
+    assert offset == len(data)
+    return xyz, faces
+
+
+def _read_stl(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    count = struct.unpack_from('<I', data, 80)[0]
+    assert len(data) == 84 + 50 * count
+    triangles = np.frombuffer(data, dtype=np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attr', '<u2')]), offset=84)
+    return triangles['vertices']
+
+
+# ==============================================================================
+# writers
+# ==============================================================================
+
+
+@pytest.fixture
+def subdivided():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    vertices, faces, corners = skeleton._subdivision_arrays()
+    xyz, quads = mesh_subdivide_catmullclark_numpy(vertices, faces, k=2, fixed=corners)
+    chunks = mesh_subdivide_catmullclark_chunks_numpy(vertices, faces, k=2, fixed=corners, chunk_size=20)
+    return xyz, quads, chunks
+
+
+def test_write_obj(tmpdir, subdivided):
+    xyz, quads, chunks = subdivided
+    path = str(tmpdir.join('mesh.obj'))
+    assert write_chunks(path, chunks) == len(quads)
+
+    mesh = Mesh.from_obj(path)
+    key_index = mesh.key_index()
+    assert np.allclose(mesh.vertices_attributes('xyz'), xyz, rtol=0, atol=1e-3)
+    assert sorted([key_index[key] for key in mesh.face_vertices(fkey)] for fkey in mesh.faces()) == sorted(quads.tolist())
+
+
+def test_write_ply(tmpdir, subdivided):
+    xyz, quads, chunks = subdivided
+    path = str(tmpdir.join('mesh.ply'))
+    assert write_chunks(path, chunks) == len(quads)
+
+    vertices, faces = _read_ply(path)
+    assert np.allclose(vertices, xyz, rtol=0, atol=1e-5)
+    assert sorted(faces) == sorted(quads.tolist())
+
+
+def test_write_ply_polygons(tmpdir):
+    # faces with fewer than four vertices are written with their own size
+    vertices = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0]]
+    xyz, faces = mesh_subdivide_catmullclark_numpy(vertices, [[0, 1, 2, 3], [1, 4, 2]], k=0)
+    path = str(tmpdir.join('mesh.ply'))
+    write_chunks(path, array_chunks(xyz, faces))
+
+    _, read = _read_ply(path)
+    assert read == [[0, 1, 2, 3], [1, 4, 2]]
+
+
+def test_write_stl(tmpdir, subdivided):
+    xyz, quads, chunks = subdivided
+    path = str(tmpdir.join('mesh.stl'))
+    assert write_chunks(path, chunks) == 2 * len(quads)
+
+    triangles = _read_stl(path)
+    area = 0.5 * np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1).sum()
+    a, b, c, d = (xyz[quads[:, i]] for i in range(4))
+    expected = 0.5 * (np.linalg.norm(np.cross(b - a, c - a), axis=1) + np.linalg.norm(np.cross(c - a, d - a), axis=1)).sum()
+    assert abs(area - expected) < 1e-4 * expected
+    assert set(map(tuple, np.round(triangles.reshape(-1, 3), 4))) == set(map(tuple, np.round(xyz.astype('f4'), 4)))
+
+
+def test_write_unsupported_format(tmpdir, subdivided):
+    with pytest.raises(ValueError):
+        write_chunks(str(tmpdir.join('mesh.3ds')), subdivided[2])
+
+
+def test_skeleton_write(tmpdir):
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    xyz, quads = skeleton.to_arrays(sub_level=2)
+    path = str(tmpdir.join('skeleton.ply'))
+    assert skeleton.write(path, sub_level=2, chunk_size=20) == len(quads)
+
+    vertices, faces = _read_ply(path)
+    assert np.allclose(vertices, xyz, rtol=0, atol=1e-5)
+    assert sorted(faces) == sorted(quads.tolist())
+
+
+# ==============================================================================
+# json
+# ==============================================================================
+
+
+def test_json_round_trip(tmpdir):
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.node_width = 1.5
+    skeleton.update_mesh_vertices_pos()
+
+    path = str(tmpdir.join('skeleton.json'))
+    json_dump_mesh(skeleton, path)
+    reference = str(tmpdir.join('reference.json'))
+    Mesh.to_json(skeleton, reference)
+    with open(path, 'r') as a, open(reference, 'r') as b:
+        assert json.load(a) == json.load(b)
+
+    loaded = json_load_mesh(path, Skeleton)
+    assert isinstance(loaded, Skeleton)
+    assert _mesh_data(loaded) == _mesh_data(skeleton)
+    assert np.array_equal(loaded.to_arrays()[0], skeleton.to_arrays()[0])
+
+    # file objects, pretty printing and the methods of the skeleton
+    stream = io.StringIO()
+    json_dump_mesh(skeleton, stream, pretty=True)
+    stream.seek(0)
+    assert _mesh_data(json_load_mesh(stream, Skeleton)) == _mesh_data(skeleton)
+    skeleton.to_json(path)
+    assert _mesh_data(Skeleton.from_json(path)) == _mesh_data(skeleton)
+
+
+def test_json_round_trip_3d(tmpdir):
+    skeleton = Skeleton3D.from_skeleton_lines([([0.0, 0.0, 0.0], [0.0, 0.0, 3.0]), ([0.0, 0.0, 0.0], [3.0, 0.0, 0.0])])
+    skeleton.generate_mesh()
+    path = str(tmpdir.join('skeleton3d.json'))
+    skeleton.to_json(path)
+    loaded = Skeleton3D.from_json(path)
+    assert (loaded.vertex, loaded.face) == (skeleton.vertex, skeleton.face)
+
+
+# ==============================================================================
+# npz
+# ==============================================================================
+
+
+def test_npz_round_trip(tmpdir):
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.leaf_width = 0.7
+    skeleton.update_mesh_vertices_pos()
+
+    path = str(tmpdir.join('skeleton.npz'))
+    skeleton.to_npz(path)
+    for mmap in (False, True):
+        loaded = Skeleton.from_npz(path, mmap=mmap)
+        assert _mesh_data(loaded) == _mesh_data(skeleton)
+        assert np.array_equal(loaded.to_arrays()[0], skeleton.to_arrays()[0])
+
+    with SkeletonArchive(path) as archive:
+        assert isinstance(archive['xyz'], np.memmap)
+        assert np.array_equal(archive['xyz'], skeleton.vertices_attributes('xyz'))
+        assert archive.attributes['leaf_width'] == 0.7
+        assert archive.faces() == [skeleton.face_vertices(fkey) for fkey in skeleton.faces()]
+
+
+def test_npz_round_trip_3d(tmpdir):
+    skeleton = Skeleton3D.from_skeleton_lines(LINES_3D)
+    skeleton.branch_radius = 0.3
+    skeleton.set_branches_radius(0.2, [(0, 1)])
+    skeleton.generate_mesh()
+
+    path = str(tmpdir.join('skeleton3d.npz'))
+    skeleton.to_npz(path)
+    loaded = Skeleton3D.from_npz(path)
+    assert loaded.node == skeleton.node
+    assert loaded.halfbranch == skeleton.halfbranch
+    assert loaded.branch_radius == 0.3
+    assert loaded.branches_radius() == skeleton.branches_radius()
+    assert loaded.get_branch_radius(1, 0) == 0.2
+    assert (loaded.vertex, loaded.face) == (skeleton.vertex, skeleton.face)
+    assert _faces_xyz(*loaded.to_arrays()) == _faces_xyz(*skeleton.to_arrays())
+
+    # the loaded skeleton is updated incrementally like the original one
+    assert loaded._parameters == skeleton._parameters and not loaded._dirty
+    for sk in (skeleton, loaded):
+        sk.move_node(3, [2.5, 2.0, 4.0])
+        sk.generate_mesh()
+    assert _faces_xyz(*loaded.to_arrays()) == _faces_xyz(*skeleton.to_arrays())
+
+
+# ==============================================================================
+# cache
+# ==============================================================================
+
+
+def test_cache_hit(tmpdir):
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    cache = SubdivisionCache(str(tmpdir))
+    xyz, faces = skeleton.to_arrays(sub_level=2, cache=cache)
+    assert len(cache.entries()) == 1
+
+    cached_xyz, cached_faces = skeleton.to_arrays(sub_level=2, cache=cache)
+    assert isinstance(cached_xyz, np.memmap)
+    assert np.array_equal(cached_xyz, xyz)
+    assert np.array_equal(cached_faces, faces)
+    assert len(cache.entries()) == 1
+
+    # a different input is a different entry
+    skeleton.node_width = 2.0
+    skeleton.update_mesh_vertices_pos()
+    skeleton.to_arrays(sub_level=2, cache=cache)
+    assert len(cache.entries()) == 2
+
+
+def test_cache_eviction(tmpdir):
+    cache = SubdivisionCache(str(tmpdir))
+    xyz, faces = np.zeros((100, 3)), np.zeros((10, 4), dtype=np.int32)
+    a, b, c, d = (cache.key(xyz, faces, None, k) for k in range(4))
+    for i, key in enumerate((a, b, c)):
+        cache.put(key, xyz, faces)
+        os.utime(os.path.join(cache.path, key), (1000 + i, 1000 + i))
+    assert [key for key, _, _ in cache.entries()] == [a, b, c]
+
+    # reading an entry makes it the most recently used one
+    assert cache.get(a) is not None
+    size = cache.entries()[0][2]
+    cache.evict(2 * size)
+    assert [key for key, _, _ in cache.entries()] == [c, a]
+    assert b not in cache and cache.get(b) is None
+
+    cache.max_size = size
+    cache.put(d, xyz, faces)
+    assert [key for key, _, _ in cache.entries()] == [d]
+    assert cache.size() == size
+
+    cache.clear()
+    assert cache.entries() == []
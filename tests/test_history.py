@@ -0,0 +1,185 @@
+import copy
+
+import numpy as np
+
+from compas_skeleton.datastructure import Skeleton
+
+
+LINES = [
+    ([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]),
+    ([0.0, 0.0, 0.0], [-8.6, -5.0, 0.0]),
+    ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0]),
+]
+
+
+def _state(skeleton):
+    return copy.deepcopy((skeleton.vertex, skeleton.face, skeleton.edgedata, skeleton.attributes, skeleton._max_vertex, skeleton._max_face))
+
+
+# ==============================================================================
+# history
+# ==============================================================================
+
+
+def test_undo_redo():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.enable_history()
+    states = [_state(skeleton)]
+
+    with skeleton.edit('widths'):
+        skeleton.node_width = 3.0
+        skeleton.leaf_width = 0.5
+        skeleton.update_mesh_vertices_pos()
+    states.append(_state(skeleton))
+
+    with skeleton.edit('move'):
+        skeleton.update_skeleton_lines([(start, [x * 1.2 for x in end]) for start, end in LINES])
+    states.append(_state(skeleton))
+
+    with skeleton.edit('branch'):
+        skeleton.update_skeleton_lines(LINES + [([0.0, 10.0, 0.0], [5.0, 12.0, 0.0])])
+    states.append(_state(skeleton))
+
+    skeleton.subdivide(1)
+    states.append(_state(skeleton))
+    assert states[-1] != states[-2]
+
+    names = []
+    while skeleton.history.can_undo:
+        names.append(skeleton.undo())
+        assert _state(skeleton) == states[-1 - len(names)]
+    assert names == ['subdivide', 'branch', 'move', 'widths']
+    assert skeleton.undo() is None
+
+    for state in states[1:]:
+        skeleton.redo()
+        assert _state(skeleton) == state
+    assert skeleton.redo() is None
+
+
+def test_edit_discards_redo():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.enable_history()
+    with skeleton.edit('width'):
+        skeleton.node_width = 3.0
+        skeleton.update_mesh_vertices_pos()
+    skeleton.undo()
+    assert skeleton.history.can_redo
+
+    with skeleton.edit('leaf'):
+        skeleton.leaf_width = 0.5
+        skeleton.update_mesh_vertices_pos()
+    assert not skeleton.history.can_redo
+    assert skeleton.undo() == 'leaf'
+    assert not skeleton.history.can_undo
+
+
+def test_max_size():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.enable_history()
+    for width in (2.0, 3.0, 4.0, 5.0):
+        with skeleton.edit(str(width)):
+            skeleton.node_width = width
+            skeleton.update_mesh_vertices_pos()
+    history = skeleton.history
+    sizes = [delta.size for delta in history.undo_stack]
+    assert history.size == sum(sizes)
+
+    # the edits to redo count toward the size of the history
+    skeleton.undo()
+    skeleton.undo()
+    assert history.size == sum(sizes)
+    assert history.size == sum(delta.size for delta in history.undo_stack) + sum(delta.size for delta in history.redo_stack)
+
+    # the oldest edits are dropped first, and then the edits to redo furthest from the current state
+    history.max_size = sizes[0] + sizes[2] + sizes[3]
+    history._trim()
+    assert history.names == ['3.0']
+    assert [delta.name for delta in history.redo_stack] == ['5.0', '4.0']
+    history.max_size = sizes[2]
+    history._trim()
+    assert history.names == [] and [delta.name for delta in history.redo_stack] == ['4.0']
+    assert history.size == sizes[2]
+    assert skeleton.redo() == '4.0' and skeleton.redo() is None
+    assert skeleton.node_width == 4.0
+
+    # a new edit discards the edits to redo, and their size
+    skeleton.undo()
+    with skeleton.edit('leaf'):
+        skeleton.leaf_width = 0.5
+        skeleton.update_mesh_vertices_pos()
+    assert history.size == sum(delta.size for delta in history.undo_stack) <= history.max_size
+
+
+# ==============================================================================
+# forks
+# ==============================================================================
+
+
+def test_fork_isolation():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    original = _state(skeleton)
+    xyz = skeleton.to_arrays()[0].copy()
+
+    fork = skeleton.fork()
+    assert _state(fork) == original
+    assert np.array_equal(fork.to_arrays()[0], xyz)
+
+    # changing the coordinates of the fork leaves the skeleton unchanged
+    fork.node_width = 4.0
+    fork.update_mesh_vertices_pos()
+    assert _state(skeleton) == original
+    assert not np.allclose(fork.to_arrays()[0], xyz)
+
+    # as does changing its topology
+    fork.update_skeleton_lines(LINES + [([0.0, 10.0, 0.0], [5.0, 12.0, 0.0])])
+    assert fork.number_of_faces() > skeleton.number_of_faces()
+    assert _state(skeleton) == original
+    assert np.array_equal(skeleton.to_arrays()[0], xyz)
+
+    # and changing the skeleton leaves the forks unchanged
+    other = skeleton.fork()
+    skeleton.leaf_width = 0.3
+    skeleton.update_mesh_vertices_pos()
+    assert _state(other) == original
+
+
+def test_fork_shares_operators():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.attributes['sub_level'] = 2
+    skeleton.to_arrays()
+    operators = list(skeleton._operators.values())
+    assert len(operators) == 1
+
+    # changing the widths of a fork reuses the subdivision operator of the skeleton
+    fork = skeleton.fork()
+    fork.node_width = 4.0
+    fork.update_mesh_vertices_pos()
+    fork.to_arrays()
+    assert list(skeleton._operators.values()) == operators
+
+    # changing its topology adds an operator, the one of the skeleton still applies to it
+    fork.update_skeleton_lines(LINES + [([0.0, 10.0, 0.0], [5.0, 12.0, 0.0])])
+    xyz = fork.to_arrays()[0]
+    assert len(skeleton._operators) == 2
+    assert np.array_equal(xyz, fork.to_mesh().vertices_attributes('xyz'))
+    assert np.array_equal(skeleton.to_arrays()[0], skeleton.to_mesh().vertices_attributes('xyz'))
+    assert len(skeleton._operators) == 2
+
+
+def test_operators_follow_topology():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.enable_history()
+    skeleton.attributes['sub_level'] = 2
+    xyz = skeleton.to_arrays()[0].copy()
+
+    with skeleton.edit('branch'):
+        skeleton.update_skeleton_lines(LINES + [([0.0, 10.0, 0.0], [5.0, 12.0, 0.0])])
+    assert np.array_equal(skeleton.to_arrays()[0], skeleton.to_mesh().vertices_attributes('xyz'))
+
+    # undoing and redoing the topology changes reuses the operators of the topologies
+    skeleton.undo()
+    assert np.array_equal(skeleton.to_arrays()[0], xyz)
+    skeleton.redo()
+    assert np.array_equal(skeleton.to_arrays()[0], skeleton.to_mesh().vertices_attributes('xyz'))
+    assert len(skeleton._operators) == 2
@@ -0,0 +1,56 @@
+import numpy as np
+from compas.datastructures import Mesh
+
+from compas_skeleton.datastructure import Skeleton
+from compas_skeleton.datastructure import mesh_normals_numpy
+from compas_skeleton.datastructure import mesh_subdivide_catmullclark_numpy
+
+
+CUBE = (
+    [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]],
+    [[0, 3, 2, 1], [4, 5, 6, 7], [0, 1, 5, 4], [1, 2, 6, 5], [2, 3, 7, 6], [3, 0, 4, 7]],
+)
+
+
+def test_normals_match_compas():
+    xyz, faces = mesh_subdivide_catmullclark_numpy(*CUBE, k=2)
+    mesh = Mesh.from_vertices_and_faces(xyz.tolist(), faces.tolist())
+    vertex_normals, face_normals = mesh_normals_numpy(xyz, faces)
+
+    assert np.allclose(face_normals, [mesh.face_normal(fkey) for fkey in mesh.faces()])
+
+    # the vertex normals are weighted by the areas of the faces
+    expected = np.zeros_like(xyz)
+    for fkey in mesh.faces():
+        for key in mesh.face_vertices(fkey):
+            expected[key] += mesh.face_area(fkey) * np.array(mesh.face_normal(fkey))
+    expected /= np.linalg.norm(expected, axis=1)[:, None]
+    # the quads are not planar, compas computes their areas from a fan of triangles around their centroid
+    assert np.allclose(vertex_normals, expected, rtol=0, atol=1e-4)
+
+    # the subdivided cube is convex, its normals point outwards
+    assert np.all(np.einsum('ij,ij->i', vertex_normals, xyz - xyz.mean(axis=0)) > 0)
+
+
+def test_normals_polygons():
+    vertices = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 1], [5, 5, 5]]
+    padded = mesh_normals_numpy(vertices, [[0, 1, 2, 3], [1, 4, 2, -1]])
+    lists = mesh_normals_numpy(vertices, [[0, 1, 2, 3], [1, 4, 2]])
+    assert np.allclose(padded[0], lists[0]) and np.allclose(padded[1], lists[1])
+
+    vertex_normals, face_normals = padded
+    assert np.allclose(face_normals[0], [0, 0, 1])
+    assert np.allclose(face_normals[1], np.array([-1, 0, 1]) / 2 ** 0.5)
+    assert np.allclose(vertex_normals[5], 0)
+
+
+def test_skeleton_normals():
+    skeleton = Skeleton.from_skeleton_lines([([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]), ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0])])
+    skeleton.attributes['sub_level'] = 1
+    xyz, faces, vertex_normals, face_normals = skeleton.to_arrays(normals=True)
+    assert vertex_normals.shape == xyz.shape and face_normals.shape == (len(faces), 3)
+    assert np.allclose(np.abs(vertex_normals[:, 2]), 1)
+
+    mesh = skeleton.to_mesh(normals=True)
+    assert np.allclose([mesh.vertex_attribute(key, 'normal') for key in mesh.vertices()], vertex_normals)
+    assert np.allclose([mesh.face_attribute(fkey, 'normal') for fkey in mesh.faces()], face_normals)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from compas_skeleton.build import BuildService
+from compas_skeleton.build import request_build
+from compas_skeleton.datastructure import Skeleton
+
+
+LINES = [
+    ([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]),
+    ([0.0, 0.0, 0.0], [-8.6, -5.0, 0.0]),
+    ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0]),
+]
+
+
+@pytest.fixture(scope='module')
+def service():
+    with BuildService(workers=2) as service:
+        yield service
+
+
+def test_request_build(service):
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.node_width = 1.5
+    skeleton.update_mesh_vertices_pos()
+    xyz, faces = skeleton.to_arrays(sub_level=2)
+
+    for binary in (True, False):
+        vertices, quads = request_build(service.url, LINES, binary=binary, node_width=1.5, sub_level=2)
+        assert np.allclose(vertices, xyz)
+        assert np.array_equal(quads, faces)
+
+    vertices, quads = request_build(service.url, LINES, format='json', node_width=1.5, sub_level=2)
+    assert np.allclose(vertices, xyz) and quads == faces.tolist()
+    assert request_build(service.url, LINES, format='stl', sub_level=1)[80:84] == np.uint32(2 * 4 * skeleton.number_of_faces()).tobytes()
+
+    status = service.status()
+    assert status['completed'] == 4 and status['failed'] == 0
+    assert status['running'] == status['pending'] == 0
+
+
+def test_request_build_errors(service):
+    with pytest.raises(RuntimeError):
+        request_build(service.url, LINES, format='3ds')
+    with pytest.raises(RuntimeError):
+        request_build(service.url, LINES, type='skeleton4d')
+    with pytest.raises(RuntimeError):
+        request_build(service.url, [], format='json')
+    assert service.status()['failed'] == 1
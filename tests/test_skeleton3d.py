@@ -0,0 +1,359 @@
+import random
+
+import numpy as np
+import pytest
+
+from compas_skeleton.build.jobs import build_skeleton
+from compas_skeleton.build.jobs import update_skeleton
+from compas_skeleton.datastructure import Skeleton3D
+from compas_skeleton.datastructure import skeleton3d_nodes_radius_numpy
+from compas_skeleton.datastructure import skeleton3d_sections_numpy
+
+
+def _lattice(n, jitter=0.2, seed=1, move=None):
+    """The lines of a jittered cubic lattice of n x n x n nodes."""
+    r = random.Random(seed)
+    points = {}
+    for i in range(n):
+        for j in range(n):
+            for k in range(n):
+                points[i, j, k] = [i + r.uniform(-jitter, jitter), j + r.uniform(-jitter, jitter), k + r.uniform(-jitter, jitter)]
+    for ijk, vector in (move or {}).items():
+        points[ijk] = [a + b for a, b in zip(points[ijk], vector)]
+    lines = []
+    for (i, j, k), point in sorted(points.items()):
+        for other in ((i + 1, j, k), (i, j + 1, k), (i, j, k + 1)):
+            if other in points:
+                lines.append((point, points[other]))
+    return lines
+
+
+def _skeleton(lines, **attributes):
+    skeleton = Skeleton3D.from_skeleton_lines(lines)
+    skeleton.branch_radius = 0.1
+    for name, value in attributes.items():
+        setattr(skeleton, name, value)
+    return skeleton
+
+
+def _faces_xyz(skeleton):
+    return sorted(tuple(sorted(tuple(np.round(skeleton.vertex_coordinates(key), 8)) for key in skeleton.face_vertices(fkey))) for fkey in skeleton.faces())
+
+
+def _euler(skeleton):
+    return skeleton.number_of_vertices() - skeleton.number_of_edges() + skeleton.number_of_faces()
+
+
+def _genus(skeleton):
+    # the surface of a connected network of tubes has a handle for every independent cycle of the network
+    return len(list(skeleton.branches())) - len(skeleton.node) + 1
+
+
+def _boundary(skeleton):
+    """The halfedges without an opposite halfedge, the open ends of the sections of leaves."""
+    halfedges = [(u, v) for fkey in skeleton.faces() for u, v in skeleton.face_halfedges(fkey)]
+    assert len(set(halfedges)) == len(halfedges)
+    return set(halfedges) - set((v, u) for u, v in halfedges)
+
+
+def _is_closed(skeleton):
+    return not _boundary(skeleton)
+
+
+def _volume(skeleton):
+    xyz, faces = skeleton.to_arrays()
+    volume = 0.0
+    for face in faces:
+        face = face[face >= 0]
+        for i in range(1, len(face) - 1):
+            volume += np.dot(xyz[face[0]], np.cross(xyz[face[i]], xyz[face[i + 1]])) / 6
+    return volume
+
+
+# ==============================================================================
+# radii
+# ==============================================================================
+
+
+def test_nodes_radius():
+    skeleton = _skeleton(_lattice(3))
+    skeleton.generate_mesh()
+    expected = [skeleton._calculate_node_radius(key) if skeleton.is_node_joint(key) else 0.0 for key in skeleton.node]
+    assert np.allclose(skeleton.nodes_radius, expected, rtol=0, atol=1e-12)
+
+    # the radius of a node is the distance at which the sections of its closest branches touch
+    xyz = [[0, 0, 0], [1, 0, 0], [0, 2, 0], [-1, 1, 0]]
+    halfbranches = [[0, 1], [1, 0], [0, 2], [2, 0], [0, 3], [3, 0]]
+    assert np.allclose(skeleton3d_nodes_radius_numpy(xyz, halfbranches, 0.5), [0.5 / np.tan(np.pi / 8), 0, 0, 0])
+
+
+def test_nodes_radius_overlap():
+    with pytest.raises(ValueError):
+        skeleton3d_nodes_radius_numpy([[0, 0, 0], [1, 0, 0], [2, 0, 0]], [[0, 1], [1, 0], [0, 2], [2, 0]], 0.5)
+
+
+def test_branches_radius():
+    skeleton = _skeleton(_lattice(3), section_length=0.1)
+    branches = list(skeleton.branches())
+    radii = [0.05 + 0.05 * (i % 3) for i in range(len(branches))]
+    skeleton.set_branches_radius(radii)
+    skeleton.generate_mesh()
+
+    assert skeleton.branches_radius() == radii
+    assert skeleton.get_branch_radius(*branches[1][::-1]) == radii[1]
+    expected = [skeleton._calculate_node_radius(key) if skeleton.is_node_joint(key) else 0.0 for key in skeleton.node]
+    assert np.allclose(skeleton.nodes_radius, expected, rtol=0, atol=1e-12)
+    for (u, v), radius in zip(branches, radii):
+        start = np.array([skeleton.node[u][axis] for axis in 'xyz'])
+        axis = np.array([skeleton.node[v][axis] for axis in 'xyz']) - start
+        axis /= np.linalg.norm(axis)
+        for section in (skeleton.halfbranch[u][v], skeleton.halfbranch[v][u]):
+            assert len(section) == skeleton.section_seg_for_radius(radius)
+            points = np.array([skeleton.vertex_coordinates(key) for key in section])
+            assert np.allclose(np.linalg.norm(np.cross(points - start, axis), axis=1), radius)
+
+    assert _is_closed(skeleton)
+    assert _euler(skeleton) == 2 - 2 * _genus(skeleton)
+
+
+def test_branches_radius_regrade():
+    lines = _lattice(3)
+    branches = list(_skeleton(lines).branches())
+    radii = [0.05 + 0.05 * (i % 3) for i in range(len(branches))]
+
+    skeleton = _skeleton(lines)
+    skeleton.generate_mesh()
+    skeleton.set_branches_radius(radii[::2], branches[::2])
+    skeleton.generate_mesh()
+
+    expected = _skeleton(lines)
+    expected.set_branches_radius([radius if i % 2 == 0 else 0.1 for i, radius in enumerate(radii)])
+    expected.generate_mesh()
+    assert _faces_xyz(skeleton) == _faces_xyz(expected)
+
+
+def test_branches_radius_invalid():
+    skeleton = _skeleton(_lattice(2))
+    with pytest.raises(ValueError):
+        skeleton.set_branches_radius([0.1, 0.2])
+    with pytest.raises(ValueError):
+        skeleton.set_branches_radius(0.1, [(0, 7)])
+
+
+# ==============================================================================
+# sections
+# ==============================================================================
+
+
+def test_sections():
+    skeleton = _skeleton(_lattice(3))
+    skeleton.generate_mesh()
+    xyz = skeleton.vertices_attributes('xyz')
+
+    # the sections placed in one batch are the ones placed branch by branch
+    for u, v in skeleton.branches():
+        skeleton._get_pts_for_branch(u, v)
+    assert np.allclose(skeleton.vertices_attributes('xyz'), xyz, rtol=0, atol=1e-12)
+
+    sections = skeleton3d_sections_numpy([[0, 0, 0], [3, 0, 0]], [[0, 1]], 0.5, 6, [1.0, 0.5])
+    assert np.allclose(sections[0, :, :, 0], [[1.0] * 6, [2.5] * 6])
+    assert np.allclose(np.linalg.norm(sections[0, :, :, 1:], axis=2), 0.5)
+    assert np.allclose(sections[0, 0, :, 1:], sections[0, 1, :, 1:])
+
+
+def test_section_resolution():
+    skeleton = _skeleton(_lattice(2))
+    assert skeleton.section_seg_for_radius(1.0) == skeleton.section_seg
+
+    # the edges of the sections are at most section_length long, and deviate at most section_tolerance from the circle
+    skeleton.section_length = 0.1
+    assert [skeleton.section_seg_for_radius(radius) for radius in (0.01, 0.1, 0.2)] == [3, 7, 13]
+    skeleton.section_length = None
+    skeleton.section_tolerance = 0.01
+    assert [skeleton.section_seg_for_radius(radius) for radius in (0.01, 0.1, 1.0)] == [3, 7, 23]
+    skeleton.section_length = 0.1
+    assert skeleton.section_seg_for_radius(1.0) == 63
+
+    skeleton.generate_mesh()
+    for u, v in skeleton.branches():
+        assert len(skeleton.halfbranch[u][v]) == len(skeleton.halfbranch[v][u]) == 7
+    assert _is_closed(skeleton)
+    assert _euler(skeleton) == 2 - 2 * _genus(skeleton)
+
+    # changing the resolution generates the whole mesh again
+    skeleton.section_length = 0.05
+    skeleton.generate_mesh()
+    assert all(len(skeleton.halfbranch[u][v]) == 13 for u, v in skeleton.branches())
+    assert _is_closed(skeleton)
+
+
+# ==============================================================================
+# mesh
+# ==============================================================================
+
+
+def test_generate_mesh_workers(monkeypatch):
+    import compas_skeleton.datastructure.skeleton3d as skeleton3d
+
+    # batches of a few nodes, so that every worker computes several of them
+    monkeypatch.setattr(skeleton3d, 'NODE_BATCH_SIZE', 4)
+    lines = _lattice(3)
+    skeleton = _skeleton(lines)
+    skeleton.generate_mesh()
+    parallel = _skeleton(lines)
+    parallel.generate_mesh(workers=2)
+    assert parallel.face == skeleton.face
+    assert parallel.vertex == skeleton.vertex
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_euler_characteristic(seed):
+    skeleton = _skeleton(_lattice(3, seed=seed))
+    skeleton.generate_mesh()
+    assert _is_closed(skeleton)
+    assert _euler(skeleton) == 2 - 2 * _genus(skeleton)
+    assert _volume(skeleton) > 0
+
+
+def test_stitched_nodes():
+    # a bent ring of nodes with two branches is a torus
+    angles = np.linspace(0, 2 * np.pi, 9)[:-1]
+    points = [[3 * np.cos(a), 3 * np.sin(a), 0.5 * (i % 2)] for i, a in enumerate(angles)]
+    skeleton = _skeleton([(points[i], points[(i + 1) % 8]) for i in range(8)], branch_radius=0.3)
+    skeleton.generate_mesh()
+    assert _is_closed(skeleton)
+    assert _euler(skeleton) == 0
+    assert _volume(skeleton) > 0
+
+
+@pytest.mark.parametrize('quality', [False, True])
+def test_merge_triangles(quality):
+    skeleton = _skeleton(_lattice(3))
+    skeleton.generate_mesh()
+    triangles = [fkey for fkey in skeleton.faces() if len(skeleton.face_vertices(fkey)) == 3]
+    pairs = skeleton._triangle_pairs_by_quality() if quality else skeleton._triangle_pairs()
+    assert len(set(fkey for pair in pairs for fkey in pair)) == 2 * len(pairs)
+    assert set(fkey for pair in pairs for fkey in pair) <= set(triangles)
+
+    faces = skeleton.number_of_faces()
+    skeleton.merge_triangles(quality)
+    quads = [fkey for fkey in skeleton.faces() if len(skeleton.face_vertices(fkey)) == 4]
+    assert skeleton.number_of_faces() == faces - len(pairs)
+    assert _is_closed(skeleton)
+    assert _euler(skeleton) == 2 - 2 * _genus(skeleton)
+    if quality:
+        # no concave quads
+        merged = [fkey for fkey in quads if skeleton._face_owner.get(fkey) in skeleton.node]
+        assert merged and all(skeleton._quad_error(skeleton.face_vertices(fkey)) is not None for fkey in merged)
+
+
+def test_merge_triangles_first_face():
+    skeleton = Skeleton3D()
+    for key, xyz in enumerate([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]):
+        skeleton.add_vertex(key, x=xyz[0], y=xyz[1], z=xyz[2])
+    skeleton.add_face([0, 1, 2], fkey=0)
+    skeleton.add_face([0, 2, 3], fkey=1)
+    skeleton.merge_triangles()
+    assert [skeleton.face_vertices(fkey) for fkey in skeleton.faces()] == [[0, 1, 2, 3]]
+
+
+def test_stream_mesh(tmpdir):
+    lines = _lattice(3)
+    skeleton = _skeleton(lines)
+    chunks = skeleton.stream_mesh(chunk_size=100)
+    xyz = np.zeros((chunks.number_of_vertices, 3))
+    faces = []
+    for vertices, points, chunk in chunks:
+        xyz[vertices] = points
+        faces.extend(chunk.tolist())
+    assert skeleton.number_of_faces() == 0
+
+    full = _skeleton(lines)
+    full.generate_mesh()
+    assert len(faces) > 100
+    streamed = sorted(tuple(sorted(tuple(np.round(xyz[i], 8)) for i in face if i >= 0)) for face in faces)
+    assert streamed == _faces_xyz(full)
+
+    assert skeleton.write(str(tmpdir.join('skeleton.ply')), chunk_size=100) == full.number_of_faces()
+    assert skeleton.number_of_faces() == 0
+
+
+# ==============================================================================
+# editing
+# ==============================================================================
+
+
+def test_generate_mesh_twice():
+    skeleton = _skeleton(_lattice(2))
+    skeleton.generate_mesh()
+    faces = _faces_xyz(skeleton)
+    skeleton.generate_mesh()
+    assert _faces_xyz(skeleton) == faces
+
+
+def test_move_node():
+    lines = _lattice(3)
+    moved = _lattice(3, move={(1, 1, 1): [0.1, 0.05, 0.0], (2, 0, 2): [0.0, 0.0, -0.1]})
+
+    skeleton = _skeleton(lines)
+    skeleton.generate_mesh()
+    network = Skeleton3D.from_skeleton_lines(moved)
+    for key in skeleton.node:
+        xyz = [network.node[key][axis] for axis in 'xyz']
+        if xyz != [skeleton.node[key][axis] for axis in 'xyz']:
+            skeleton.move_node(key, xyz)
+    skeleton.generate_mesh()
+
+    expected = _skeleton(moved)
+    expected.generate_mesh()
+    assert _faces_xyz(skeleton) == _faces_xyz(expected)
+
+
+def test_add_delete_branch():
+    lines = _lattice(3)
+    skeleton = _skeleton(lines)
+    skeleton.generate_mesh()
+    u, v = list(skeleton.branches())[10]
+    skeleton.delete_branch(u, v)
+    skeleton.generate_mesh()
+
+    expected = _skeleton(lines)
+    del expected.halfbranch[u][v]
+    del expected.halfbranch[v][u]
+    expected.generate_mesh()
+    assert _faces_xyz(skeleton) == _faces_xyz(expected)
+    assert _euler(skeleton) == 2 - 2 * _genus(skeleton)
+
+    skeleton.add_branch(u, v)
+    skeleton.generate_mesh()
+    full = _skeleton(lines)
+    full.generate_mesh()
+    assert _faces_xyz(skeleton) == _faces_xyz(full)
+
+    # the faces are indexed by their node or branch
+    assert set(skeleton._face_owner) == set(skeleton.faces())
+    owners = {}
+    for fkey, owner in skeleton._face_owner.items():
+        owners.setdefault(owner, set()).add(fkey)
+    assert skeleton._owner_faces == owners
+
+
+@pytest.mark.parametrize('merge', [False, True])
+def test_update_skeleton_lines(merge):
+    job = {'type': 'skeleton3d', 'branch_radius': 0.1, 'merge': merge}
+    lines = _lattice(3)
+    skeleton = build_skeleton(job, lines)
+
+    # moved lines keep the node keys, the mesh is the one of a full rebuild
+    moved = _lattice(3, move={(1, 1, 1): [0.1, 0.05, 0.0]})
+    update_skeleton(skeleton, job, moved)
+    assert _faces_xyz(skeleton) == _faces_xyz(build_skeleton(job, moved))
+
+    # new and removed lines add and delete branches and nodes
+    extended = moved[:-3] + [(moved[0][0], [-2.0, -2.0, -2.0])]
+    update_skeleton(skeleton, job, extended)
+    expected = build_skeleton(job, extended)
+    assert len(list(skeleton.branches())) == len(list(expected.branches()))
+    assert skeleton.number_of_faces() == expected.number_of_faces()
+    assert len(_boundary(skeleton)) == len(_boundary(expected)) > 0
+    assert _euler(skeleton) == _euler(expected)
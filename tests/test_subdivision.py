@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from compas_skeleton.datastructure import Skeleton
+from compas_skeleton.datastructure import mesh_subdivide_catmullclark_adaptive_numpy
+from compas_skeleton.datastructure import mesh_subdivide_catmullclark_numpy
+
+
+LINES = [
+    ([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]),
+    ([0.0, 0.0, 0.0], [-8.6, -5.0, 0.0]),
+    ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0]),
+    ([0.0, 10.0, 0.0], [5.0, 12.0, 0.0]),
+]
+
+CUBE = (
+    [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]],
+    [[0, 3, 2, 1], [4, 5, 6, 7], [0, 1, 5, 4], [1, 2, 6, 5], [2, 3, 7, 6], [3, 0, 4, 7]],
+)
+
+
+def _faces_xyz(xyz, faces):
+    """The faces as sorted tuples of rounded vertex coordinates, independent of the vertex order."""
+    xyz = np.round(np.asarray(xyz, dtype=float), 8)
+    return sorted(tuple(sorted(tuple(xyz[key]) for key in face if key >= 0)) for face in faces)
+
+
+@pytest.mark.parametrize('k', [0, 1, 2, 3])
+def test_catmullclark_numpy_matches_compas(k):
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    mesh = skeleton._subdivide(k)
+    key_index = mesh.key_index()
+    expected = _faces_xyz(mesh.vertices_attributes('xyz'), [[key_index[key] for key in mesh.face_vertices(fkey)] for fkey in mesh.faces()])
+
+    vertices, faces, corners = skeleton._subdivision_arrays()
+    xyz, quads = mesh_subdivide_catmullclark_numpy(vertices, faces, k=k, fixed=corners)
+    assert len(xyz) == mesh.number_of_vertices()
+    assert _faces_xyz(xyz, quads) == expected
+
+
+def test_catmullclark_numpy_workers():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    vertices, faces, corners = skeleton._subdivision_arrays()
+
+    xyz, quads = mesh_subdivide_catmullclark_numpy(vertices, faces, k=3, fixed=corners)
+    xyz_parallel, quads_parallel = mesh_subdivide_catmullclark_numpy(vertices, faces, k=3, fixed=corners, workers=3)
+    assert np.array_equal(quads, quads_parallel)
+    assert np.allclose(xyz, xyz_parallel, rtol=0, atol=1e-12)
+
+
+def test_to_mesh_workers():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.attributes['sub_level'] = 2
+    mesh = skeleton.to_mesh()
+    parallel = skeleton.to_mesh(workers=3)
+    assert parallel.number_of_faces() == mesh.number_of_faces()
+    assert np.allclose(parallel.vertices_attributes('xyz'), mesh.vertices_attributes('xyz'), rtol=0, atol=1e-12)
+
+
+def test_to_arrays():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.attributes['sub_level'] = 2
+    xyz, faces = skeleton.to_arrays()
+    assert xyz.flags.c_contiguous and faces.flags.c_contiguous
+    assert faces.dtype == np.int32 and faces.shape == (16 * skeleton.number_of_faces(), 4)
+
+    mesh = skeleton.to_mesh()
+    assert np.array_equal(xyz, mesh.vertices_attributes('xyz'))
+    assert faces.tolist() == [mesh.face_vertices(fkey) for fkey in mesh.faces()]
+
+    xyz32, faces32 = skeleton.to_arrays(sub_level=2, dtype='float32')
+    assert xyz32.dtype == np.float32
+    assert np.allclose(xyz32, xyz, atol=1e-5)
+    assert np.array_equal(faces32, faces)
+
+    # at level 0, triangles are padded
+    _, coarse = skeleton.to_arrays(sub_level=0)
+    assert coarse.shape == (skeleton.number_of_faces(), 4)
+    assert sorted((coarse >= 0).sum(axis=1).tolist()) == sorted(len(skeleton.face_vertices(fkey)) for fkey in skeleton.faces())
+
+
+def test_catmullclark_adaptive_is_crack_free():
+    vertices, faces = CUBE
+    xyz, polygons = mesh_subdivide_catmullclark_adaptive_numpy(vertices, faces, k=4, min_level=1, features=[[0, 0, 0]], radius=0.4)
+
+    # the faces are refined to different levels
+    assert 6 * 4 < len(polygons) < 6 * 4 ** 4
+    assert max(len(face) for face in polygons) > 4
+
+    # a closed surface without T-junctions: every halfedge has an opposite one, and the Euler characteristic of a sphere
+    halfedges = [(u, v) for face in polygons for u, v in zip(face, face[1:] + face[:1])]
+    assert len(set(halfedges)) == len(halfedges)
+    assert set(halfedges) == set((v, u) for u, v in halfedges)
+    used = set(key for face in polygons for key in face)
+    assert len(used) - len(halfedges) // 2 + len(polygons) == 2
+
+
+def test_to_mesh_adaptive():
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    skeleton.attributes['sub_level'] = 3
+    mesh = skeleton.to_mesh(adaptive=True)
+    assert skeleton.number_of_faces() * 4 < mesh.number_of_faces() < skeleton.number_of_faces() * 4 ** 3
+
+    # no cracks: the boundary is one closed loop, like the one of the uniform subdivision
+    uniform = skeleton.to_mesh()
+    assert len(mesh.vertices_on_boundaries()) == len(uniform.vertices_on_boundaries()) == 1
+    assert mesh.euler() == uniform.euler()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from compas_skeleton.datastructure import Skeleton
+from compas_skeleton.datastructure import SubdivisionSweep
+
+
+LINES = [
+    ([0.0, 0.0, 0.0], [0.0, 10.0, 0.0]),
+    ([0.0, 0.0, 0.0], [-8.6, -5.0, 0.0]),
+    ([0.0, 0.0, 0.0], [8.6, -5.0, 0.0]),
+    ([0.0, 10.0, 0.0], [5.0, 12.0, 0.0]),
+]
+
+WIDTHS = [1.0, 1.5, 2.0, 2.5, 3.0]
+
+
+def _expected(skeleton, width):
+    fork = skeleton.fork()
+    fork.node_width = width
+    fork.update_mesh_vertices_pos()
+    return fork.to_arrays(sub_level=2)
+
+
+def _extend(skeleton):
+    skeleton.leaf_extend = 2.0
+    skeleton.update_mesh_vertices_pos()
+
+
+def _fail(skeleton):
+    raise RuntimeError('invalid variant')
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_sweep(workers):
+    skeleton = Skeleton.from_skeleton_lines(LINES)
+    with SubdivisionSweep(skeleton, sub_level=2, workers=workers) as sweep:
+        vertices, faces = sweep.run([{'node_width': width} for width in WIDTHS])
+        assert len(vertices) == len(WIDTHS)
+        for xyz, width in zip(vertices, WIDTHS):
+            expected, expected_faces = _expected(skeleton, width)
+            assert np.allclose(xyz, expected, rtol=0, atol=1e-12)
+            assert np.array_equal(faces, expected_faces)
+
+        # functions and coordinates
+        coordinates = np.array([sweep.coordinates({'node_width': width}) for width in WIDTHS])
+        assert np.allclose(sweep.run(coordinates)[0], vertices, rtol=0, atol=1e-12)
+        extended = sweep.run([_extend])[0][0]
+        fork = skeleton.fork()
+        _extend(fork)
+        assert np.allclose(extended, fork.to_arrays(sub_level=2)[0], rtol=0, atol=1e-12)
+
+        with pytest.raises(ValueError):
+            sweep.run(coordinates[:, :-1])
+
+        # a failing variant fails the run, the sweep can be run again
+        with pytest.raises(RuntimeError):
+            sweep.run([{'node_width': 1.0}, _fail] * 4)
+        assert np.allclose(sweep.run(coordinates)[0], vertices, rtol=0, atol=1e-12)